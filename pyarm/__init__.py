@@ -42,5 +42,13 @@ __version__ = '1.1.dev1'
 
 __all__ = ['agent',
            'gui',
-           'model']
+           'model',
+           'simulate',
+           'simulation']
+
+def simulate(arm, muscle, agent, num_steps, delta_time):
+    "Run a headless simulation (see pyarm.simulation.simulate)."
+    # Imported here so that "import pyarm" doesn't require numpy (setup.py)
+    from pyarm.simulation import simulate
+    return simulate(arm, muscle, agent, num_steps, delta_time)
 
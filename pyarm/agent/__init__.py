@@ -24,8 +24,11 @@
 
 __all__ = ['filereader',
            'heaviside',
+           'ilqg',
+           'ilqg6',
            'ilqg6_agent',
            'ilqg_agent',
+           'mpc',
            'oscillator',
            'random_oscillator',
            'random_signal',
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Iterative Linear Quadratic Gaussian (iLQG) trajectory optimizer.
+
+The dynamics are linearized with the analytical Jacobians of
+pyarm.model.jacobian (the whole trajectory in one call), the backward pass
+computes the feedback gains with a Levenberg-Marquardt regularization and
+the forward pass is line searched. Commands are kept in [umin, umax].
+
+The cost of a trajectory is :
+
+    sum_t (control_weight * |u_t|^2 + running_weight * |q_t - target|^2)
+    + position_weight * |q_T - target|^2 + velocity_weight * |w_T|^2
+
+This module also provides the init()/getcmd() interface used by
+pyarm.agent.ilqg_agent (torque commands, see pyarm.model.dirty_wrapper).
+
+References :
+[1] W. Li and E. Todorov. "Iterative linear quadratic regulator design for
+nonlinear biological movement systems". ICINCO, 2004.
+[2] Y. Tassa, N. Mansard and E. Todorov. "Control-limited differential
+dynamic programming". ICRA, 2014.
+"""
+
+import time
+import numpy as np
+
+from pyarm.model import jacobian
+from pyarm.model.bundle import ModelBundle
+
+# Default parameters
+EPS = 1e-5                # Convergence tolerance (relative cost improvement)
+MAX_ITERATIONS = 100      # Maximum number of iterations per solve()
+
+CONTROL_WEIGHT = 1e-4
+RUNNING_WEIGHT = 0.
+POSITION_WEIGHT = 1.
+VELOCITY_WEIGHT = 0.01
+
+# Line search step sizes
+ALPHAS = 1.1 ** -np.arange(10) ** 2
+
+# Levenberg-Marquardt regularization
+MU_MIN, MU_MAX = 1e-6, 1e10
+
+def cholesky_solve(a, b):
+    """Solve a x = b for a symmetric positive definite 'a'.
+
+    Raise numpy.linalg.LinAlgError if 'a' is not positive definite."""
+    L = np.linalg.cholesky(a)
+    return np.linalg.solve(L.T, np.linalg.solve(L, b))
+
+class Solver:
+    """iLQG solver for an arm model driven by a muscle model.
+
+    The state is (shoulder angle, elbow angle, shoulder velocity, elbow
+    velocity). The arm model should be unbounded: the Jacobians are those of
+    the unbounded dynamics.
+
+    The last solution (commands, states and feedback gains) is kept and used
+    as the initial guess of the next solve() call (warm start).
+
+    Usage :
+    solver = Solver(arm, muscle, delta_time, horizon, target)
+    converged = solver.solve(initial_state)
+    commands = solver.commands
+    """
+
+    # SOLUTION ################################################################
+
+    commands = None           # Open loop commands, shape (horizon, n)
+    states = None             # States, shape (horizon + 1, 4)
+    gains = None              # Feedback gains, shape (horizon, n, 4)
+    cost = None
+    iterations = 0            # Number of iterations of the last solve()
+    timed_out = False         # True if the last solve() reached its deadline
+    iteration_time = 0.       # Duration of the last iteration (s)
+
+    ###########################################################################
+
+    def __init__(self, arm, muscle, delta_time, horizon, target,
+                 num_commands=6, eps=EPS, max_iterations=MAX_ITERATIONS,
+                 control_weight=CONTROL_WEIGHT,
+                 running_weight=RUNNING_WEIGHT,
+                 position_weight=POSITION_WEIGHT,
+                 velocity_weight=VELOCITY_WEIGHT):
+        self.arm = arm
+        self.muscle = muscle
+        self.delta_time = delta_time
+        self.horizon = horizon
+        self.num_commands = num_commands
+
+        self.eps = eps
+        self.max_iterations = max_iterations
+
+        self.control_weight = control_weight
+        self.set_running_weight(running_weight)
+        self.final_weights = np.array([position_weight, position_weight,
+                                       velocity_weight, velocity_weight])
+        self.set_target(target)
+
+        self.umin = getattr(muscle, 'umin', -np.inf)
+        self.umax = getattr(muscle, 'umax', np.inf)
+
+        # Scalar fast path for the rollouts (if the models are supported)
+        try:
+            self.bundle = ModelBundle(arm, muscle)
+        except ValueError:
+            self.bundle = None
+
+    def set_running_weight(self, running_weight):
+        "Set the weight of the running position error cost."
+        self.running_weights = np.array([running_weight, running_weight,
+                                         0., 0.])
+
+    def set_target(self, target):
+        "Set the target joint angles (rd) (the target velocity is null)."
+        self.target = np.array([target[0], target[1], 0., 0.])
+
+    # COST ####################################################################
+
+    def total_cost(self, states, commands):
+        "Cost of a trajectory."
+        errors = (states - self.target)**2
+        return self.control_weight * np.sum(commands**2) \
+               + np.sum(np.dot(errors[:-1], self.running_weights)) \
+               + np.dot(self.final_weights, errors[-1])
+
+    # SOLVER ##################################################################
+
+    def solve(self, initial_state, commands=None, deadline=None):
+        """Optimize the commands from initial_state.
+
+        If 'commands' is None, the last solution is used as initial guess
+        (or null commands for the first call).
+
+        'deadline' is a time.perf_counter() value: no iteration is started if
+        it is expected to end after the deadline (no line search trial is
+        started after it) and the best solution found so far is kept.
+
+        Return True if the relative cost improvement went below eps."""
+        initial_state = np.array(initial_state, dtype=np.float64)
+
+        if commands is None:
+            commands = self.commands
+        if commands is None:
+            commands = np.zeros([self.horizon, self.num_commands])
+        commands = np.clip(np.array(commands, dtype=np.float64),
+                           self.umin, self.umax)
+
+        states = self.rollout(initial_state, commands)
+        cost = self.total_cost(states, commands)
+        gains = np.zeros([self.horizon, self.num_commands, 4])
+
+        mu = 1.
+        converged = False
+        self.timed_out = False
+        self.iterations = 0
+
+        for iteration in range(self.max_iterations):
+            iteration_start = time.perf_counter()
+            if deadline is not None \
+                    and iteration_start + self.iteration_time >= deadline:
+                self.timed_out = True
+                break
+            self.iterations += 1
+
+            # Linearize the whole trajectory in one call
+            next_states, A, B = jacobian.step_jacobians(self.arm,
+                                                        self.muscle,
+                                                        states[:-1],
+                                                        commands,
+                                                        self.delta_time)
+
+            # Backward pass (increase the regularization until it succeeds)
+            while True:
+                result = self.backward_pass(A, B, states, commands, mu)
+                if result is not None:
+                    break
+                mu = max(mu * 10., MU_MIN)
+                if mu > MU_MAX:
+                    break
+
+            if result is None:
+                break
+            feedforward, feedback = result
+
+            # Forward pass with line search
+            accepted = False
+            for alpha in ALPHAS:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    self.timed_out = True
+                    break
+                new_commands, new_states = self.forward_pass(initial_state,
+                                                             states,
+                                                             commands,
+                                                             alpha
+                                                             * feedforward,
+                                                             feedback)
+                new_cost = self.total_cost(new_states, new_commands)
+                if new_cost < cost:
+                    accepted = True
+                    break
+
+            if self.timed_out:
+                break
+
+            if not accepted:
+                mu = max(mu * 10., MU_MIN)
+                if mu > MU_MAX:
+                    break
+                continue
+
+            self.iteration_time = time.perf_counter() - iteration_start
+            improvement = (cost - new_cost) / max(abs(cost), 1e-12)
+            states, commands, cost, gains = new_states, new_commands, \
+                                            new_cost, feedback
+            mu = mu / 10. if mu / 10. > MU_MIN else 0.
+
+            if improvement < self.eps:
+                converged = True
+                break
+
+        self.commands, self.states, self.gains = commands, states, gains
+        self.cost = cost
+
+        return converged
+
+    def backward_pass(self, A, B, states, commands, mu):
+        """Compute the feedforward commands and the feedback gains.
+
+        The value function derivatives are stacked as V = [Vx | Vxx] and the
+        gains as [k | K], so that each step costs one product per Jacobian
+        and one Cholesky solve. The regularization mu is added to luu, ie.
+        to the whole Quu: its restriction to the free commands is the same as
+        regularizing the free block only.
+
+        Return None if a regularized Quu is not positive definite."""
+        horizon, num_commands = commands.shape
+
+        # Cost derivatives (vectorized over the whole trajectory)
+        lu = 2. * self.control_weight * commands
+        lx = 2. * self.running_weights * (states[:-1] - self.target)
+        lxx = np.diag(2. * self.running_weights)
+        luu = 2. * self.control_weight * np.eye(num_commands) \
+              + mu * np.eye(num_commands)
+
+        # V = [Vx | Vxx] (4x5)
+        V = np.empty([4, 5])
+        V[:, 0] = 2. * self.final_weights * (states[-1] - self.target)
+        V[:, 1:] = np.diag(2. * self.final_weights)
+
+        # The feedforward commands k and the feedback gains K are stored
+        # together: kK[t] = [k | K] (num_commands x 5)
+        kK = np.zeros([horizon, num_commands, 5])
+
+        At = A.transpose(0, 2, 1)
+        Bt = B.transpose(0, 2, 1)
+
+        for t in range(horizon - 1, -1, -1):
+            # [Vx | Vxx A]
+            VA = np.empty([4, 5])
+            VA[:, 0] = V[:, 0]
+            VA[:, 1:] = np.dot(V[:, 1:], A[t])
+
+            Q_x = np.dot(At[t], VA)             # [Qx | Qxx]
+            Q_x[:, 0] += lx[t]
+            Q_x[:, 1:] += lxx
+            Q_u = np.dot(Bt[t], VA)             # [Qu | Qux]
+            Q_u[:, 0] += lu[t]
+            Quu = luu + np.dot(Bt[t], np.dot(V[:, 1:], B[t]))
+
+            # Commands stuck on a bound are not optimized [2]
+            Qu = Q_u[:, 0]
+            free = ~(((commands[t] <= self.umin) & (Qu > 0.))
+                     | ((commands[t] >= self.umax) & (Qu < 0.)))
+
+            if free.all():
+                try:
+                    kK[t] = -cholesky_solve(Quu, Q_u)
+                except np.linalg.LinAlgError:
+                    return None
+            elif free.any():
+                index = np.flatnonzero(free)
+                try:
+                    kK[t, index] = -cholesky_solve(
+                            Quu[index[:, np.newaxis], index], Q_u[index])
+                except np.linalg.LinAlgError:
+                    return None
+
+            # V = Q_x + K^T (Quu [k | K] + [Qu | Qux]) + Qux^T [k | K]
+            K = kK[t, :, 1:]
+            V = Q_x + np.dot(K.T, np.dot(Quu - mu * np.eye(num_commands),
+                                         kK[t]) + Q_u) \
+                + np.dot(Q_u[:, 1:].T, kK[t])
+            V[:, 1:] = 0.5 * (V[:, 1:] + V[:, 1:].T)
+
+        feedforward = kK[:, :, 0]
+        feedback = kK[:, :, 1:]
+
+        return feedforward, feedback
+
+    def forward_pass(self, initial_state, states, commands, feedforward,
+                     feedback):
+        "Apply the new control law and return the new commands and states."
+        new_commands = np.empty_like(commands)
+        new_states = np.empty_like(states)
+        new_states[0] = initial_state
+
+        for t in range(commands.shape[0]):
+            command = commands[t] + feedforward[t] \
+                      + np.dot(feedback[t], new_states[t] - states[t])
+            new_commands[t] = np.clip(command, self.umin, self.umax)
+            new_states[t + 1] = self.step(new_states[t], new_commands[t])
+
+        return new_commands, new_states
+
+    def rollout(self, initial_state, commands):
+        "Compute the states reached with the open loop commands."
+        states = np.empty([commands.shape[0] + 1, 4])
+        states[0] = initial_state
+        for t in range(commands.shape[0]):
+            states[t + 1] = self.step(states[t], commands[t])
+        return states
+
+    def step(self, state, command):
+        "Compute the next state."
+        bundle = self.bundle
+        if bundle is not None:
+            bundle.angles = (float(state[0]), float(state[1]))
+            bundle.velocities = (float(state[2]), float(state[3]))
+            bundle.step(command, self.delta_time)
+            return np.array(bundle.angles + bundle.velocities)
+
+        arm = self.arm
+        arm.angles = state[0:2].copy()
+        arm.velocities = state[2:4].copy()
+        torque = self.muscle.compute_torque(arm.angles, arm.velocities,
+                                            command, record=False)
+        arm.compute_acceleration(torque, self.delta_time, record=False)
+        return np.concatenate([arm.angles, arm.velocities])
+
+    def get_commands(self, t, state):
+        "Return the closed loop commands for the time step t."
+        command = self.commands[t] \
+                  + np.dot(self.gains[t], np.asarray(state) - self.states[t])
+        return np.clip(command, self.umin, self.umax)
+
+# AGENT INTERFACE #############################################################
+
+class Controller:
+    """init()/getcmd() interface of the former compiled ilqg modules.
+
+    make_solver(target, delta_time, eps, horizon) builds the Solver."""
+
+    def __init__(self, make_solver):
+        self.make_solver = make_solver
+        self.solver = None
+        self.step = 0
+
+    def init(self, qs_target, qe_target, delta_time, eps, maxstep,
+             init_qs, init_qe, init_qps, init_qpe):
+        """Optimize a maxstep steps movement to (qs_target, qe_target).
+
+        The last solution is reused as initial guess when the horizon and
+        delta_time are unchanged. Return 0 if the optimization converged, 1
+        otherwise."""
+        solver = self.solver
+        if solver is None or solver.horizon != maxstep \
+                          or solver.delta_time != delta_time:
+            solver = self.make_solver((qs_target, qe_target), delta_time,
+                                      eps, maxstep)
+            self.solver = solver
+        else:
+            solver.set_target((qs_target, qe_target))
+            solver.eps = eps
+
+        self.step = 0
+        converged = solver.solve((init_qs, init_qe, init_qps, init_qpe))
+
+        return 0 if converged else 1
+
+    def getcmd(self, qps, qpe, qs, qe):
+        "Return the next closed loop commands (null after the horizon)."
+        if self.step >= self.solver.horizon:
+            return [0.] * self.solver.num_commands
+
+        commands = self.solver.get_commands(self.step, (qs, qe, qps, qpe))
+        self.step += 1
+
+        return commands.tolist()
+
+
+def make_solver(target, delta_time, eps, horizon):
+    "Mitrovic arm model driven by torque commands (see dirty_wrapper)."
+    from pyarm.model.arm import mitrovic_arm_model
+    from pyarm.model.muscle import fake_muscle_model
+
+    return Solver(mitrovic_arm_model.ArmModel(True),
+                  fake_muscle_model.MuscleModel(),
+                  delta_time, horizon, target, num_commands=2, eps=eps)
+
+_controller = Controller(make_solver)
+init = _controller.init
+getcmd = _controller.getcmd
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""iLQG init()/getcmd() interface for the Mitrovic arm and muscle models
+(6 muscle commands, see pyarm.model.dirty_wrapper_6 and
+pyarm.agent.ilqg6_agent)."""
+
+from pyarm.agent.ilqg import Controller, Solver
+
+def make_solver(target, delta_time, eps, horizon):
+    "Mitrovic arm model driven by the Mitrovic muscle model."
+    from pyarm.model.arm import mitrovic_arm_model
+    from pyarm.model.muscle import mitrovic_muscle_model
+
+    return Solver(mitrovic_arm_model.ArmModel(True),
+                  mitrovic_muscle_model.MuscleModel(),
+                  delta_time, horizon, target, num_commands=6, eps=eps)
+
+_controller = Controller(make_solver)
+init = _controller.init
+getcmd = _controller.getcmd
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Receding horizon model predictive control (MPC) agent.
+
+Every REPLAN_INTERVAL plan steps, the commands are re-optimized with the
+iLQG solver over a HORIZON steps sliding window, starting from the current
+state and warm-started with the previous plan shifted to the current time.
+A running position error cost keeps the sliding horizon from postponing the
+movement. Between two optimizations, the commands are given by the iLQG
+feedback law.
+
+The internal model of the solver is built by MAKE_SOLVER (the Mitrovic arm
+and muscle models by default), or from the arm_class and muscle_class
+arguments of Agent (see model_solver()). pyarm.simulate() refuses to run an
+agent whose internal model differs from the simulated models (see
+Agent.check_models()).
+
+Each control tick (get_commands call) has a wall-clock budget of BUDGET
+seconds: the optimization is stopped at the deadline and the best plan
+found so far is used. Ticks that exceed the budget are counted as deadline
+misses (see Agent.report()).
+
+The plan is indexed by the simulation time, so the agent also works with the
+RealtimeClock (variable delta_time).
+"""
+
+from time import perf_counter
+import numpy as np
+
+from pyarm.agent import ilqg
+from pyarm.agent import ilqg6
+
+TARGET = (1.5, 2.1)       # Target joint angles (rd)
+HORIZON = 50              # Number of plan steps
+REPLAN_INTERVAL = 5       # Number of plan steps between two optimizations
+BUDGET = 0.02             # Wall-clock budget per control tick (s)
+RUNNING_WEIGHT = 0.1      # Running position error cost (see ilqg.Solver)
+DELTA_TIME = None         # Plan time step (s) (PLAN_DELTA_TIME if None)
+PLAN_DELTA_TIME = 0.01
+
+# Internal model (ilqg.make_solver for torque commands, see model_solver())
+MAKE_SOLVER = ilqg6.make_solver
+
+def model_solver(arm_class, muscle_class):
+    """Return a make_solver function planning with the arm_class and
+    muscle_class models (eg. the models of the simulated arm).
+
+    The muscle model should be supported by pyarm.model.jacobian."""
+    def make_solver(target, delta_time, eps, horizon):
+        muscle = muscle_class()
+        num_commands = 2 if muscle.name == 'Fake' else 6
+        return ilqg.Solver(arm_class(True), muscle, delta_time, horizon,
+                           target, num_commands=num_commands, eps=eps)
+    return make_solver
+
+class Agent:
+
+    solver = None
+    plan_time = None          # Simulation time of the first plan step
+
+    # Statistics
+    ticks = 0
+    replans = 0
+    deadline_misses = 0
+    max_latency = 0.
+    total_latency = 0.
+
+    def __init__(self, make_solver=None, arm_class=None, muscle_class=None):
+        if arm_class is not None or muscle_class is not None:
+            if arm_class is None or muscle_class is None:
+                raise ValueError('MPC : both arm_class and muscle_class '
+                                 'should be given')
+            make_solver = model_solver(arm_class, muscle_class)
+        elif make_solver is None:
+            make_solver = MAKE_SOLVER
+        delta_time = DELTA_TIME if DELTA_TIME is not None else PLAN_DELTA_TIME
+
+        self.solver = make_solver(TARGET, delta_time, ilqg.EPS, HORIZON)
+        self.solver.set_running_weight(RUNNING_WEIGHT)
+        self.budget = BUDGET
+        self.replan_interval = REPLAN_INTERVAL
+
+    def check_models(self, arm, muscle):
+        """Raise ValueError if the internal model of the solver is not the
+        same as the 'arm' and 'muscle' models."""
+        if self.solver.arm.name != arm.name \
+                or self.solver.muscle.name != muscle.name:
+            raise ValueError('MPC : the internal model (%s arm, %s muscle) '
+                             'differs from the simulated models (%s arm, %s '
+                             'muscle)' % (self.solver.arm.name,
+                                          self.solver.muscle.name,
+                                          arm.name, muscle.name))
+
+    def get_commands(self, angles, velocities, time):
+        start = perf_counter()
+        solver = self.solver
+        state = np.concatenate([angles, velocities])
+
+        if self.plan_time is None:
+            step = None
+        else:
+            step = int(round((time - self.plan_time) / solver.delta_time))
+
+        if step is None or step >= self.replan_interval:
+            commands = None
+            if step is not None:
+                commands = shift(solver.commands, step)
+            solver.solve(state, commands, deadline=start + self.budget)
+            self.plan_time = time
+            self.replans += 1
+            step = 0
+
+        commands = solver.get_commands(min(step, solver.horizon - 1), state)
+
+        # Statistics
+        latency = perf_counter() - start
+        self.ticks += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if latency > self.budget:
+            self.deadline_misses += 1
+
+        return commands.tolist()
+
+    def report(self):
+        "Return a one line summary of the control ticks latency."
+        mean_latency = self.total_latency / max(self.ticks, 1)
+        return ('MPC : %d ticks, %d replans, %d deadline misses (budget %.1f ms,'
+                ' mean latency %.2f ms, max latency %.2f ms)') \
+               % (self.ticks, self.replans, self.deadline_misses,
+                  self.budget * 1000., mean_latency * 1000.,
+                  self.max_latency * 1000.)
+
+
+def shift(commands, num_steps):
+    """Shift the plan by num_steps steps (the last command is repeated at
+    the end)."""
+    num_steps = min(num_steps, commands.shape[0] - 1)
+    return np.concatenate([commands[num_steps:],
+                           np.repeat(commands[-1:], num_steps, axis=0)])
@@ -3,10 +3,16 @@
 # Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
 
 __all__ = ['RealtimeClock',
+           'RealtimeScheduler',
            'SimulationtimeClock']
 
+import math
 import time
 
+PHYSICS_DELTA_TIME = 0.005      # Fixed timestep of the RealtimeScheduler (s)
+MAX_SUBSTEPS = 10               # Maximum number of catch-up steps per frame
+ROUNDING_TOLERANCE = 1e-6       # Fraction of a step
+
 class RealtimeClock:
     
     delta_time = None
@@ -16,18 +22,145 @@ class RealtimeClock:
     _init_time = None
 
     def __init__(self):
-        self._init_time = time.time()
+        self._init_time = time.perf_counter()
         self._former_time = self._init_time
         self.time = 0
 
+    def substeps(self):
+        "Return the number of updates of the current frame (always one)."
+        return 1
+
     def update(self):
         "Update the clock (add elapsed time since the last call)"
-        current_time = time.time()
+        current_time = time.perf_counter()
         self.delta_time = current_time - self._former_time
         self.time = current_time - self._init_time
         self._former_time = current_time
 
 
+class RealtimeScheduler:
+    """Realtime clock with a fixed timestep.
+
+    The wall-clock time elapsed since the last frame is accumulated and
+    substeps() returns the number of whole delta_time steps it contains (it
+    waits for the first one if none is due), so the physics always
+    integrates the same delta_time whatever the framerate and the GUI
+    stalls. The leftover time is carried over to the next frame.
+
+    At most max_substeps steps are run per frame: after a longer stall the
+    remaining steps are dropped and the simulation falls behind the wall
+    clock instead of spending the next frames catching up.
+
+    Statistics:
+    - steps, frames: the number of updates and of substeps() calls,
+    - deadline_misses: the number of frames which had to catch up (more
+      than one step was due, ie. the previous frame overran delta_time),
+    - dropped_steps: the number of steps dropped by the catch-up bound,
+    - lateness: how late each step is run relative to its wall-clock due
+      time (mean, max_lateness and jitter, its standard deviation).
+
+    Usage:
+
+    while running:
+        for step in range(clock.substeps()):
+            clock.update()
+            ...                             # Physics
+        ...                                 # Rendering
+    """
+
+    delta_time = None
+    time = None
+
+    def __init__(self, delta_time=PHYSICS_DELTA_TIME,
+                 max_substeps=MAX_SUBSTEPS, timer=None):
+        if delta_time <= 0 or max_substeps < 1:
+            raise ValueError('clock : delta_time and max_substeps should be '
+                             'positive')
+        self.delta_time = delta_time
+        self.max_substeps = max_substeps
+        self.timer = time.perf_counter if timer is None else timer
+        self.time = 0
+        self.accumulator = 0.
+        self._former_time = self.timer()
+
+        self.steps = 0
+        self.frames = 0
+        self.deadline_misses = 0
+        self.dropped_steps = 0
+        self.max_lateness = 0.
+        self._total_lateness = 0.
+        self._total_squared_lateness = 0.
+
+    def substeps(self, wait=True):
+        """Return the number of steps due since the last call.
+
+        If no step is due and 'wait' is True, sleep until the next one."""
+        self.accumulate()
+        num_steps = self.due_steps()
+        while wait and num_steps == 0:
+            time.sleep(self.delta_time - self.accumulator)
+            self.accumulate()
+            num_steps = self.due_steps()
+
+        self.frames += 1
+        if num_steps > 1:
+            self.deadline_misses += 1
+        if num_steps > self.max_substeps:
+            self.dropped_steps += num_steps - self.max_substeps
+            self.accumulator -= (num_steps - self.max_substeps) \
+                                * self.delta_time
+            num_steps = self.max_substeps
+
+        # The i-th step was due when the accumulator reached (i+1) delta_time
+        for step in range(num_steps):
+            lateness = max(self.accumulator - (step + 1) * self.delta_time, 0.)
+            self._total_lateness += lateness
+            self._total_squared_lateness += lateness * lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+
+        return num_steps
+
+    def due_steps(self):
+        "Return the number of whole steps in the accumulator."
+        # (the rounding errors of the accumulator must not delay a step)
+        return int(self.accumulator / self.delta_time + ROUNDING_TOLERANCE)
+
+    def accumulate(self):
+        "Add the wall-clock time elapsed since the last call."
+        current_time = self.timer()
+        self.accumulator += current_time - self._former_time
+        self._former_time = current_time
+
+    def update(self):
+        "Update the clock (run one step of delta_time)"
+        self.accumulator -= self.delta_time
+        self.time += self.delta_time
+        self.steps += 1
+
+    @property
+    def lateness(self):
+        "Mean lateness of the steps (s)."
+        return self._total_lateness / max(self.steps, 1)
+
+    @property
+    def jitter(self):
+        "Standard deviation of the lateness of the steps (s)."
+        mean = self.lateness
+        variance = self._total_squared_lateness / max(self.steps, 1) \
+                   - mean * mean
+        return math.sqrt(max(variance, 0.))
+
+    def report(self):
+        "Return a one line summary of the scheduling statistics."
+        return ('Scheduler : %d steps of %.1f ms in %d frames, %d deadline '
+                'misses, %d dropped steps (mean lateness %.2f ms, jitter '
+                '%.2f ms, max lateness %.2f ms)') \
+               % (self.steps, self.delta_time * 1000., self.frames,
+                  self.deadline_misses, self.dropped_steps,
+                  self.lateness * 1000., self.jitter * 1000.,
+                  self.max_lateness * 1000.)
+
+
 class SimulationtimeClock:
 
     delta_time = None
@@ -37,6 +170,10 @@ class SimulationtimeClock:
         self.delta_time = delta_time
         self.time = 0
 
+    def substeps(self):
+        "Return the number of updates of the current frame (always one)."
+        return 1
+
     def update(self):
         "Update the clock (add delta_time value)"
         self.time += self.delta_time
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Decimation of long traces before plotting (see pyarm.fig).
+
+A line plotted with more points than the pixels of its axes shows no more
+information but is much slower to draw. The traces are reduced to about
+two points per pixel with one of the following methods:
+- 'minmax' : the samples are split into buckets and the minimum and the
+  maximum of each bucket are kept (in their order), so the envelope of the
+  trace (peaks included) is exactly the same,
+- 'lttb' : Largest-Triangle-Three-Buckets, one point per bucket is kept,
+  the one which forms the largest triangle with the point kept in the
+  previous bucket and the average of the next bucket (the shape of the
+  trace is better preserved, but a peak may be shaved).
+
+The samples (y) can be a (N,) array or a (N, M) array of M lines sharing
+the x values; the kept samples depend on the line, so the x values of the
+decimated (K, M) samples are a (K, M) array (matplotlib plots the columns
+of x and y by pairs).
+"""
+
+__all__ = ['minmax', 'lttb', 'decimate']
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+def minmax(x, y, buckets):
+    """Return the first and last samples and the minimum and maximum of
+    each of the 'buckets' buckets of samples (x, y)."""
+    x, y = np.asarray(x), np.asarray(y)
+    size = x.shape[0]
+    if 2 * buckets + 2 >= size:
+        return x, y
+
+    rows = y.reshape(size, -1)
+    bucket_size = -(-size // buckets)
+    buckets = -(-size // bucket_size)
+
+    # Buckets of the same size (the last one is padded with the last row)
+    padded = np.concatenate([rows, np.repeat(rows[-1:],
+                                             buckets * bucket_size - size,
+                                             axis=0)])
+    blocks = padded.reshape(buckets, bucket_size, -1)
+    offsets = np.arange(buckets)[:, np.newaxis] * bucket_size
+    first = np.minimum(blocks.argmin(axis=1) + offsets, size - 1)
+    second = np.minimum(blocks.argmax(axis=1) + offsets, size - 1)
+
+    indices = np.stack([np.minimum(first, second),
+                        np.maximum(first, second)], axis=1)
+    indices = indices.reshape(2 * buckets, -1)
+    indices = np.concatenate([np.zeros_like(indices[:1]), indices,
+                              np.full_like(indices[:1], size - 1)])
+
+    return select(x, y, rows, indices)
+
+def lttb(x, y, num_points):
+    """Return 'num_points' samples of (x, y) selected with the
+    Largest-Triangle-Three-Buckets method."""
+    x, y = np.asarray(x), np.asarray(y)
+    size = x.shape[0]
+    if num_points >= size or num_points < 3:
+        return x, y
+
+    rows = y.reshape(size, -1)
+    xf = x.astype(np.float64)
+    columns = np.arange(rows.shape[1])
+
+    # num_points - 2 buckets between the first and the last samples
+    edges = np.linspace(1, size - 1, num_points - 1).astype(np.intp)
+    edges = np.append(edges, size)
+
+    indices = np.empty((num_points, rows.shape[1]), dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = size - 1
+    previous = indices[0]
+
+    for bucket in range(num_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_start, next_stop = edges[bucket + 1], edges[bucket + 2]
+
+        # Average of the next bucket (the last sample for the last bucket)
+        average_x = xf[next_start:next_stop].mean()
+        average_y = rows[next_start:next_stop].mean(axis=0)
+
+        previous_x = xf[previous]
+        previous_y = rows[previous, columns]
+        areas = np.abs((previous_x - average_x)
+                       * (rows[start:stop] - previous_y)
+                       - (previous_x - xf[start:stop, np.newaxis])
+                       * (average_y - previous_y))
+        previous = start + areas.argmax(axis=0)
+        indices[bucket + 1] = previous
+
+    return select(x, y, rows, indices)
+
+def select(x, y, rows, indices):
+    "Return the samples of the (K, M) indices (shaped as x and y)."
+    selected = np.take_along_axis(rows, indices, axis=0)
+    if y.ndim == 1:
+        return x[indices[:, 0]], selected[:, 0]
+    return x[indices], selected.reshape((indices.shape[0],) + y.shape[1:])
+
+def decimate(x, y, num_points, method='minmax'):
+    "Reduce the samples (x, y) to about 'num_points' points."
+    if method == 'minmax':
+        return minmax(x, y, max(1, num_points // 2))
+    if method == 'lttb':
+        return lttb(x, y, num_points)
+    raise ValueError('decimation : unknown method ' + repr(method))
@@ -138,6 +138,11 @@ class AbstractGUI:
                               fill="black",
                               width=5)
 
+        # Moment arms in the current posture
+        if hasattr(self.muscle, 'A'):
+            moment_arm = self.muscle.moment_arm(np.array([shoulder_angle,
+                                                          elbow_angle]))
+
         # Draw muscles
         if self.draw_muscles and hasattr(self.muscle, 'A'):
             colors = [int(max(min(signal, 1.), 0.) * 255) for signal in input_signal]
@@ -151,28 +156,28 @@ class AbstractGUI:
                 angle_offset = [math.pi / 2., -math.pi / 2., math.pi / 2.,
                                 -math.pi / 2., math.pi / 2., -math.pi / 2.] # TODO
 
-            for i in range(self.muscle.A.shape[0]):
+            for i in range(moment_arm.shape[0]):
                 point1, point2 = None, None
 
                 # Compute point 1 (shoulder side)
-                if self.muscle.A[i][0] == 0.:
+                if moment_arm[i][0] == 0.:
                     point1 = np.array([math.cos(global_shoulder_angle), 
                                        math.sin(global_shoulder_angle)]) \
                              * 2*L + shoulder_point # TODO
                 else:
                     point1 = np.array([math.cos(self.initial_angle + self.arm.initial_angles[0] + angle_offset[i]), 
                                        math.sin(self.initial_angle + self.arm.initial_angles[0] + angle_offset[i])]) \
-                             * self.muscle.A[i][0] * self.scale + shoulder_point
+                             * moment_arm[i][0] * self.scale + shoulder_point
 
                 # Compute point 2 (elbow side)
-                if self.muscle.A[i][1] == 0.:
+                if moment_arm[i][1] == 0.:
                     point2 = np.array([math.cos(global_shoulder_angle), 
                                        math.sin(global_shoulder_angle)]) \
                              * L + shoulder_point # TODO
                 else:
                     point2 = np.array([math.cos(global_elbow_angle + angle_offset[i]), 
                                        math.sin(global_elbow_angle + angle_offset[i])]) \
-                             * self.muscle.A[i][1] * self.scale + elbow_point
+                             * moment_arm[i][1] * self.scale + elbow_point
 
                 # Draw muscle (color is proportional to input_signal)
                 self.draw_line(point1.tolist() + point2.tolist(),
@@ -181,18 +186,18 @@ class AbstractGUI:
 
         # Draw joints
         if self.draw_joints and hasattr(self.muscle, 'A'):
-            for i in range(self.muscle.A.shape[0]):
+            for i in range(moment_arm.shape[0]):
                 # Shoulder
-                if self.muscle.A[i][0] != 0.:
+                if moment_arm[i][0] != 0.:
                     self.draw_circle(shoulder_point[0].tolist(),
                                             shoulder_point[1].tolist(),
-                                            abs(self.muscle.A[i][0]) * self.scale)
+                                            abs(moment_arm[i][0]) * self.scale)
 
                 # Elbow
-                if self.muscle.A[i][1] != 0.:
+                if moment_arm[i][1] != 0.:
                     self.draw_circle(elbow_point[0].tolist(),
                                             elbow_point[1].tolist(),
-                                            abs(self.muscle.A[i][1]) * self.scale)
+                                            abs(moment_arm[i][1]) * self.scale)
 
     def update(self, input_signal, torque, acceleration):
         "Redraw the screen."
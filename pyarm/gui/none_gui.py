@@ -4,6 +4,10 @@
 
 from pyarm.gui.abstract_gui import AbstractGUI
 import sys
+import time
+
+STATUS_INTERVAL = 0.5           # Minimum wall-clock time between two status
+                                # lines (s)
 
 # TODO :
 # - enable take_a_screenshot with cairo
@@ -19,16 +23,30 @@ class GUI(AbstractGUI):
     running = True                                  # TODO
     keyboard_flags = [0., 0., 0., 0., 0., 0.]       # TODO
 
+    _former_status_time = None
+
     def __init__(self, muscle, arm, clock, screencast):
         self.arm = arm
         self.muscle = muscle
         self.clock = clock
         self.screencast = screencast
 
-        print("time      s. angle   e. angle   s. velocity   e. velocity   commands (x6)")
-
     def update(self, command, torque, acceleration):
-        "Redraw the screen."
+        """Redraw the screen.
+
+        The status line is printed at most every STATUS_INTERVAL seconds
+        (wall-clock time), below a header printed on the first update."""
+
+        if self.screencast:
+            self.take_a_screenshot()
+
+        current_time = time.perf_counter()
+        if self._former_status_time is None:
+            print("time      s. angle   e. angle   s. velocity   e. velocity   "
+                  "commands (x6)")
+        elif current_time - self._former_status_time < STATUS_INTERVAL:
+            return
+        self._former_status_time = current_time
 
         print("\r", end=' ')
         print("% 6.2fs  " % self.clock.time, end=' ')
@@ -44,6 +62,3 @@ class GUI(AbstractGUI):
                                                             command[5]), end=' ')
         sys.stdout.flush()
 
-        if self.screencast:
-            self.take_a_screenshot()
-
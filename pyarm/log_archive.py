@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Binary log archive of the recorded channels (see pyarm.fig.save_log).
+
+An archive is a single file which holds the shared time vector and the
+samples of all the channels with their properties (title, labels, legend,
+unit):
+
+    magic (8 bytes) | version (uint32) | header size (uint64) | header (JSON)
+    | arrays
+
+Each array starts at a 64 bytes aligned offset given in the header, so the
+arrays are read as memory-mapped NumPy arrays (nothing is loaded until the
+arrays are sliced).
+
+Usage :
+archive = LogArchive(path)
+angles = archive['joint_angles']['ydata'][1000:2000]
+export_text(path, directory)          # One text file per channel
+"""
+
+__all__ = ['save', 'LogArchive', 'open_archive', 'export_text']
+
+import json
+import os
+import re
+import numpy as np
+
+MAGIC = b'PYARMLOG'
+VERSION = 1
+ALIGNMENT = 64
+EXTENSION = '.pyarmlog'
+
+PREAMBLE_SIZE = len(MAGIC) + 4 + 8
+
+PROPERTIES = ('title', 'xlabel', 'ylabel', 'type', 'xlim', 'ylim', 'legend',
+              'decimation')
+
+def unit(label):
+    "Return the unit of a label (the last parenthesized word) or None."
+    match = re.search(r'\(([^()]*)\)\s*$', label or '')
+    return None if match is None else match.group(1)
+
+def json_value(value):
+    "Convert a channel property into a JSON compatible value."
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return [json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+###############################################################################
+
+def save(path, channels, timebase, metadata=None):
+    """Save the channels (a dict of pyarm.telemetry.Channel, eg. fig.SUBFIGS)
+    and their timebase (a pyarm.telemetry.Timebase) into the file 'path'.
+
+    'metadata' is an optional JSON compatible dict (models, time step, ...)."""
+    blocks = []              # (array description, [array]) to write
+
+    def add(array):
+        description = {'dtype': array.dtype.str,
+                       'shape': list(array.shape),
+                       'offset': 0}
+        blocks.append((description, [array]))
+        return description
+
+    header = {'version': VERSION,
+              'metadata': metadata or {},
+              'time': add(timebase.array()),
+              'channels': {}}
+
+    for name, channel in channels.items():
+        description = channel_description(channel)
+        description['y'] = add(channel['ydata'])
+
+        if channel.x is not None:
+            description['x'] = add(channel.x.array())
+        elif channel.indices is not None:
+            description['indices'] = add(channel.indices.array())
+        else:
+            # Recorded once per time step: a slice of the time vector
+            description['start'] = channel.start or 0
+
+        header['channels'][str(name)] = description
+
+    write(path, header, blocks)
+
+def channel_description(channel):
+    "Return the JSON compatible properties of a channel (a dict)."
+    description = dict((key, json_value(channel.get(key)))
+                       for key in PROPERTIES)
+    description['unit'] = unit(channel.get('ylabel'))
+    return description
+
+def write(path, header, blocks):
+    """Write an archive into the file 'path'.
+
+    'blocks' is the list of the (array description, list of arrays) of the
+    header: the arrays of a block are written one after the other and the
+    offset of the description is set."""
+    encoded_header, size = layout(header, blocks, PREAMBLE_SIZE)
+
+    with open(path, 'wb') as log_file:
+        log_file.write(MAGIC)
+        log_file.write(np.uint32(VERSION).tobytes())
+        log_file.write(np.uint64(len(encoded_header)).tobytes())
+        log_file.write(encoded_header)
+        write_blocks(log_file, blocks)
+
+def layout(header, blocks, offset):
+    """Set the offsets of the blocks of a header written at 'offset'.
+
+    Return the encoded header and the offset of the end of the blocks."""
+    # The header is padded so that the offsets (unknown when its size is
+    # computed) fit in it
+    header_size = len(json.dumps(header).encode('utf-8')) + 24 * len(blocks)
+    position = aligned(offset + header_size)
+    for description, arrays in blocks:
+        description['offset'] = position
+        position = aligned(position + sum(array.nbytes for array in arrays))
+
+    encoded_header = json.dumps(header).encode('utf-8')
+    encoded_header += b' ' * (header_size - len(encoded_header))
+    return encoded_header, position
+
+def write_blocks(log_file, blocks):
+    "Write the arrays of the blocks at their offsets (see layout())."
+    for description, arrays in blocks:
+        log_file.write(b'\0' * (description['offset'] - log_file.tell()))
+        for array in arrays:
+            np.ascontiguousarray(array).tofile(log_file)
+
+def aligned(offset):
+    "Round up 'offset' to the next multiple of ALIGNMENT."
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+###############################################################################
+
+class LogArchive:
+    """Log archive opened for reading.
+
+    The channels are accessed by name (archive[name]) and behave like the
+    fig.SUBFIGS items: the properties (title, xlabel, ylabel, legend, unit,
+    ...) are dict items and the 'xdata' and 'ydata' items are (memory-mapped
+    if 'mmap' is True) arrays."""
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+
+        with open(path, 'rb') as log_file:
+            preamble = log_file.read(PREAMBLE_SIZE)
+            if preamble[:len(MAGIC)] != MAGIC:
+                raise ValueError('LogArchive : ' + str(path)
+                                 + ' is not a pyarm log archive')
+            version = int(np.frombuffer(preamble, np.uint32, 1, len(MAGIC))[0])
+            if version > VERSION:
+                raise ValueError('LogArchive : unsupported version '
+                                 + str(version))
+            header_size = int(np.frombuffer(preamble, np.uint64, 1,
+                                            len(MAGIC) + 4)[0])
+            self.header = json.loads(log_file.read(header_size).decode('utf-8'))
+
+        if mmap:
+            self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        else:
+            self._data = np.fromfile(path, dtype=np.uint8)
+
+        self.metadata = self.header['metadata']
+        self.time = self._array(self.header['time'])
+        self.channels = dict((name, ArchivedChannel(self, description))
+                             for name, description
+                             in self.header['channels'].items())
+
+    def _array(self, description):
+        dtype = np.dtype(description['dtype'])
+        shape = tuple(description['shape'])
+        size = int(np.prod(shape)) * dtype.itemsize
+        offset = description['offset']
+        return self._data[offset:offset + size].view(dtype).reshape(shape)
+
+    def __getitem__(self, name):
+        return self.channels[name]
+
+    def __contains__(self, name):
+        return name in self.channels
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def __len__(self):
+        return len(self.channels)
+
+
+class ArchivedChannel(dict):
+    "Channel of a LogArchive (see LogArchive)."
+
+    def __init__(self, archive, description):
+        dict.__init__(self, ((key, description.get(key)) for key
+                             in PROPERTIES + ('unit',)))
+        self.archive = archive
+        self.description = description
+
+    def __getitem__(self, key):
+        if key == 'ydata':
+            return self.archive._array(self.description['y'])
+        if key == 'xdata':
+            description = self.description
+            if 'x' in description:
+                return self.archive._array(description['x'])
+            if 'indices' in description:
+                indices = self.archive._array(description['indices'])
+                return self.archive.time[indices]
+            start = description['start']
+            size = description['y']['shape'][0]
+            return self.archive.time[start:start + size]
+        return dict.__getitem__(self, key)
+
+###############################################################################
+
+def open_archive(path):
+    """Open a log archive or a compressed trajectory archive (see
+    pyarm.trajectory_archive)."""
+    from pyarm import trajectory_archive
+
+    with open(path, 'rb') as archive_file:
+        magic = archive_file.read(len(trajectory_archive.MAGIC))
+    if magic == trajectory_archive.MAGIC:
+        return trajectory_archive.TrajectoryArchive(path)
+    return LogArchive(path)
+
+def export_text(path, directory='.', prefix=''):
+    """Export the channels of the archive 'path' (a log archive or a
+    trajectory archive) into text files (one 'prefix + name + .log' file
+    per channel in 'directory', the former fig.save_log format: the time in
+    the first column, then the values).
+
+    Return the list of the written files."""
+    archive = open_archive(path)
+    filenames = []
+
+    for name in archive:
+        filename = os.path.join(directory, prefix + name + '.log')
+        np.savetxt(filename, np.c_[archive[name]['xdata'],
+                                   archive[name]['ydata']])
+        filenames.append(filename)
+
+    return filenames
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Streaming log of the recorded channels (see pyarm.fig.start_stream).
+
+The recorded samples are periodically detached from the channels (the
+buffers are handed over, not copied) and written by a background thread
+into an append-only log file, so the memory used by the channels stays
+bounded during long runs and a crash only loses the last chunk:
+
+    magic (8 bytes) | version (uint32) | record | record | ...
+
+    record : header size (uint64) | record size (uint64) | header (JSON)
+             | arrays
+
+A record holds the samples of one chunk with the same descriptions as a log
+archive (see pyarm.log_archive) except that the offsets are absolute, that
+the channel indices are global timebase indices and that the properties of
+a channel are only given in its first record. The 'first' item of
+the record is the global index of its first time. A truncated last record
+is ignored.
+
+The physics loop never waits for the disk: if the writer thread falls
+behind and the queued chunks exceed the memory cap, the new chunks are
+dropped (and counted).
+
+Usage :
+writer = StreamWriter(path, fig.SUBFIGS, fig.TIMEBASE)
+writer.step()                          # At the start of each time step
+writer.close()
+convert(path, archive_path)            # Into a log archive
+"""
+
+__all__ = ['StreamWriter', 'records', 'convert']
+
+import collections
+import json
+import os
+import threading
+import time
+import warnings
+import numpy as np
+
+from pyarm import log_archive
+from pyarm import telemetry
+
+MAGIC = b'PYARMSTR'
+VERSION = 1
+EXTENSION = '.pyarmstream'
+
+FLUSH_INTERVAL = 1.                 # Maximum time between two flushes (s)
+MEMORY_CAP = 64 * 2**20             # Memory used by the samples (bytes)
+
+PREAMBLE_SIZE = len(MAGIC) + 4
+RECORD_PREAMBLE_SIZE = 16
+IOV_MAX = 1024               # Maximum number of buffers of a vectored write
+
+class StreamWriter:
+    """Background writer of a streaming log.
+
+    'channels' is the dict of the recorded channels (eg. fig.SUBFIGS) and
+    'timebase' their pyarm.telemetry.Timebase. Half of 'memory_cap' (bytes)
+    is used by the buffers of the channels (once the size of a time step is
+    known, ie. after the first flush), the other half by the chunks waiting
+    for the writer thread. The samples are flushed at least every
+    'flush_interval' seconds."""
+
+    def __init__(self, path, channels, timebase, flush_interval=FLUSH_INTERVAL,
+                 memory_cap=MEMORY_CAP, metadata=None):
+        self.path = path
+        self.channels = channels
+        self.timebase = timebase
+        self.flush_interval = flush_interval
+        self.memory_cap = memory_cap
+        self.metadata = metadata or {}
+
+        # Statistics
+        self.chunks = 0             # Written chunks
+        self.bytes_written = 0
+        self.dropped_chunks = 0
+        self.dropped_samples = 0    # Dropped time steps
+        self.max_flush_time = 0.    # Longest flush in the physics loop (s)
+
+        # The number of steps between two flushes is bounded by the memory
+        # cap once the size of a step is known (see flush())
+        self.steps = 0
+        self.max_steps = telemetry.CAPACITY
+        self.next_flush = time.perf_counter() + flush_interval
+
+        self._queue = collections.deque()
+        self._queued_bytes = 0
+        self._condition = threading.Condition()
+        self._closing = False
+        self._described = {}        # Channels of the written properties
+        self.error = None           # Exception raised by the writer thread
+
+        self._file = open(path, 'wb', buffering=0)
+        write_buffers(self._file, [MAGIC, np.uint32(VERSION).tobytes()])
+        self._position = PREAMBLE_SIZE
+
+        self._thread = threading.Thread(target=self._run,
+                                        name='pyarm log writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def step(self):
+        """Flush the samples if the flush interval is elapsed or if they
+        reach their memory cap.
+
+        Call it at the start of each time step (before the first sample of
+        the step is appended)."""
+        self.steps += 1
+        if self.steps > self.max_steps \
+                or time.perf_counter() >= self.next_flush:
+            self.flush()
+
+    def flush(self):
+        "Hand the recorded samples over to the writer thread."
+        if self.error is not None:
+            raise self.error
+
+        start_time = time.perf_counter()
+
+        first = self.timebase.offset
+        chunk = {'first': first,
+                 'time': self.timebase.detach(),
+                 'channels': {}}
+        size = chunk['time'].nbytes
+        for name, channel in self.channels.items():
+            samples = channel.detach()
+            if samples['y'].shape[0] > 0:
+                size += sum(samples[key].nbytes for key
+                            in ('y', 'x', 'indices') if key in samples)
+                samples['properties'] = channel
+                chunk['channels'][name] = samples
+
+        # The buffers of the channels may be twice as big as their rows
+        if self.steps > 0:
+            self.max_steps = max(1, self.memory_cap // 4
+                                    // max(1, size // self.steps))
+
+        self.steps = 0
+        self.next_flush = start_time + self.flush_interval
+
+        if chunk['time'].shape[0] > 0 or chunk['channels']:
+            with self._condition:
+                if self._queued_bytes + size > self.memory_cap // 2:
+                    if self.dropped_chunks == 0:
+                        warnings.warn('The log writer is too slow: '
+                                      'samples are dropped')
+                    self.dropped_chunks += 1
+                    self.dropped_samples += chunk['time'].shape[0]
+                else:
+                    chunk['size'] = size
+                    self._queue.append(chunk)
+                    self._queued_bytes += size
+                    self._condition.notify()
+
+        self.max_flush_time = max(self.max_flush_time,
+                                  time.perf_counter() - start_time)
+
+    def close(self):
+        "Flush the remaining samples, wait for the writer and close the log."
+        if self._thread is None:
+            return
+        self.flush()
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closing:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                chunk = self._queue[0]
+
+            try:
+                if self.error is None:
+                    self._write(chunk)
+            except Exception as error:
+                self.error = error
+
+            with self._condition:
+                self._queue.popleft()
+                self._queued_bytes -= chunk['size']
+
+    def _write(self, chunk):
+        "Append a record (writer thread)."
+        blocks = []
+
+        def add(array):
+            description = {'dtype': array.dtype.str,
+                           'shape': list(array.shape),
+                           'offset': 0}
+            blocks.append((description, [array]))
+            return description
+
+        header = {'first': chunk['first'],
+                  'time': add(chunk['time']),
+                  'channels': {}}
+        if self.chunks == 0:
+            header['metadata'] = self.metadata
+
+        for name, samples in chunk['channels'].items():
+            # The properties of a channel are only written in its first
+            # record
+            channel = samples['properties']
+            if self._described.get(name) is not channel:
+                self._described[name] = channel
+                description = log_archive.channel_description(channel)
+            else:
+                description = {}
+            description['y'] = add(samples['y'])
+            if 'x' in samples:
+                description['x'] = add(samples['x'])
+            elif 'indices' in samples:
+                description['indices'] = add(samples['indices'])
+            else:
+                description['start'] = samples['start']
+            header['channels'][str(name)] = description
+
+        position = self._position
+        encoded_header, end = log_archive.layout(
+                                        header, blocks,
+                                        position + RECORD_PREAMBLE_SIZE)
+
+        # The record is written with a single system call (the writer
+        # thread hardly holds the GIL)
+        buffers = [np.array([len(encoded_header), end - position],
+                            dtype=np.uint64).tobytes(),
+                   encoded_header]
+        offset = position + RECORD_PREAMBLE_SIZE + len(encoded_header)
+        for description, arrays in blocks:
+            buffers.append(bytes(description['offset'] - offset))
+            buffers.append(memoryview(np.ascontiguousarray(arrays[0]))
+                           .cast('B'))
+            offset = description['offset'] + arrays[0].nbytes
+        buffers.append(bytes(end - offset))
+        write_buffers(self._file, buffers)
+        self._position = end
+
+        self.chunks += 1
+        self.bytes_written += end - position
+
+
+def write_buffers(log_file, buffers):
+    "Write the buffers into an unbuffered file (a vectored write if possible)."
+    if not hasattr(os, 'writev'):
+        for buffer in buffers:
+            log_file.write(buffer)
+        return
+
+    buffers = [memoryview(buffer) for buffer in buffers if len(buffer) > 0]
+    while buffers:
+        written = os.writev(log_file.fileno(), buffers[:IOV_MAX])
+        # Skip the written buffers (partial writes are possible)
+        while buffers and written >= len(buffers[0]):
+            written -= len(buffers.pop(0))
+        if written > 0:
+            buffers[0] = buffers[0][written:]
+
+###############################################################################
+
+def records(path):
+    "Return the list of the (complete) record headers of a streaming log."
+    headers = []
+    file_size = os.path.getsize(path)
+
+    with open(path, 'rb') as log_file:
+        preamble = log_file.read(PREAMBLE_SIZE)
+        if preamble[:len(MAGIC)] != MAGIC:
+            raise ValueError('log_stream : ' + str(path)
+                             + ' is not a pyarm streaming log')
+        version = int(np.frombuffer(preamble, np.uint32, 1, len(MAGIC))[0])
+        if version > VERSION:
+            raise ValueError('log_stream : unsupported version '
+                             + str(version))
+
+        position = PREAMBLE_SIZE
+        while position + RECORD_PREAMBLE_SIZE <= file_size:
+            log_file.seek(position)
+            header_size, record_size = np.frombuffer(
+                            log_file.read(RECORD_PREAMBLE_SIZE), np.uint64)
+            if position + int(record_size) > file_size:
+                break            # Truncated record
+            headers.append(json.loads(log_file.read(int(header_size))
+                                      .decode('utf-8')))
+            position += int(record_size)
+
+    return headers
+
+def convert(path, archive_path, metadata=None):
+    """Convert the streaming log 'path' into the log archive 'archive_path'
+    (see pyarm.log_archive).
+
+    The samples are copied chunk by chunk from the memory-mapped log.
+    'metadata' replaces the metadata of the log if it is not None."""
+    headers = records(path)
+    data = np.memmap(path, dtype=np.uint8, mode='r') if headers else None
+
+    def array(description):
+        dtype = np.dtype(description['dtype'])
+        shape = tuple(description['shape'])
+        offset = description['offset']
+        size = int(np.prod(shape)) * dtype.itemsize
+        return data[offset:offset + size].view(dtype).reshape(shape)
+
+    # Dropped chunks leave holes in the global timebase indices: 'shifts'
+    # are the numbers of times missing before each record
+    shifts, kept = [], 0
+    for header in headers:
+        shifts.append(header['first'] - kept)
+        kept += header['time']['shape'][0]
+    times = [array(header['time']) for header in headers]
+
+    time_values = []             # Concatenated times (only if needed)
+    def time_array():
+        if not time_values:
+            time_values.append(np.concatenate(times) if times
+                               else np.empty((0,)))
+        return time_values[0]
+
+    blocks = []
+    def add(arrays, dtype, row_shape):
+        description = {'dtype': np.dtype(dtype).str,
+                       'shape': [sum(a.shape[0] for a in arrays)]
+                                + list(row_shape),
+                       'offset': 0}
+        blocks.append((description, arrays))
+        return description
+
+    archive_metadata = metadata
+    if archive_metadata is None:
+        archive_metadata = headers[0].get('metadata', {}) if headers else {}
+
+    archive_header = {'version': log_archive.VERSION,
+                      'metadata': archive_metadata,
+                      'time': add(times, np.float64, ()),
+                      'channels': {}}
+
+    names = []
+    for header in headers:
+        names.extend(name for name in header['channels'] if name not in names)
+
+    for name in names:
+        parts = [(header['channels'][name], shift) for header, shift
+                 in zip(headers, shifts) if name in header['channels']]
+        descriptions = [description for description, shift in parts]
+
+        y = [array(description['y']) for description in descriptions]
+        row_shapes = set(part.shape[1:] for part in y)
+        if len(row_shapes) != 1:
+            raise ValueError('log_stream : the rows of "' + name
+                             + '" have different shapes')
+
+        # Timebase indices (in the archive) of the samples of each part
+        def indices(description, shift):
+            if 'indices' in description:
+                return array(description['indices']) - shift
+            start = description['start'] - shift
+            return np.arange(start, start + description['y']['shape'][0],
+                             dtype=np.int32)
+
+        properties = [description for description in descriptions
+                      if 'title' in description]
+        archive_description = dict((key, properties[-1].get(key)) for key
+                                   in log_archive.PROPERTIES + ('unit',))
+        archive_description['y'] = add(y, y[0].dtype, y[0].shape[1:])
+
+        if any('x' in description for description in descriptions):
+            x = [array(description['x']) if 'x' in description
+                 else time_array()[indices(description, shift)]
+                 for description, shift in parts]
+            archive_description['x'] = add(x, np.float64, ())
+        elif any('indices' in description for description in descriptions) \
+                or not contiguous(parts):
+            archive_description['indices'] = add(
+                                [indices(description, shift).astype(np.int32)
+                                 for description, shift in parts],
+                                np.int32, ())
+        else:
+            archive_description['start'] = descriptions[0]['start'] \
+                                           - parts[0][1]
+
+        archive_header['channels'][name] = archive_description
+
+    log_archive.write(archive_path, archive_header, blocks)
+
+def contiguous(parts):
+    """Return True if the (description, shift) parts of a channel recorded
+    once per time step follow each other."""
+    next_start = None
+    for description, shift in parts:
+        start = description['start'] - shift
+        if next_start is not None and start != next_start:
+            return False
+        next_start = start + description['y']['shape'][0]
+    return True
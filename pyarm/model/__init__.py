@@ -23,6 +23,9 @@
 # THE SOFTWARE.
 
 __all__ = ['arm',
+           'bundle',
+           'jacobian',
+           'jit',
            'kinematics',
            'muscle',
            'dirty_wrapper',
@@ -23,6 +23,7 @@
 # THE SOFTWARE.
 
 __all__ = ['abstract_arm_model',
+           'batch_arm_model',
            'kambara_arm_model',
            'mitrovic_arm_model',
            'sagittal_arm_model',
@@ -10,6 +10,16 @@ import warnings
 
 ASSERT = False
 
+# Arm parameters the derived constants depend on (see
+# AbstractArmModel.constants). They are changed with set_parameters() (one
+# arm) or set_default_parameters() (the arm class), which clear the cached
+# constants.
+PARAMETERS = ('upperarm_mass', 'forearm_mass',
+              'upperarm_length', 'forearm_length',
+              'upperarm_cog', 'forearm_cog',
+              'shoulder_inertia', 'elbow_inertia',
+              'g', 'gravity')
+
 class AbstractArmModel:
     """Abstract forward dynamics arm model.
 
@@ -82,158 +92,269 @@ class AbstractArmModel:
 
     friction_matrix = np.array([[0.05, 0.025], [0.025, 0.05]])
 
+    # Model terms ###############################
+
+    friction = True              # Joint friction (B) is taken into account
+    gravity = True               # Gravity (G) is taken into account
+
 
     unbounded = False
 
+    # Integration method (a module of pyarm.model.kinematics)
+    integrator = kinematics
+
+    # Incremented by set_default_parameters(): the cached constants of all the
+    # arms are computed again
+    parameters_version = 0
+
+    _constants = None            # Cache of the derived constants
+    _constants_version = None    # parameters_version of the cache
+
     ###########################################################################
 
-    def __init__(self, unbounded=False):
+    def __init__(self, unbounded=False, integrator=None, recorder=None):
         self.unbounded = unbounded
+        self.recorder = fig.RECORDER if recorder is None else recorder
+        if integrator is not None:
+            self.integrator = integrator
         self.velocities = np.zeros(2)
 
         angles = np.array(self.initial_angles)
         self.angles = self.constraint_joint_angles(angles)
 
         # Init datas to plot
-        fig.subfig('M',
-                   title='M',
-                   xlabel='time (s)',
-                   ylabel='M',
-                   legend=('M11', 'M12', 'M21', 'M22'))
-        fig.subfig('C',
-                   title='C',
-                   xlabel='time (s)',
-                   ylabel='C',
-                   legend=self.joints)
-        fig.subfig('B',
-                   title='B',
-                   xlabel='time (s)',
-                   ylabel='B',
-                   legend=self.joints)
-        fig.subfig('G',
-                   title='G',
-                   xlabel='time (s)',
-                   ylabel='G',
-                   legend=self.joints)
-        fig.subfig('N',
-                   title='N',
-                   xlabel='time (s)',
-                   ylabel='Normal force',
-                   legend=self.joints)
-        fig.subfig('torque',
-                   title='Torque',
-                   xlabel='time (s)',
-                   ylabel='Torque (N.m)',
-                   legend=self.joints)
-        fig.subfig('tCBG',
-                   title='torque - (C + B + G)',
-                   xlabel='time (s)',
-                   ylabel='Tau - (C + B + G)',
-                   legend=self.joints)
-        fig.subfig('angular_acceleration',
-                   title='Angular acceleration',
-                   xlabel='time (s)',
-                   ylabel='Acceleration (rad/s/s)',
-                   legend=self.joints)
-        fig.subfig('angular_velocity',
-                   title='Angular velocity',
-                   xlabel='time (s)',
-                   ylabel='Velocity (rad/s)',
-                   legend=self.joints)
-        fig.subfig('joint_angles',
-                   title='Angle',
-                   xlabel='time (s)',
-                   ylabel='Angle (rad)',
-                   legend=self.joints)
-        fig.subfig('position',
-                   title='Position',
-                   xlabel='time (s)',
-                   ylabel='Position (m)',
-                   legend=('shoulder x', 'shoulder y',
-                           'elbow x', 'elbow y',
-                           'wrist x', 'wrist y'))
-
-
-    def compute_acceleration(self, torque, delta_time):
-        "Compute the arm dynamics."
+        self.recorder.subfig('M',
+                             title='M',
+                             xlabel='time (s)',
+                             ylabel='M',
+                             legend=('M11', 'M12', 'M21', 'M22'))
+        self.recorder.subfig('C',
+                             title='C',
+                             xlabel='time (s)',
+                             ylabel='C',
+                             legend=self.joints)
+        self.recorder.subfig('B',
+                             title='B',
+                             xlabel='time (s)',
+                             ylabel='B',
+                             legend=self.joints)
+        self.recorder.subfig('G',
+                             title='G',
+                             xlabel='time (s)',
+                             ylabel='G',
+                             legend=self.joints)
+        self.recorder.subfig('N',
+                             title='N',
+                             xlabel='time (s)',
+                             ylabel='Normal force',
+                             legend=self.joints)
+        self.recorder.subfig('torque',
+                             title='Torque',
+                             xlabel='time (s)',
+                             ylabel='Torque (N.m)',
+                             legend=self.joints)
+        self.recorder.subfig('tCBG',
+                             title='torque - (C + B + G)',
+                             xlabel='time (s)',
+                             ylabel='Tau - (C + B + G)',
+                             legend=self.joints)
+        self.recorder.subfig('angular_acceleration',
+                             title='Angular acceleration',
+                             xlabel='time (s)',
+                             ylabel='Acceleration (rad/s/s)',
+                             legend=self.joints)
+        self.recorder.subfig('angular_velocity',
+                             title='Angular velocity',
+                             xlabel='time (s)',
+                             ylabel='Velocity (rad/s)',
+                             legend=self.joints)
+        self.recorder.subfig('joint_angles',
+                             title='Angle',
+                             xlabel='time (s)',
+                             ylabel='Angle (rad)',
+                             legend=self.joints)
+        self.recorder.subfig('position',
+                             title='Position',
+                             xlabel='time (s)',
+                             ylabel='Position (m)',
+                             legend=('shoulder x', 'shoulder y',
+                                     'elbow x', 'elbow y',
+                                     'wrist x', 'wrist y'))
+
+
+    def compute_acceleration(self, torque, delta_time, record=True):
+        """Compute the arm dynamics.
+
+        Intermediate values are appended to the recorder if 'record' is
+        True."""
 
         # Load state
-        angles = self.angles.copy()
-        velocities = self.velocities.copy()
-
-        # Collision detection
-        if not self.unbounded:
-            collision_flags = self.collision_detection(angles.copy(),  # TODO
-                                                       velocities.copy(),  # TODO
-                                                       torque.copy(),  # TODO
-                                                       delta_time)
+        angles = self.angles
+        velocities = self.velocities
 
         # Angular acceleration (rad/s²)
         # From [1] p.3, [3] p.4 and [6] p.354
-        M = self.M(angles)
+        m11, m12, m22 = self.inertia(angles)
         C = self.C(angles, velocities)
         B = self.B(velocities)
         G = self.G(angles)
+        tCBG = torque - C - B - G
         normal_force = np.zeros(2)
 
-        if not self.unbounded:
-            filter = [float(flag) for flag in collision_flags]
-            normal_force = np.array(filter) * (-torque + C + B + G)  # TODO
-
-        accelerations = np.dot(np.linalg.inv(M), torque - C - B - G + normal_force)  # TODO
-
-        self.assert_bounds('angular_acceleration', accelerations)
+        accelerations = solve(m11, m12, m22, tCBG)
 
         # Forward kinematics
-        velocities, angles = kinematics.forward_kinematics(accelerations,
-                                                           velocities,
-                                                           angles,
-                                                           delta_time)
-        self.assert_bounds('angular_velocity', velocities)
+        next_velocities, next_angles = self.integrator.step(
+                                        self.acceleration_function(torque),
+                                        velocities,
+                                        angles,
+                                        delta_time,
+                                        accelerations)
 
         if not self.unbounded:
-            filter = [float(not flag) for flag in collision_flags]
-            velocities = np.array(filter) * velocities  # TODO
-            angles = self.constraint_joint_angles(angles)  # TODO # REMOVE IT #
+            # Collision detection: a joint collides if the step above makes
+            # it leave its range. In this case, the normal force cancels
+            # (torque - C - B - G) on this joint and the step is done again
+            # (M, C, B and G don't have to be computed twice).
+            range_flags = self.assert_joint_angles(next_angles)
+
+            if not all(range_flags):
+                filter = np.array([float(not flag) for flag in range_flags])
+                normal_force = filter * (-torque + C + B + G)
+                accelerations = solve(m11, m12, m22, tCBG + normal_force)
+
+                next_velocities, next_angles = self.integrator.step(
+                                self.acceleration_function(torque, filter),
+                                velocities,
+                                angles,
+                                delta_time,
+                                accelerations)
+                next_velocities = (1. - filter) * next_velocities
+
+            next_angles = self.constraint_joint_angles(next_angles)
+
+        self.assert_bounds('angular_acceleration', accelerations)
+        self.assert_bounds('angular_velocity', next_velocities)
 
         # Plot values
-        fig.append('M', M.flatten())
-        fig.append('C', C)
-        fig.append('B', B)
-        fig.append('G', G)
-        fig.append('N', normal_force)
-        fig.append('torque', torque)
-        fig.append('tCBG', torque - C - B - G)
-        fig.append('angular_acceleration', accelerations)
-        fig.append('angular_velocity', velocities)
-        fig.append('joint_angles', angles)
-        fig.append('position', np.concatenate((self.joints_position())))
-
-        # Save state
-        self.angles = angles
-        self.velocities = velocities
+        if record:
+            # (the values of the disabled channels are not computed)
+            if self.recorder.enabled('M'):
+                self.recorder.append('M', np.array([m11, m12, m12, m22]))
+            self.recorder.append('C', C)
+            self.recorder.append('B', B)
+            self.recorder.append('G', G)
+            self.recorder.append('N', normal_force)
+            self.recorder.append('torque', torque)
+            self.recorder.append('tCBG', tCBG)
+            self.recorder.append('angular_acceleration', accelerations)
+            self.recorder.append('angular_velocity', next_velocities)
+            self.recorder.append('joint_angles', next_angles)
+            if self.recorder.enabled('position'):
+                self.recorder.append('position',
+                                     np.concatenate((self.joints_position())))
+
+        # Save state (after the position of the previous state is recorded)
+        self.angles = next_angles
+        self.velocities = next_velocities
+
+        return accelerations
+
+
+    def acceleration_function(self, torque, filter=None):
+        """Return the function (velocities, angles) -> accelerations of the
+        arm for a constant torque (see pyarm.model.kinematics).
+
+        Joints where 'filter' is 1 are blocked: the normal force cancels
+        (torque - C - B - G) on them."""
+        def accelerations(velocities, angles):
+            C = self.C(angles, velocities)
+            B = self.B(velocities)
+            G = self.G(angles)
+            tCBG = torque - C - B - G
+            if filter is not None:
+                tCBG = tCBG + filter * (-torque + C + B + G)
+            m11, m12, m22 = self.inertia(angles)
+            return solve(m11, m12, m22, tCBG)
 
         return accelerations
 
 
+    def set_parameters(self, **parameters):
+        """Set arm parameters (see PARAMETERS) of this arm and clear its
+        cached constants."""
+        for name, value in parameters.items():
+            if name not in PARAMETERS:
+                raise ValueError('ArmModel : unknown parameter ' + repr(name))
+            setattr(self, name, value)
+        self._constants = None
+
+
+    @classmethod
+    def set_default_parameters(cls, **parameters):
+        """Set arm parameters (see PARAMETERS) of the arm class and clear the
+        cached constants of all the arms."""
+        for name, value in parameters.items():
+            if name not in PARAMETERS:
+                raise ValueError('ArmModel : unknown parameter ' + repr(name))
+            setattr(cls, name, value)
+        AbstractArmModel.parameters_version += 1
+
+
+    def constants(self):
+        """Return the constants derived from the arm parameters (a dict).
+
+        They are computed once and cached. The cache is cleared by
+        set_parameters() and set_default_parameters() (setting a parameter
+        attribute directly does not clear it).
+
+        - f1, f2, f3 : inertia constants (see M and C)
+        - g1, g2, g3 : gravity constants (see G), None if gravity is not
+          taken into account
+        """
+        version = AbstractArmModel.parameters_version
+        if self._constants is None or self._constants_version != version:
+            constants = {}
+
+            constants['f1'] = self.shoulder_inertia + self.elbow_inertia \
+                              + self.forearm_mass * self.upperarm_length**2
+            constants['f2'] = self.forearm_mass * self.upperarm_length \
+                              * self.forearm_cog
+            constants['f3'] = self.elbow_inertia
+
+            if self.gravity:
+                constants['g1'] = self.upperarm_mass * self.g \
+                                  * self.upperarm_cog
+                constants['g2'] = self.forearm_mass * self.g
+                constants['g3'] = self.forearm_mass * self.g * self.forearm_cog
+            else:
+                constants['g1'] = constants['g2'] = constants['g3'] = None
+
+            self._constants = constants
+            self._constants_version = version
+
+        return self._constants
+
+
+    def inertia(self, theta):
+        """Compute the coefficients (m11, m12, m22) of the (symmetric) inertia
+        matrix."""
+        constants = self.constants()
+        f2_cos = constants['f2'] * math.cos(theta[1])
+        return (constants['f1'] + 2. * f2_cos,
+                constants['f3'] + f2_cos,
+                constants['f3'])
+
+
     def M(self, theta):
         "Compute inertia matrix."
         if theta.shape != (2,):
             raise TypeError('Theta : shape is ' + str(theta.shape) \
                              + ' ((2,) expected)')
-        
-        f1 = self.shoulder_inertia + self.elbow_inertia \
-             + self.forearm_mass * self.upperarm_length**2
-        f2 = self.forearm_mass * self.upperarm_length * self.forearm_cog
-        f3 = self.elbow_inertia
 
-        M  = np.zeros([2, 2])
-        M[0, 0] = f1 + 2. * f2 * math.cos(theta[1])
-        M[0, 1] = f3 + f2 * math.cos(theta[1])
-        M[1, 0] = f3 + f2 * math.cos(theta[1])
-        M[1, 1] = f3
+        m11, m12, m22 = self.inertia(theta)
 
-        return M
+        return np.array([[m11, m12], [m12, m22]])
 
 
     def C(self, theta, omega):
@@ -245,10 +366,10 @@ class AbstractArmModel:
             raise TypeError('Omega : shape is ' + str(omega.shape) \
                             + ' ((2,) expected)')
 
-        f2 = self.forearm_mass * self.upperarm_length * self.forearm_cog
+        f2 = self.constants()['f2']
 
         C = np.array([-omega[1] * (2. * omega[0] + omega[1]),
-                      omega[0]**2] \
+                      omega[0] * omega[0]] \
                     ) * f2 * math.sin(theta[1])
 
         return C
@@ -256,7 +377,12 @@ class AbstractArmModel:
 
     def B(self, omega):
         "Compute joint friction matrix."
-        return np.dot(self.friction_matrix, omega)
+        if not self.friction:
+            return np.zeros(2)
+        # Same as np.dot(self.friction_matrix, omega) with a fixed evaluation
+        # order (see pyarm.model.bundle)
+        return self.friction_matrix[:, 0] * omega[0] \
+               + self.friction_matrix[:, 1] * omega[1]
 
 
     def G(self, theta):
@@ -266,39 +392,20 @@ class AbstractArmModel:
 
         G = np.zeros(2)
 
-        G[0] = self.upperarm_mass * self.g * self.upperarm_cog * \
-               math.cos(theta[0]) \
-               + self.forearm_mass * self.g * \
-               (self.upperarm_length * math.cos(\
-               theta[0]) + self.forearm_cog * math.cos(theta[0] + theta[1]))
-        G[1] = self.forearm_mass * self.g * self.forearm_cog * math.cos(\
-               theta[0] + theta[1])
-
-        return G
-
-
-    def collision_detection(self, angles, velocities, torque, delta_time):
-        """Compute angles in order to detect collisions.
+        if not self.gravity:
+            return G
 
-        Return True if angle value is out of range (collision) or False
-        otherwise."""
-        # Angular acceleration (rad/s²)
-        # From [1] p.3, [3] p.4 and [6] p.354
-        M = self.M(angles)
-        C = self.C(angles, velocities)
-        B = self.B(velocities)
-        G = self.G(angles)
-        accelerations = np.dot(np.linalg.inv(M), torque - C - B - G)
+        constants = self.constants()
 
-        # Forward kinematics
-        velocities, angles = kinematics.forward_kinematics(accelerations,
-                                                           velocities,
-                                                           angles,
-                                                           delta_time)
+        cos_shoulder = math.cos(theta[0])
+        cos_sum = math.cos(theta[0] + theta[1])
 
-        range_flags = self.assert_joint_angles(angles)
+        G[0] = constants['g1'] * cos_shoulder + constants['g2'] \
+               * (self.upperarm_length * cos_shoulder \
+                  + self.forearm_cog * cos_sum)
+        G[1] = constants['g3'] * cos_sum
 
-        return [not flag for flag in range_flags]
+        return G
 
 
     def constraint_joint_angles(self, angles):
@@ -365,3 +472,17 @@ class AbstractArmModel:
                       * self.forearm_length + elbow_point
 
         return shoulder_point, elbow_point, wrist_point
+
+
+def solve(m11, m12, m22, y):
+    """Solve the symmetric 2x2 linear system M x = y where
+    M = [[m11, m12], [m12, m22]].
+
+    The closed form solution is used (no matrix inversion)."""
+    y1 = y.item(0)
+    y2 = y.item(1)
+
+    det = m11 * m22 - m12 * m12
+
+    return np.array([(m22 * y1 - m12 * y2) / det,
+                     (m11 * y2 - m12 * y1) / det])
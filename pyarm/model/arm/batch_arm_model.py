@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import numpy as np
+
+class BatchArmModel:
+    """Forward dynamics of N independent arms computed in one vectorized call.
+
+    Angles, velocities, torques and accelerations are (N, 2) arrays (one row
+    per arm). Arm parameters and model terms (friction, gravity, joint angle
+    constraints) are taken from 'arm', an instance of one of the arm models
+    (Kambara, Mitrovic, Li or Sagittal), which also gives the integration
+    method.
+
+    Usage :
+    arm = BatchArmModel(mitrovic_arm_model.ArmModel(), 1000)
+    accelerations = arm.compute_acceleration(torque, delta_time)
+    """
+
+    # STATE VARIABLES #########################################################
+
+    velocities = None         # Angular velocities (rd/s), shape (N, 2)
+    angles = None             # Joint angles (rd), shape (N, 2)
+
+    # CONSTANTS ###############################################################
+
+    arm = None                # The arm model
+
+    angles_min = None         # Min joint angles (rd), shape (2,)
+    angles_max = None         # Max joint angles (rd), shape (2,)
+
+    unbounded = False
+
+    ###########################################################################
+
+    def __init__(self, arm, num_arms, unbounded=None):
+        self.arm = arm
+
+        if unbounded is None:
+            unbounded = arm.unbounded
+        self.unbounded = unbounded
+
+        self.angles_min = np.array([c['min'] for c in arm.angle_constraints])
+        self.angles_max = np.array([c['max'] for c in arm.angle_constraints])
+
+        self.velocities = np.zeros([num_arms, 2])
+        self.angles = np.tile(arm.angles, (num_arms, 1))
+
+
+    def compute_acceleration(self, torque, delta_time):
+        "Compute the dynamics of all arms and update their state."
+        accelerations, velocities, angles = self.next_state(self.angles,
+                                                            self.velocities,
+                                                            torque,
+                                                            delta_time)
+        self.angles = angles
+        self.velocities = velocities
+
+        return accelerations
+
+
+    def next_state(self, angles, velocities, torque, delta_time):
+        """Compute the dynamics of all arms.
+
+        Return the accelerations, the velocities and the angles after
+        'delta_time' seconds (three (N, 2) arrays). The arguments are not
+        modified."""
+        check_shape('Angles', angles)
+        check_shape('Velocities', velocities)
+        check_shape('Torque', torque)
+
+        # Angular acceleration (rad/s²)
+        M = self.M(angles)
+        tCBG = torque - self.C(angles, velocities) - self.B(velocities) \
+               - self.G(angles)
+        accelerations = solve(M, tCBG)
+
+        # Forward kinematics
+        next_velocities, next_angles = self.arm.integrator.step(
+                                        self.acceleration_function(torque),
+                                        velocities,
+                                        angles,
+                                        delta_time,
+                                        accelerations)
+
+        if not self.unbounded:
+            # Joints that would leave their range are blocked: the normal
+            # force cancels (torque - C - B - G) on them.
+            collision_flags = ~((self.angles_min < next_angles) \
+                                & (next_angles < self.angles_max))
+
+            if collision_flags.any():
+                tCBG = np.where(collision_flags, 0., tCBG)
+                accelerations = solve(M, tCBG)
+                next_velocities, next_angles = self.arm.integrator.step(
+                        self.acceleration_function(torque, collision_flags),
+                        velocities,
+                        angles,
+                        delta_time,
+                        accelerations)
+                next_velocities = np.where(collision_flags,
+                                           0.,
+                                           next_velocities)
+
+            next_angles = np.clip(next_angles, self.angles_min, self.angles_max)
+
+        self.arm.assert_bounds('angular_acceleration', accelerations)
+        self.arm.assert_bounds('angular_velocity', next_velocities)
+
+        return accelerations, next_velocities, next_angles
+
+
+    def acceleration_function(self, torque, collision_flags=None):
+        """Return the function (velocities, angles) -> accelerations of the
+        arms for a constant torque (see pyarm.model.kinematics).
+
+        Joints where 'collision_flags' is True are blocked."""
+        def accelerations(velocities, angles):
+            tCBG = torque - self.C(angles, velocities) - self.B(velocities) \
+                   - self.G(angles)
+            if collision_flags is not None:
+                tCBG = np.where(collision_flags, 0., tCBG)
+            return solve(self.M(angles), tCBG)
+
+        return accelerations
+
+
+    def M(self, theta):
+        "Compute inertia matrices (shape (N, 2, 2))."
+        constants = self.arm.constants()
+        f1 = constants['f1']
+        f2 = constants['f2']
+        f3 = constants['f3']
+
+        cos_elbow = np.cos(theta[:, 1])
+
+        M = np.empty([theta.shape[0], 2, 2])
+        M[:, 0, 0] = f1 + 2. * f2 * cos_elbow
+        M[:, 0, 1] = f3 + f2 * cos_elbow
+        M[:, 1, 0] = M[:, 0, 1]
+        M[:, 1, 1] = f3
+
+        return M
+
+
+    def C(self, theta, omega):
+        "Compute centripedal and coriolis forces (shape (N, 2))."
+        f2 = self.arm.constants()['f2']
+
+        C = np.empty(omega.shape)
+        C[:, 0] = -omega[:, 1] * (2. * omega[:, 0] + omega[:, 1])
+        C[:, 1] = omega[:, 0]**2
+        C *= (f2 * np.sin(theta[:, 1]))[:, np.newaxis]
+
+        return C
+
+
+    def B(self, omega):
+        "Compute joint friction (shape (N, 2))."
+        if not self.arm.friction:
+            return np.zeros(omega.shape)
+        return np.dot(omega, self.arm.friction_matrix.T)
+
+
+    def G(self, theta):
+        "Compute gravity forces (shape (N, 2))."
+        arm = self.arm
+
+        G = np.zeros(theta.shape)
+
+        if not arm.gravity:
+            return G
+
+        cos_shoulder = np.cos(theta[:, 0])
+        cos_sum = np.cos(theta[:, 0] + theta[:, 1])
+
+        constants = arm.constants()
+
+        G[:, 0] = constants['g1'] * cos_shoulder + constants['g2'] \
+                  * (arm.upperarm_length * cos_shoulder \
+                     + arm.forearm_cog * cos_sum)
+        G[:, 1] = constants['g3'] * cos_sum
+
+        return G
+
+
+def solve(M, y):
+    """Solve the N symmetric 2x2 systems M x = y.
+
+    M has shape (N, 2, 2) and y has shape (N, 2)."""
+    det = M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0]
+
+    x = np.empty(y.shape)
+    x[:, 0] = (M[:, 1, 1] * y[:, 0] - M[:, 0, 1] * y[:, 1]) / det
+    x[:, 1] = (M[:, 0, 0] * y[:, 1] - M[:, 1, 0] * y[:, 0]) / det
+
+    return x
+
+
+def check_shape(name, value):
+    "Raise TypeError if 'value' is not a (N, 2) array."
+    if np.ndim(value) != 2 or np.shape(value)[1] != 2:
+        raise TypeError(name + ' : shape is ' + str(np.shape(value)) \
+                        + ' ((N, 2) expected)')
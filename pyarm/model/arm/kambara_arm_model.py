@@ -4,7 +4,6 @@
 
 from pyarm.model.arm.abstract_arm_model import AbstractArmModel
 import math
-import numpy as np
 
 class ArmModel(AbstractArmModel):
     """Vertically planar 2 DoF arm model (sagittal plane).
@@ -53,9 +52,6 @@ class ArmModel(AbstractArmModel):
     # Gravitational acceleration (m/s²)
     g  = 9.8
 
-    ###########################################################################
-
-    def B(self, velocities):
-        "Compute joint friction matrix."
-        return np.zeros(2)
+    # Model terms ###############################
 
+    friction = False
@@ -3,7 +3,6 @@
 # Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
 
 from pyarm.model.arm.abstract_arm_model import AbstractArmModel
-import numpy as np
 
 class ArmModel(AbstractArmModel):
     """Horizontally planar 2 DoF arm model.
@@ -62,13 +61,7 @@ class ArmModel(AbstractArmModel):
     # Distance from the forearm joint center to the forearm center of mass (m)
     forearm_cog = 0.21 
 
-    ###########################################################################
-
-    def B(self, velocities):
-        "Compute joint friction matrix."
-        return np.zeros(2)
-
-    def G(self, angles):
-        "Compute gravity force matrix."
-        return np.zeros(2)
+    # Model terms ###############################
 
+    friction = False
+    gravity = False
@@ -23,9 +23,6 @@ class ArmModel(KambaraArmModel):
 
     friction_matrix = np.array([[0.05, 0.025], [0.025, 0.05]])
 
-    ###########################################################################
-
-    def B(self, omega):
-        "Compute joint friction matrix."
-        return np.dot(self.friction_matrix, omega)
+    # Model terms ###############################
 
+    friction = True
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+from pyarm.model.kinematics import finite_difference_method
+import math
+import numpy as np
+
+class ModelBundle:
+    """Arm model and muscle model fused into a scalar step function.
+
+    The state is kept in plain floats and each step is computed with the
+    math module only (no small numpy array is allocated). For a single arm,
+    this is much faster than MuscleModel.compute_torque followed by
+    ArmModel.compute_acceleration and it gives bit for bit the same results.
+
+    Supported models : all arm models with the finite difference method and
+    the Kambara, Mitrovic and fake muscle models.
+
+    Nothing is recorded into pyarm.fig and the state of the arm model is
+    only updated by sync().
+
+    Usage :
+    bundle = ModelBundle(arm, muscle)
+    torque, accelerations = bundle.step(commands, delta_time)
+    """
+
+    # STATE VARIABLES #########################################################
+
+    velocities = None         # Angular velocity (rd/s), 2 floats tuple
+    angles = None             # Joint angle (rd), 2 floats tuple
+
+    # CONSTANTS ###############################################################
+
+    arm = None
+    muscle = None
+
+    ###########################################################################
+
+    def __init__(self, arm, muscle):
+        if arm.integrator is not finite_difference_method:
+            raise ValueError('ModelBundle : the ' + arm.integrator.name \
+                             + ' integrator is not supported')
+        if muscle.name not in ('Kambara', 'Mitrovic', 'Fake'):
+            raise ValueError('ModelBundle : the ' + muscle.name \
+                             + ' muscle model is not supported')
+        if getattr(muscle, 'moment_arm_model', None) is not None:
+            raise ValueError('ModelBundle : posture dependent moment arms '
+                             'are not supported')
+
+        self.arm = arm
+        self.muscle = muscle
+
+        self.angles = tuple(arm.angles.tolist())
+        self.velocities = tuple(arm.velocities.tolist())
+
+        self.update_constants()
+
+
+    def update_constants(self):
+        """Read the parameters of the arm and muscle models.
+
+        Call it again if one of these parameters has been changed."""
+        arm = self.arm
+        constants = arm.constants()
+
+        self._inertia = (constants['f1'], constants['f2'], constants['f3'])
+
+        if arm.friction:
+            self._friction = tuple(arm.friction_matrix.flatten().tolist())
+        else:
+            self._friction = None
+
+        if arm.gravity:
+            self._gravity = (constants['g1'], constants['g2'],
+                             constants['g3'], arm.upperarm_length,
+                             arm.forearm_cog)
+        else:
+            self._gravity = None
+
+        self._bounds = None
+        if not arm.unbounded:
+            self._bounds = tuple((float(c['min']), float(c['max']))
+                                 for c in arm.angle_constraints)
+
+        # Muscle torque coefficients (one tuple per muscle)
+        muscle = self.muscle
+        if muscle.name == 'Fake':
+            self._muscles = None
+        else:
+            coefficients = muscle.coefficients()
+            P = coefficients['P']
+            self._muscles = tuple(zip(muscle.A[:, 0].tolist(),
+                                      muscle.A[:, 1].tolist(),
+                                      P[:, 0:6].T.tolist(),
+                                      P[:, 6:12].T.tolist(),
+                                      coefficients['c2'].tolist()))
+
+
+    def step(self, command, delta_time):
+        """Compute the torque and the arm dynamics and update the state.
+
+        Return the torque and the angular accelerations (two 2 floats
+        tuples)."""
+        q0, q1 = self.angles
+        w0, w1 = self.velocities
+
+        t0, t1 = self.torque(command, q0, q1, w0, w1)
+
+        # Centripedal and coriolis forces
+        f1, f2, f3 = self._inertia
+        cos_elbow = math.cos(q1)
+        sin_elbow = math.sin(q1)
+        c0 = -w1 * (2. * w0 + w1) * f2 * sin_elbow
+        c1 = w0 * w0 * f2 * sin_elbow
+
+        # Joint friction
+        b0 = b1 = 0.
+        if self._friction is not None:
+            b00, b01, b10, b11 = self._friction
+            b0 = b00 * w0 + b01 * w1
+            b1 = b10 * w0 + b11 * w1
+
+        # Gravity
+        g0 = g1 = 0.
+        if self._gravity is not None:
+            gc1, gc2, gc3, upperarm_length, forearm_cog = self._gravity
+            cos_shoulder = math.cos(q0)
+            cos_sum = math.cos(q0 + q1)
+            g0 = gc1 * cos_shoulder \
+                 + gc2 * (upperarm_length * cos_shoulder \
+                          + forearm_cog * cos_sum)
+            g1 = gc3 * cos_sum
+
+        # Inertia matrix
+        f2_cos = f2 * cos_elbow
+        m11 = f1 + 2. * f2_cos
+        m12 = f3 + f2_cos
+        m22 = f3
+        det = m11 * m22 - m12 * m12
+
+        # Angular acceleration and forward kinematics
+        y0 = t0 - c0 - b0 - g0
+        y1 = t1 - c1 - b1 - g1
+
+        a0 = (m22 * y0 - m12 * y1) / det
+        a1 = (m11 * y1 - m12 * y0) / det
+
+        v0 = w0 + a0 * delta_time
+        v1 = w1 + a1 * delta_time
+        p0 = q0 + v0 * delta_time
+        p1 = q1 + v1 * delta_time
+
+        if self._bounds is not None:
+            (min0, max0), (min1, max1) = self._bounds
+            collision0 = not (min0 < p0 < max0)
+            collision1 = not (min1 < p1 < max1)
+
+            if collision0 or collision1:
+                # The normal force cancels (torque - C - B - G)
+                if collision0:
+                    y0 = y0 + (-t0 + c0 + b0 + g0)
+                if collision1:
+                    y1 = y1 + (-t1 + c1 + b1 + g1)
+
+                a0 = (m22 * y0 - m12 * y1) / det
+                a1 = (m11 * y1 - m12 * y0) / det
+
+                v0 = 0. if collision0 else w0 + a0 * delta_time
+                v1 = 0. if collision1 else w1 + a1 * delta_time
+                p0 = q0 + (w0 + a0 * delta_time) * delta_time
+                p1 = q1 + (w1 + a1 * delta_time) * delta_time
+
+            p0 = min(max(p0, min0), max0)
+            p1 = min(max(p1, min1), max1)
+
+        self.angles = (p0, p1)
+        self.velocities = (v0, v1)
+
+        return (t0, t1), (a0, a1)
+
+
+    def torque(self, command, q0, q1, w0, w1):
+        "Compute the muscle torque (N.m) (2 floats tuple)."
+        if self._muscles is None:
+            # Fake muscle model
+            if len(command) > 2:
+                return (float(command[0] - command[1]),
+                        float(command[2] - command[3]))
+            return (float(command[0]), float(command[1]))
+
+        # Kelvin-Voigt muscles (same operations as
+        # KelvinVoigtMuscleModel.fast_torque)
+        t0 = t1 = 0.
+        for (a0, a1, p0, p1, c2), u in zip(self._muscles, command):
+            u = max(min(float(u), 1.), 0.)
+
+            c0 = q0 * p0[0] + q1 * p0[1] + w0 * p0[2] + w1 * p0[3] + p0[4]
+            c1 = q0 * p1[0] + q1 * p1[1] + w0 * p1[2] + w1 * p1[3] + p1[4]
+
+            tension = c0 + (c1 + c2 * u) * u
+
+            t0 += a0 * tension
+            t1 += a1 * tension
+
+        return (t0, t1)
+
+
+    def sync(self):
+        "Copy the state into the arm model (e.g. before a GUI update)."
+        self.arm.angles = np.array(self.angles)
+        self.arm.velocities = np.array(self.velocities)
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Analytical Jacobians of the discrete arm+muscle step.
+
+The state is x = (shoulder angle, elbow angle, shoulder velocity, elbow
+velocity) as in pyarm.model.dirty_wrapper_6 and the step is the finite
+difference method on the unbounded dynamics :
+
+    a = M(q)^-1 (torque(q, w, u) - C(q, w) - B(w) - G(q))
+    w' = w + a dt
+    q' = q + w' dt
+
+Every function is batched: the first axis of each array is the time step
+(or any other batch axis), so a whole trajectory is linearized in one call.
+
+Usage :
+next_states, A, B = step_jacobians(arm, muscle, states, commands, dt)
+# next_states[t] ~ f(states[t], commands[t])
+# A[t] = df/dx (T, 4, 4) and B[t] = df/du (T, 4, num_commands)
+"""
+
+__all__ = ['arm_jacobians', 'muscle_jacobians', 'step_jacobians']
+
+import numpy as np
+
+from pyarm.model.muscle import weiwei_muscle_model as li
+
+###############################################################################
+
+def step_jacobians(arm, muscle, states, commands, delta_time):
+    """Compute the next states and the Jacobians of the step with respect
+    to the state and to the command.
+
+    states has shape (T, 4) and commands has shape (T, num_commands).
+    Return next_states (T, 4), A = d(next_state)/d(state) (T, 4, 4) and
+    B = d(next_state)/d(command) (T, 4, num_commands)."""
+    states = np.atleast_2d(np.asarray(states, dtype=np.float64))
+    commands = np.atleast_2d(np.asarray(commands, dtype=np.float64))
+    angles, velocities = states[:, 0:2], states[:, 2:4]
+
+    torque, dtorque_dq, dtorque_dw, dtorque_du = muscle_jacobians(muscle,
+                                                                  angles,
+                                                                  velocities,
+                                                                  commands)
+
+    accelerations, dacc_dq, dacc_dw, dacc_dtorque = arm_jacobians(arm,
+                                                                  angles,
+                                                                  velocities,
+                                                                  torque)
+
+    # Chain rule through the muscle torque
+    dacc_dq = dacc_dq + np.matmul(dacc_dtorque, dtorque_dq)
+    dacc_dw = dacc_dw + np.matmul(dacc_dtorque, dtorque_dw)
+    dacc_du = np.matmul(dacc_dtorque, dtorque_du)
+
+    # Forward kinematics (finite difference method)
+    num_steps = states.shape[0]
+    identity = np.eye(2)
+
+    next_velocities = velocities + accelerations * delta_time
+    next_angles = angles + next_velocities * delta_time
+
+    dv_dq = dacc_dq * delta_time
+    dv_dw = identity + dacc_dw * delta_time
+    dv_du = dacc_du * delta_time
+
+    A = np.empty([num_steps, 4, 4])
+    A[:, 0:2, 0:2] = identity + dv_dq * delta_time
+    A[:, 0:2, 2:4] = dv_dw * delta_time
+    A[:, 2:4, 0:2] = dv_dq
+    A[:, 2:4, 2:4] = dv_dw
+
+    B = np.empty([num_steps, 4, commands.shape[1]])
+    B[:, 0:2] = dv_du * delta_time
+    B[:, 2:4] = dv_du
+
+    next_states = np.concatenate([next_angles, next_velocities], axis=1)
+
+    return next_states, A, B
+
+# ARM #########################################################################
+
+def arm_jacobians(arm, angles, velocities, torque):
+    """Compute the angular accelerations of the unbounded arm model and
+    their Jacobians.
+
+    angles, velocities and torque have shape (T, 2). Return accelerations
+    (T, 2) and d(accelerations)/d(angles), d(accelerations)/d(velocities),
+    d(accelerations)/d(torque) (T, 2, 2 each)."""
+    constants = arm.constants()
+    f1, f2, f3 = constants['f1'], constants['f2'], constants['f3']
+
+    q0, q1 = angles[:, 0], angles[:, 1]
+    w0, w1 = velocities[:, 0], velocities[:, 1]
+    num_steps = angles.shape[0]
+
+    sin_elbow = np.sin(q1)
+    cos_elbow = np.cos(q1)
+
+    # y = torque - C - B - G and its derivatives
+    y = torque.copy()
+    dy_dq = np.zeros([num_steps, 2, 2])
+    dy_dw = np.zeros([num_steps, 2, 2])
+
+    # Centripedal and coriolis forces
+    y[:, 0] += w1 * (2. * w0 + w1) * f2 * sin_elbow
+    y[:, 1] -= w0 * w0 * f2 * sin_elbow
+    dy_dq[:, 0, 1] = w1 * (2. * w0 + w1) * f2 * cos_elbow
+    dy_dq[:, 1, 1] = -w0 * w0 * f2 * cos_elbow
+    dy_dw[:, 0, 0] = 2. * w1 * f2 * sin_elbow
+    dy_dw[:, 0, 1] = 2. * (w0 + w1) * f2 * sin_elbow
+    dy_dw[:, 1, 0] = -2. * w0 * f2 * sin_elbow
+
+    # Joint friction
+    if arm.friction:
+        y -= np.dot(velocities, arm.friction_matrix.T)
+        dy_dw -= arm.friction_matrix
+
+    # Gravity
+    if arm.gravity:
+        g1, g2, g3 = constants['g1'], constants['g2'], constants['g3']
+        l1, lc2 = arm.upperarm_length, arm.forearm_cog
+        cos_shoulder, sin_shoulder = np.cos(q0), np.sin(q0)
+        cos_sum, sin_sum = np.cos(q0 + q1), np.sin(q0 + q1)
+
+        y[:, 0] -= g1 * cos_shoulder + g2 * (l1 * cos_shoulder
+                                             + lc2 * cos_sum)
+        y[:, 1] -= g3 * cos_sum
+        dy_dq[:, 0, 0] += g1 * sin_shoulder + g2 * (l1 * sin_shoulder
+                                                    + lc2 * sin_sum)
+        dy_dq[:, 0, 1] += g2 * lc2 * sin_sum
+        dy_dq[:, 1, 0] += g3 * sin_sum
+        dy_dq[:, 1, 1] += g3 * sin_sum
+
+    # Inverse of the inertia matrix
+    f2_cos = f2 * cos_elbow
+    m11 = f1 + 2. * f2_cos
+    m12 = f3 + f2_cos
+    m22 = f3
+    det = m11 * m22 - m12 * m12
+
+    M_inv = np.empty([num_steps, 2, 2])
+    M_inv[:, 0, 0] = m22 / det
+    M_inv[:, 0, 1] = -m12 / det
+    M_inv[:, 1, 0] = -m12 / det
+    M_inv[:, 1, 1] = m11 / det
+
+    accelerations = np.einsum('tij,tj->ti', M_inv, y)
+
+    # d(M^-1 y)/dq = M^-1 (dy/dq - dM/dq a) (M only depends on the elbow)
+    f2_sin = f2 * sin_elbow
+    dM_dq1_a = np.empty([num_steps, 2])
+    dM_dq1_a[:, 0] = -2. * f2_sin * accelerations[:, 0] \
+                     - f2_sin * accelerations[:, 1]
+    dM_dq1_a[:, 1] = -f2_sin * accelerations[:, 0]
+    dy_dq[:, :, 1] -= dM_dq1_a
+
+    dacc_dq = np.matmul(M_inv, dy_dq)
+    dacc_dw = np.matmul(M_inv, dy_dw)
+
+    return accelerations, dacc_dq, dacc_dw, M_inv
+
+# MUSCLES #####################################################################
+
+def muscle_jacobians(muscle, angles, velocities, commands):
+    """Compute the muscle torque and its Jacobians.
+
+    angles and velocities have shape (T, 2), commands has shape
+    (T, num_commands). Return torque (T, 2), d(torque)/d(angles),
+    d(torque)/d(velocities) (T, 2, 2 each) and d(torque)/d(commands)
+    (T, 2, num_commands)."""
+    num_steps, num_commands = commands.shape
+
+    if muscle.name == 'Fake':
+        dtorque_du = np.zeros([2, num_commands])
+        if num_commands > 2:
+            dtorque_du[0, 0:2] = 1., -1.
+            dtorque_du[1, 2:4] = 1., -1.
+        else:
+            dtorque_du[:, 0:2] = np.eye(2)
+        torque = np.dot(commands, dtorque_du.T)
+        zeros = np.zeros([num_steps, 2, 2])
+        return torque, zeros, zeros.copy(), \
+               np.tile(dtorque_du, (num_steps, 1, 1))
+
+    if muscle.name == 'Li':
+        tension_jacobians = li_tension_jacobians
+    elif muscle.name in ('Kambara', 'Mitrovic'):
+        tension_jacobians = kelvin_voigt_tension_jacobians
+    else:
+        raise ValueError('muscle_jacobians : the ' + muscle.name \
+                         + ' muscle model is not supported')
+
+    # Filtered command (the derivative is null out of [0, 1])
+    u = np.clip(commands[:, 0:6], 0., 1.)
+    du_dcommand = ((commands[:, 0:6] >= 0.) & (commands[:, 0:6] <= 1.))
+
+    moment_arm_model = getattr(muscle, 'moment_arm_model', None)
+    if moment_arm_model is not None:
+        return posture_muscle_jacobians(muscle, moment_arm_model,
+                                        tension_jacobians, angles,
+                                        velocities, u, du_dcommand,
+                                        num_commands)
+
+    moment_arm = muscle.moment_arm(None)        # Constant (6, 2) array
+    muscle_length = muscle.lm0 - np.dot(angles, moment_arm.T)
+    muscle_velocity = -np.dot(velocities, moment_arm.T)
+
+    tension, dT_dml, dT_dmv, dT_du = tension_jacobians(muscle,
+                                                       muscle_length,
+                                                       muscle_velocity,
+                                                       u)
+
+    # torque = moment_arm.T tension, ml = lm0 - moment_arm q, mv = -moment_arm w
+    torque = np.dot(tension, moment_arm)
+    dtorque_dq = -np.einsum('mi,tm,mj->tij', moment_arm, dT_dml, moment_arm)
+    dtorque_dw = -np.einsum('mi,tm,mj->tij', moment_arm, dT_dmv, moment_arm)
+
+    dtorque_du = np.zeros([num_steps, 2, num_commands])
+    dtorque_du[:, :, 0:6] = moment_arm.T * (dT_du * du_dcommand)[:, np.newaxis]
+
+    return torque, dtorque_dq, dtorque_dw, dtorque_du
+
+
+def posture_muscle_jacobians(muscle, moment_arm_model, tension_jacobians,
+                             angles, velocities, u, du_dcommand, num_commands):
+    """muscle_jacobians() for posture dependent moment arms (see
+    pyarm.model.muscle.moment_arm).
+
+    The moment arm R_mj of the muscle m at the joint j only depends on q_j :
+    ml_m = lm0_m - sum_j integral(R_mj), mv_m = -sum_j R_mj w_j and
+    torque_j = sum_m R_mj T_m."""
+    num_steps = angles.shape[0]
+
+    moment_arm = moment_arm_model(angles)                     # (T, 6, 2)
+    slope = moment_arm_model.slope(angles)                    # dR_mj/dq_j
+
+    muscle_length = muscle.lm0 - moment_arm_model.excursion(angles)
+    muscle_velocity = -(moment_arm * velocities[:, np.newaxis]).sum(axis=-1)
+
+    tension, dT_dml, dT_dmv, dT_du = tension_jacobians(muscle,
+                                                       muscle_length,
+                                                       muscle_velocity,
+                                                       u)
+
+    # dml_m/dq_k = -R_mk, dmv_m/dq_k = -dR_mk/dq_k w_k
+    dmv_dq = -slope * velocities[:, np.newaxis]
+    torque = (moment_arm * tension[:, :, np.newaxis]).sum(axis=1)
+    dtorque_dq = -np.einsum('tmi,tm,tmj->tij', moment_arm, dT_dml, moment_arm) \
+                 + np.einsum('tmi,tm,tmj->tij', moment_arm, dT_dmv, dmv_dq)
+    dtorque_dq[:, [0, 1], [0, 1]] += (slope * tension[:, :, np.newaxis]).sum(axis=1)
+    dtorque_dw = -np.einsum('tmi,tm,tmj->tij', moment_arm, dT_dmv, moment_arm)
+
+    dtorque_du = np.zeros([num_steps, 2, num_commands])
+    dtorque_du[:, :, 0:6] = np.swapaxes(moment_arm, 1, 2) \
+                            * (dT_du * du_dcommand)[:, np.newaxis]
+
+    return torque, dtorque_dq, dtorque_dw, dtorque_du
+
+
+def kelvin_voigt_tension_jacobians(muscle, ml, mv, u):
+    """Tension of the Kambara and Mitrovic muscle models and its partial
+    derivatives with respect to the muscle length, the muscle velocity and
+    the filtered command (T, 6 arrays)."""
+    stiffness = muscle.k0 + muscle.k1 * u
+    viscosity = muscle.b0 + muscle.b1 * u
+    stretching = ml - (muscle.lr0 + muscle.lr1 * u)
+
+    tension = stiffness * stretching + viscosity * mv
+
+    dT_dml = stiffness
+    dT_dmv = viscosity
+    dT_du = muscle.k1 * stretching - stiffness * muscle.lr1 + muscle.b1 * mv
+
+    return tension, dT_dml, dT_dmv, dT_du
+
+
+def li_tension_jacobians(muscle, ml, mv, u):
+    """Tension of the Li muscle model and its partial derivatives with
+    respect to the muscle length, the muscle velocity and the filtered
+    command (T, 6 arrays)."""
+    # nf
+    nf = li.NF0 + li.NF1 * (1. / ml - 1.)
+    dnf_dml = -li.NF1 / ml**2
+
+    # Activation-frequency relationship: fa = 1 - exp(-z)
+    active = u > 0.
+    ratio = np.where(active, u / (li.FA_SCALE * nf), 1.)
+    z = np.where(active, ratio ** nf, 0.)
+    fa = 1. - np.exp(-z)
+    dfa_du = np.where(active, np.exp(-z) * nf * z / np.where(active, u, 1.),
+                      0.)
+    dfa_dml = np.exp(-z) * z * (np.log(ratio) - 1.) * dnf_dml
+
+    # Force-length relationship
+    r = (ml**li.FL_POWER - 1.) / li.FL_WIDTH
+    fl = np.exp(-np.abs(r)**li.FL_SHAPE)
+    dfl_dml = -fl * li.FL_SHAPE * np.abs(r)**(li.FL_SHAPE - 1.) * np.sign(r) \
+              * li.FL_POWER * ml**(li.FL_POWER - 1.) / li.FL_WIDTH
+
+    # Force-velocity relationship: fv = (c + n mv) / (c + d mv)
+    shortening = mv <= 0.
+    n = li.FV_N0 - li.FV_N1 * ml + li.FV_N2 * ml**2
+    numerator = np.where(shortening, li.FV_SHORTENING - mv,
+                         li.FV_LENGTHENING + n * mv)
+    denominator = np.where(shortening,
+                           li.FV_SHORTENING + mv * (li.FV_D0 + li.FV_D1 * ml),
+                           li.FV_LENGTHENING + mv)
+    fv = numerator / denominator
+
+    dfv_dmv = np.where(shortening,
+                       (-denominator - numerator * (li.FV_D0 + li.FV_D1 * ml))
+                       / denominator**2,
+                       li.FV_LENGTHENING * (n - 1.) / denominator**2)
+    dfv_dml = np.where(shortening,
+                       -numerator * li.FV_D1 * mv / denominator**2,
+                       (2. * li.FV_N2 * ml - li.FV_N1) * mv / denominator)
+
+    # Elastic force
+    fe = -li.FE_SCALE * np.exp(li.FE_OFFSET - li.FE_SLOPE * ml)
+    dfe_dml = -li.FE_SLOPE * fe
+
+    tension = fa * (fe + fl * fv)
+
+    dT_dml = dfa_dml * (fe + fl * fv) \
+             + fa * (dfe_dml + dfl_dml * fv + fl * dfv_dml)
+    dT_dmv = fa * fl * dfv_dmv
+    dT_du = dfa_du * (fe + fl * fv)
+
+    return tension, dT_dml, dT_dmv, dT_du
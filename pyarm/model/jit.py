@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Compiled rollouts of the arm and muscle models.
+
+The whole loop (muscle torque, arm dynamics and finite difference
+integration) is written as one kernel working on floats and numpy arrays.
+The kernel is compiled with Numba when it is installed; otherwise rollout()
+falls back to the regular MuscleModel and ArmModel classes.
+
+The Li muscle model is computed with its exact functions, or with its
+linear lookup tables when MuscleModel.tables is set (see
+pyarm.model.muscle.lookup_table): the compiled table lookups are several
+times faster than the exp/pow calls they replace.
+
+Usage :
+trajectory = rollout(arm, muscle, commands, delta_time)
+"""
+
+__all__ = ['AVAILABLE', 'rollout', 'supported']
+
+import math
+import numpy as np
+
+from pyarm.model.kinematics import finite_difference_method
+from pyarm.model.muscle.weiwei_muscle_model import (
+        NF0, NF1, FA_SCALE, FL_POWER, FL_WIDTH, FL_SHAPE,
+        FV_SHORTENING, FV_D0, FV_D1, FV_LENGTHENING, FV_N0, FV_N1, FV_N2,
+        FE_SCALE, FE_OFFSET, FE_SLOPE)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+AVAILABLE = numba is not None     # True if rollouts are compiled
+
+# Muscle model codes
+FAKE, KELVIN_VOIGT, LI, LI_TABLE = 0, 1, 2, 3
+
+MUSCLE_CODES = {'Fake': FAKE,
+                'Kambara': KELVIN_VOIGT,
+                'Mitrovic': KELVIN_VOIGT,   # Same torque as Kambara's formula
+                'Li': LI}
+
+###############################################################################
+
+def supported(arm, muscle):
+    """Return True if the kernel can run these arm and muscle models (the
+    moment arms of a muscle should be constant and its lookup tables
+    linear)."""
+    tables = getattr(muscle, 'tables', None)
+    return arm.integrator is finite_difference_method \
+           and muscle.name in MUSCLE_CODES \
+           and getattr(muscle, 'moment_arm_model', None) is None \
+           and (tables is None or tables.method == 'linear')
+
+
+def rollout(arm, muscle, commands, delta_time, backend=None):
+    """Run the open loop 'commands' (one row per step) and return the same
+    dictionary of arrays as pyarm.simulation.simulate().
+
+    'backend' is 'numba' (compiled kernel), 'python' (the same kernel,
+    interpreted, mainly for testing purpose) or 'numpy' (MuscleModel and
+    ArmModel classes). By default, 'numba' is used when it is available and
+    when the models are supported, 'numpy' otherwise.
+
+    The state of 'arm' is updated. Nothing is recorded into pyarm.fig."""
+    commands = np.array(commands, dtype=np.float64, ndmin=2)
+
+    if backend is None:
+        if AVAILABLE and supported(arm, muscle):
+            backend = 'numba'
+        else:
+            backend = 'numpy'
+
+    if backend == 'numpy':
+        return numpy_rollout(arm, muscle, commands, delta_time)
+
+    if backend == 'numba':
+        if not AVAILABLE:
+            raise ValueError('rollout : numba is not installed')
+        kernel = _compiled_kernel()
+    elif backend == 'python':
+        kernel = rollout_kernel
+    else:
+        raise ValueError('rollout : unknown backend ' + repr(backend))
+
+    if not supported(arm, muscle):
+        raise ValueError('rollout : unsupported models (' + arm.name + ', ' \
+                         + muscle.name + ', ' + arm.integrator.name + ')')
+
+    num_steps = commands.shape[0]
+    trajectory = {'time': np.arange(1, num_steps + 1) * float(delta_time),
+                  'commands': commands,
+                  'torque': np.empty([num_steps, 2]),
+                  'accelerations': np.empty([num_steps, 2]),
+                  'velocities': np.empty([num_steps, 2]),
+                  'angles': np.empty([num_steps, 2])}
+
+    tables = getattr(muscle, 'tables', None)
+    muscle_code = MUSCLE_CODES[muscle.name] if tables is None else LI_TABLE
+    grids, fa_table, force_table = table_parameters(tables)
+    out_of_grid = np.zeros(3)
+
+    kernel(commands,
+           float(delta_time),
+           np.array(arm.angles, dtype=np.float64),
+           np.array(arm.velocities, dtype=np.float64),
+           arm_parameters(arm),
+           muscle_code,
+           muscle_parameters(muscle),
+           grids,
+           fa_table,
+           force_table,
+           out_of_grid,
+           trajectory['torque'],
+           trajectory['accelerations'],
+           trajectory['velocities'],
+           trajectory['angles'])
+
+    for axis in np.flatnonzero(out_of_grid):
+        tables.warn_out_of_grid(axis)
+
+    if num_steps > 0:
+        arm.angles = trajectory['angles'][-1].copy()
+        arm.velocities = trajectory['velocities'][-1].copy()
+
+    return trajectory
+
+
+def numpy_rollout(arm, muscle, commands, delta_time):
+    "Reference rollout based on the MuscleModel and ArmModel classes."
+    num_steps = commands.shape[0]
+    trajectory = {'time': np.arange(1, num_steps + 1) * float(delta_time),
+                  'commands': commands,
+                  'torque': np.empty([num_steps, 2]),
+                  'accelerations': np.empty([num_steps, 2]),
+                  'velocities': np.empty([num_steps, 2]),
+                  'angles': np.empty([num_steps, 2])}
+
+    for step in range(num_steps):
+        torque = muscle.compute_torque(arm.angles, arm.velocities,
+                                       commands[step], record=False)
+        accelerations = arm.compute_acceleration(torque, delta_time,
+                                                 record=False)
+
+        trajectory['torque'][step] = torque
+        trajectory['accelerations'][step] = accelerations
+        trajectory['velocities'][step] = arm.velocities
+        trajectory['angles'][step] = arm.angles
+
+    return trajectory
+
+
+def arm_parameters(arm):
+    """Pack the arm parameters into a float array :
+    f1, f2, f3, friction (4), gravity (5), bounds (4), flags (3)."""
+    constants = arm.constants()
+    parameters = np.zeros(19)
+
+    parameters[0:3] = constants['f1'], constants['f2'], constants['f3']
+
+    if arm.friction:
+        parameters[3:7] = arm.friction_matrix.flatten()
+        parameters[16] = 1.
+
+    if arm.gravity:
+        parameters[7:12] = (constants['g1'], constants['g2'], constants['g3'],
+                            arm.upperarm_length, arm.forearm_cog)
+        parameters[17] = 1.
+
+    parameters[12:16] = (arm.angle_constraints[0]['min'],
+                         arm.angle_constraints[0]['max'],
+                         arm.angle_constraints[1]['min'],
+                         arm.angle_constraints[1]['max'])
+    if not arm.unbounded:
+        parameters[18] = 1.
+
+    return parameters
+
+
+def muscle_parameters(muscle):
+    """Pack the muscle parameters into a (6, 9) float array (one row per
+    muscle) : moment arms (2), lm0, k0, k1, b0, b1, lr0, lr1."""
+    parameters = np.zeros([6, 9])
+
+    if muscle.name == 'Li':
+        parameters[:, 0:2] = muscle.moment_arm(None)
+        parameters[:, 2] = muscle.lm0
+    elif muscle.name != 'Fake':
+        parameters[:, 0:2] = muscle.A
+        parameters[:, 2] = muscle.lm0
+        parameters[:, 3] = muscle.k0
+        parameters[:, 4] = muscle.k1
+        parameters[:, 5] = muscle.b0
+        parameters[:, 6] = muscle.b1
+        parameters[:, 7] = muscle.lr0
+        parameters[:, 8] = muscle.lr1
+
+    return parameters
+
+def table_parameters(tables):
+    """Pack the lookup tables of a Li muscle model (or None) :
+    - the muscle length, muscle velocity and activation grids, as a (3, 3)
+      float array (start, number of points - 1, (number of points - 1) /
+      (stop - start) for each grid),
+    - the padded values of the fa and force tables (see
+      pyarm.model.muscle.lookup_table.Table), as flat arrays."""
+    grids = np.zeros([3, 3])
+    if tables is None:
+        return grids, np.zeros(0), np.zeros(0)
+
+    for axis, (start, stop, num) in enumerate(tables.grids()):
+        grids[axis] = start, num - 1, (num - 1) / (stop - start)
+
+    return grids, tables.fa.flat, tables.force.flat
+
+# KERNEL ######################################################################
+
+def rollout_kernel(commands, delta_time, angles, velocities, arm_parameters,
+                   muscle_code, muscle_parameters, grids, fa_table,
+                   force_table, out_of_grid, torque_out, accelerations_out,
+                   velocities_out, angles_out):
+    """Run the rollout and write each step into the *_out arrays.
+
+    out_of_grid[axis] is set to 1 if the values of a lookup table grid (see
+    table_parameters()) were clamped to its bounds."""
+    f1, f2, f3 = arm_parameters[0], arm_parameters[1], arm_parameters[2]
+    friction = arm_parameters[16] != 0.
+    gravity = arm_parameters[17] != 0.
+    bounded = arm_parameters[18] != 0.
+    min0, max0 = arm_parameters[12], arm_parameters[13]
+    min1, max1 = arm_parameters[14], arm_parameters[15]
+
+    q0, q1 = angles[0], angles[1]
+    w0, w1 = velocities[0], velocities[1]
+
+    for step in range(commands.shape[0]):
+        command = commands[step]
+
+        # Muscle torque
+        t0 = 0.
+        t1 = 0.
+        if muscle_code == FAKE:
+            if command.shape[0] > 2:
+                t0 = command[0] - command[1]
+                t1 = command[2] - command[3]
+            else:
+                t0 = command[0]
+                t1 = command[1]
+        else:
+            for i in range(6):
+                u = max(min(command[i], 1.), 0.)
+                a0 = muscle_parameters[i, 0]
+                a1 = muscle_parameters[i, 1]
+
+                ml = muscle_parameters[i, 2] - (a0 * q0 + a1 * q1)
+                mv = -(a0 * w0 + a1 * w1)
+
+                if muscle_code == KELVIN_VOIGT:
+                    k0, k1 = muscle_parameters[i, 3], muscle_parameters[i, 4]
+                    b0, b1 = muscle_parameters[i, 5], muscle_parameters[i, 6]
+                    lr0, lr1 = muscle_parameters[i, 7], muscle_parameters[i, 8]
+                    tension = (k0 + k1 * u) * (ml - (lr0 + lr1 * u)) \
+                              + (b0 + b1 * u) * mv
+                elif muscle_code == LI:
+                    # (see pyarm.model.muscle.weiwei_muscle_model)
+                    nf = NF0 + NF1 * (1. / ml - 1.)
+                    fa = 1. - math.exp(-(u / (FA_SCALE * nf)) ** nf)
+                    fl = math.exp(-abs((ml ** FL_POWER - 1.) / FL_WIDTH)
+                                  ** FL_SHAPE)
+                    if mv <= 0.:
+                        fv = (FV_SHORTENING - mv) \
+                             / (FV_SHORTENING + mv * (FV_D0 + FV_D1 * ml))
+                    else:
+                        fv = (FV_LENGTHENING
+                              + (FV_N0 - FV_N1 * ml + FV_N2 * ml * ml) * mv) \
+                             / (FV_LENGTHENING + mv)
+                    fe = -FE_SCALE * math.exp(FE_OFFSET - FE_SLOPE * ml)
+                    tension = fa * (fe + fl * fv)
+                else:
+                    # Bilinear interpolation of the tables, clamped to the
+                    # grids (see pyarm.model.muscle.lookup_table)
+                    x_ml = (ml - grids[0, 0]) * grids[0, 2]
+                    x_mv = (mv - grids[1, 0]) * grids[1, 2]
+                    x_u = (u - grids[2, 0]) * grids[2, 2]
+
+                    if not (0. <= x_ml <= grids[0, 1]):
+                        out_of_grid[0] = 1.
+                        x_ml = min(max(x_ml, 0.), grids[0, 1])
+                    if not (0. <= x_mv <= grids[1, 1]):
+                        out_of_grid[1] = 1.
+                        x_mv = min(max(x_mv, 0.), grids[1, 1])
+                    if not (0. <= x_u <= grids[2, 1]):
+                        out_of_grid[2] = 1.
+                        x_u = min(max(x_u, 0.), grids[2, 1])
+
+                    i_ml = min(int(x_ml), int(grids[0, 1]) - 1)
+                    i_mv = min(int(x_mv), int(grids[1, 1]) - 1)
+                    i_u = min(int(x_u), int(grids[2, 1]) - 1)
+                    x_ml -= i_ml
+                    x_mv -= i_mv
+                    x_u -= i_u
+
+                    # The tables are padded with one point on each side
+                    stride = int(grids[2, 1]) + 3
+                    k = (i_ml + 1) * stride + i_u + 1
+                    v0 = fa_table[k] + (fa_table[k + 1] - fa_table[k]) * x_u
+                    v1 = fa_table[k + stride] \
+                         + (fa_table[k + stride + 1] - fa_table[k + stride]) \
+                         * x_u
+                    fa = v0 + (v1 - v0) * x_ml
+
+                    stride = int(grids[1, 1]) + 3
+                    k = (i_ml + 1) * stride + i_mv + 1
+                    v0 = force_table[k] \
+                         + (force_table[k + 1] - force_table[k]) * x_mv
+                    v1 = force_table[k + stride] \
+                         + (force_table[k + stride + 1]
+                            - force_table[k + stride]) * x_mv
+                    tension = fa * (v0 + (v1 - v0) * x_ml)
+
+                t0 += a0 * tension
+                t1 += a1 * tension
+
+        # Centripedal and coriolis forces
+        sin_elbow = math.sin(q1)
+        c0 = -w1 * (2. * w0 + w1) * f2 * sin_elbow
+        c1 = w0 * w0 * f2 * sin_elbow
+
+        # Joint friction
+        b0 = 0.
+        b1 = 0.
+        if friction:
+            b0 = arm_parameters[3] * w0 + arm_parameters[4] * w1
+            b1 = arm_parameters[5] * w0 + arm_parameters[6] * w1
+
+        # Gravity
+        g0 = 0.
+        g1 = 0.
+        if gravity:
+            cos_shoulder = math.cos(q0)
+            cos_sum = math.cos(q0 + q1)
+            g0 = arm_parameters[7] * cos_shoulder \
+                 + arm_parameters[8] * (arm_parameters[10] * cos_shoulder \
+                                        + arm_parameters[11] * cos_sum)
+            g1 = arm_parameters[9] * cos_sum
+
+        # Inertia matrix
+        f2_cos = f2 * math.cos(q1)
+        m11 = f1 + 2. * f2_cos
+        m12 = f3 + f2_cos
+        m22 = f3
+        det = m11 * m22 - m12 * m12
+
+        # Angular acceleration and forward kinematics
+        y0 = t0 - c0 - b0 - g0
+        y1 = t1 - c1 - b1 - g1
+
+        a0 = (m22 * y0 - m12 * y1) / det
+        a1 = (m11 * y1 - m12 * y0) / det
+
+        v0 = w0 + a0 * delta_time
+        v1 = w1 + a1 * delta_time
+        p0 = q0 + v0 * delta_time
+        p1 = q1 + v1 * delta_time
+
+        if bounded:
+            collision0 = not (min0 < p0 and p0 < max0)
+            collision1 = not (min1 < p1 and p1 < max1)
+
+            if collision0 or collision1:
+                # The normal force cancels (torque - C - B - G)
+                if collision0:
+                    y0 = y0 + (-t0 + c0 + b0 + g0)
+                if collision1:
+                    y1 = y1 + (-t1 + c1 + b1 + g1)
+
+                a0 = (m22 * y0 - m12 * y1) / det
+                a1 = (m11 * y1 - m12 * y0) / det
+
+                p0 = q0 + (w0 + a0 * delta_time) * delta_time
+                p1 = q1 + (w1 + a1 * delta_time) * delta_time
+                v0 = 0. if collision0 else w0 + a0 * delta_time
+                v1 = 0. if collision1 else w1 + a1 * delta_time
+
+            p0 = min(max(p0, min0), max0)
+            p1 = min(max(p1, min1), max1)
+
+        q0, q1 = p0, p1
+        w0, w1 = v0, v1
+
+        torque_out[step, 0] = t0
+        torque_out[step, 1] = t1
+        accelerations_out[step, 0] = a0
+        accelerations_out[step, 1] = a1
+        velocities_out[step, 0] = w0
+        velocities_out[step, 1] = w1
+        angles_out[step, 0] = q0
+        angles_out[step, 1] = q1
+
+
+_compiled = None
+
+def _compiled_kernel():
+    "Compile the kernel on first use (Numba)."
+    global _compiled
+    if _compiled is None:
+        _compiled = numba.njit(cache=True)(rollout_kernel)
+    return _compiled
@@ -22,5 +22,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-__all__ = ['finite_difference_method']
+# All integrators provide the same interface :
+#
+#   name
+#       the name of the integration method
+#
+#   step(acceleration_function, velocity_0, angle_0, delta_time,
+#        acceleration_0=None)
+#       return the velocity and the angle after delta_time seconds;
+#       acceleration_function(velocity, angle) returns the acceleration for a
+#       given state and acceleration_0 (if given) is the acceleration at the
+#       initial state.
+#
+# The computations are elementwise: states can be (2,) or (N, 2) arrays.
+
+__all__ = ['finite_difference_method',
+           'runge_kutta_4',
+           'runge_kutta_45',
+           'velocity_verlet']
 
@@ -2,11 +2,21 @@
 
 # Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
 
-import math
-import numpy as np
-
 name = 'Finite difference method'
 
+def step(acceleration_function, velocity_0, angle_0, delta_time,
+         acceleration_0=None):
+    """Compute the velocity and the angle after delta_time seconds
+    (semi-implicit Euler method).
+
+    acceleration_function(velocity, angle) returns the acceleration for the
+    given state. acceleration_0 is the acceleration at the initial state; it
+    is computed with acceleration_function if it is None."""
+    if acceleration_0 is None:
+        acceleration_0 = acceleration_function(velocity_0, angle_0)
+
+    return forward_kinematics(acceleration_0, velocity_0, angle_0, delta_time)
+
 def forward_kinematics(acceleration, velocity_0, angle_0, delta_time):
     "Compute the forward kinematics with finite difference method."
 
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+name = 'Runge-Kutta 4'
+
+def step(acceleration_function, velocity_0, angle_0, delta_time,
+         acceleration_0=None):
+    """Compute the velocity and the angle after delta_time seconds
+    (classic fourth order Runge-Kutta method).
+
+    acceleration_function(velocity, angle) returns the acceleration for the
+    given state. acceleration_0 is the acceleration at the initial state; it
+    is computed with acceleration_function if it is None."""
+    if acceleration_0 is None:
+        acceleration_0 = acceleration_function(velocity_0, angle_0)
+
+    half_time = 0.5 * delta_time
+
+    # The derivative of the angle is the velocity
+    velocity_k1 = velocity_0
+    acceleration_k1 = acceleration_0
+
+    velocity_k2 = velocity_0 + acceleration_k1 * half_time
+    acceleration_k2 = acceleration_function(velocity_k2,
+                                            angle_0 + velocity_k1 * half_time)
+
+    velocity_k3 = velocity_0 + acceleration_k2 * half_time
+    acceleration_k3 = acceleration_function(velocity_k3,
+                                            angle_0 + velocity_k2 * half_time)
+
+    velocity_k4 = velocity_0 + acceleration_k3 * delta_time
+    acceleration_k4 = acceleration_function(velocity_k4,
+                                            angle_0 + velocity_k3 * delta_time)
+
+    velocity_1 = velocity_0 + (acceleration_k1 + 2. * acceleration_k2 \
+                               + 2. * acceleration_k3 + acceleration_k4) \
+                              * delta_time / 6.
+    angle_1 = angle_0 + (velocity_k1 + 2. * velocity_k2 \
+                         + 2. * velocity_k3 + velocity_k4) \
+                        * delta_time / 6.
+
+    return velocity_1, angle_1
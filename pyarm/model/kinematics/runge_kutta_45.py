@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import bisect
+import numpy as np
+
+name = 'Runge-Kutta 45 (adaptive)'
+
+RTOL = 1e-6               # Relative tolerance
+ATOL = 1e-8               # Absolute tolerance
+MAX_SUBSTEPS = 10000      # Maximum number of substeps per integrate() call
+
+_step_size = None         # Step size proposed by the last step() call
+
+# Dormand-Prince coefficients ##################################################
+
+A = ((),
+     (1./5.,),
+     (3./40., 9./40.),
+     (44./45., -56./15., 32./9.),
+     (19372./6561., -25360./2187., 64448./6561., -212./729.),
+     (9017./3168., -355./33., 46732./5247., 49./176., -5103./18656.),
+     (35./384., 0., 500./1113., 125./192., -2187./6784., 11./84.))
+
+# Fifth order solution
+B = (35./384., 0., 500./1113., 125./192., -2187./6784., 11./84., 0.)
+
+# Difference between the fifth and the fourth order solutions
+E = (-71./57600., 0., 71./16695., -71./1920., 17253./339200., -22./525.,
+     1./40.)
+
+# Dense output (fourth order continuous extension)
+P = ((1., -8048581381./2820520608., 8663915743./2820520608.,
+      -12715105075./11282082432.),
+     (0., 0., 0., 0.),
+     (0., 131558114200./32700410799., -68118460800./10900136933.,
+      87487479700./32700410799.),
+     (0., -1754552775./470086768., 14199869525./1410260304.,
+      -10690763975./1880347072.),
+     (0., 127303824393./49829197408., -318862633887./49829197408.,
+      701980252875./199316789632.),
+     (0., -282668133./205662961., 2019193451./616988883.,
+      -1453857185./822651844.),
+     (0., 40617522./29380423., -110615467./29380423.,
+      69997945./29380423.))
+
+###############################################################################
+
+def step(acceleration_function, velocity_0, angle_0, delta_time,
+         acceleration_0=None):
+    """Compute the velocity and the angle after delta_time seconds
+    (Dormand-Prince method with adaptive step size).
+
+    delta_time is split into as many substeps as needed to satisfy the RTOL
+    and ATOL tolerances. The first substep size is the one proposed at the
+    end of the previous call (it is only a first guess, shared by all the
+    callers).
+
+    acceleration_function(velocity, angle) returns the acceleration for the
+    given state. acceleration_0 is the acceleration at the initial state; it
+    is computed with acceleration_function if it is None."""
+    global _step_size
+    solution = integrate(acceleration_function, velocity_0, angle_0,
+                         delta_time, acceleration_0, first_step=_step_size)
+    _step_size = solution.step_size
+    return solution.velocity, solution.angle
+
+def integrate(acceleration_function, velocity_0, angle_0, duration,
+              acceleration_0=None, rtol=None, atol=None, first_step=None):
+    """Integrate the motion over duration seconds with adaptive step size.
+
+    Return a Solution object: the final state is in its 'velocity' and
+    'angle' attributes, the step size proposed for a next integration in
+    its 'step_size' attribute and the state at any time in [0, duration] is
+    computed by calling it (dense output)."""
+    if rtol is None:
+        rtol = RTOL
+    if atol is None:
+        atol = ATOL
+    if first_step is None:
+        first_step = duration
+
+    if acceleration_0 is None:
+        acceleration_0 = acceleration_function(velocity_0, angle_0)
+
+    solution = Solution(velocity_0, angle_0)
+
+    velocity, angle, acceleration = velocity_0, angle_0, acceleration_0
+    time = 0.
+    step_size = first_step
+
+    for num_substeps in range(MAX_SUBSTEPS):
+        # The last substep is shortened to end at 'duration'
+        remaining = duration - time
+        last_step = (step_size >= remaining)
+        trial_size = remaining if last_step else step_size
+
+        velocities, accelerations, angle_1, error = substep(
+                                                    acceleration_function,
+                                                    velocity,
+                                                    angle,
+                                                    acceleration,
+                                                    trial_size)
+        velocity_1 = velocities[6]
+
+        # Error norm (max norm, scaled by the tolerances)
+        velocity_scale = atol + rtol * np.maximum(np.abs(velocity),
+                                                  np.abs(velocity_1))
+        angle_scale = atol + rtol * np.maximum(np.abs(angle),
+                                               np.abs(angle_1))
+        error_norm = max(np.max(np.abs(error[0]) / velocity_scale),
+                         np.max(np.abs(error[1]) / angle_scale))
+
+        if error_norm <= 1.:
+            # Accept the substep
+            solution.add_segment(time, trial_size, velocity, angle,
+                                 velocities, accelerations)
+
+            if error_norm == 0.:
+                factor = 5.
+            else:
+                factor = min(5., 0.9 * error_norm ** -0.2)
+
+            if last_step:
+                solution.velocity, solution.angle = velocity_1, angle_1
+                # A shortened substep does not reduce the next step size
+                solution.step_size = max(step_size, trial_size * factor)
+                return solution
+
+            time += trial_size
+            velocity, angle = velocity_1, angle_1
+            acceleration = accelerations[6]    # First Same As Last
+        else:
+            # Reject the substep
+            factor = max(0.2, 0.9 * error_norm ** -0.2)
+
+        step_size = trial_size * factor
+
+    raise RuntimeError("RK45 : more than %d substeps" % MAX_SUBSTEPS)
+
+def substep(acceleration_function, velocity_0, angle_0, acceleration_0,
+            step_size):
+    """Compute one Dormand-Prince step.
+
+    Return the stage velocities (derivatives of the angle), the stage
+    accelerations (derivatives of the velocity), the new angle and the
+    (velocity, angle) error estimate. The last stage is the new state: its
+    velocity is the new velocity and its acceleration is the acceleration at
+    the new state."""
+    velocities = [velocity_0]
+    accelerations = [acceleration_0]
+
+    for i in range(1, 7):
+        velocity = velocity_0 + step_size * sum(a * k for a, k
+                                                in zip(A[i], accelerations))
+        angle = angle_0 + step_size * sum(a * k for a, k
+                                          in zip(A[i], velocities))
+        velocities.append(velocity)
+        accelerations.append(acceleration_function(velocity, angle))
+
+    error = (step_size * sum(e * k for e, k in zip(E, accelerations)),
+             step_size * sum(e * k for e, k in zip(E, velocities)))
+
+    return velocities, accelerations, angle, error
+
+
+class Solution:
+    "Dense output of integrate()."
+
+    velocity = None           # Final velocity
+    angle = None              # Final angle
+    step_size = None          # Step size proposed for a next integration
+
+    def __init__(self, velocity_0, angle_0):
+        self.velocity = velocity_0
+        self.angle = angle_0
+        self.times = []           # Start time of each substep
+        self._segments = []
+
+    def add_segment(self, time, step_size, velocity, angle, velocities,
+                    accelerations):
+        "Store an accepted substep (initial state and stages)."
+        self.times.append(time)
+        self._segments.append((step_size, velocity, angle, velocities,
+                               accelerations))
+
+    def __call__(self, time):
+        "Return the velocity and the angle at the given time."
+        index = max(bisect.bisect_right(self.times, time) - 1, 0)
+        step_size, velocity, angle, velocities, accelerations = \
+                                                        self._segments[index]
+
+        x = (time - self.times[index]) / step_size
+        weights = [sum(p * x ** (i + 1) for i, p in enumerate(row))
+                   for row in P]
+
+        return (velocity + step_size * sum(w * k for w, k
+                                           in zip(weights, accelerations)),
+                angle + step_size * sum(w * k for w, k
+                                        in zip(weights, velocities)))
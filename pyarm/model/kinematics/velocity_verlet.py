@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+name = 'Velocity Verlet'
+
+def step(acceleration_function, velocity_0, angle_0, delta_time,
+         acceleration_0=None):
+    """Compute the velocity and the angle after delta_time seconds
+    (velocity Verlet method, second order).
+
+    The acceleration at the end of the step depends on the velocity: it is
+    evaluated with the velocity predicted by an explicit Euler step.
+
+    acceleration_function(velocity, angle) returns the acceleration for the
+    given state. acceleration_0 is the acceleration at the initial state; it
+    is computed with acceleration_function if it is None."""
+    if acceleration_0 is None:
+        acceleration_0 = acceleration_function(velocity_0, angle_0)
+
+    # Joint angle (rad) at time_n+1
+    angle_1 = angle_0 + velocity_0 * delta_time \
+              + 0.5 * acceleration_0 * delta_time**2
+
+    # Angular velocity (rad/s) at time_n+1
+    predicted_velocity_1 = velocity_0 + acceleration_0 * delta_time
+    acceleration_1 = acceleration_function(predicted_velocity_1, angle_1)
+    velocity_1 = velocity_0 + 0.5 * (acceleration_0 + acceleration_1) \
+                 * delta_time
+
+    return velocity_1, angle_1
@@ -24,6 +24,9 @@
 
 __all__ = ['fake_muscle_model',
            'kambara_muscle_model',
+           'kelvin_voigt_muscle_model',
+           'lookup_table',
            'mitrovic_muscle_model',
+           'moment_arm',
            'weiwei_muscle_model']
 
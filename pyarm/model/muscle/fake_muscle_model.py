@@ -14,26 +14,32 @@ class MuscleModel:
 
     ###########################################################################
 
-    def __init__(self):
+    def __init__(self, recorder=None):
+        self.recorder = fig.RECORDER if recorder is None else recorder
+
         # Init datas to plot
-        fig.subfig('command',
-                   title='Command',
-                   xlabel='time (s)',
-                   ylabel='Command',
-                   ylim=[-0.1, 1.1])
-                   #legend=('shoulder +', 'shoulder -',
-                   #        'elbow +', 'elbow -'))
+        self.recorder.subfig('command',
+                             title='Command',
+                             xlabel='time (s)',
+                             ylabel='Command',
+                             ylim=[-0.1, 1.1])
+                             #legend=('shoulder +', 'shoulder -',
+                             #        'elbow +', 'elbow -'))
+
+    def compute_torque(self, angles, velocities, command, record=True):
+        """Compute the torque.
 
-    def compute_torque(self, angles, velocities, command):
-        "Compute the torque"
+        The command is appended to the recorder if 'record' is True."""
 
         torque = np.zeros(2)
         if len(command) > 2:
             torque[0] = (command[0] - command[1])
             torque[1] = (command[2] - command[3])
-            fig.append('command', command[0:4])
+            if record:
+                self.recorder.append('command', command[0:4])
         else:
             torque = np.array(command)
-            fig.append('command', command[0:2])
+            if record:
+                self.recorder.append('command', command[0:2])
 
         return torque
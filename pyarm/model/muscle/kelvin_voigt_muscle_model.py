@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import numpy as np
+from pyarm import fig
+
+# Muscle parameters the torque coefficients depend on
+PARAMETERS = ('A', 'lm0', 'k0', 'k1', 'b0', 'b1', 'lr0', 'lr1')
+
+# Recorded intermediate values (see intermediate_values())
+INTERMEDIATE_VALUES = ('stiffness', 'viscosity', 'rest length', 'stretching',
+                       'elastic force', 'viscosity force', 'tension',
+                       'muscle length', 'muscle velocity')
+
+class KelvinVoigtMuscleModel:
+    """Abstract linear (Kelvin-Voigt) muscle model.
+
+    The tension of each muscle is
+
+        T = (k0 + k1 u) (lm - (lr0 + lr1 u)) + (b0 + b1 u) vm
+
+    with the muscle length lm = lm0 - A q and the muscle velocity vm = -A w.
+    For a given state (q, w), T is a quadratic function of the filtered
+    command u :
+
+        T = c0 + (c1 + c2 u) u
+
+    where c0 and c1 are affine functions of the state and c2 is constant.
+    The coefficients of these functions are computed once (see
+    coefficients()) so that the torque A^T T costs two small matrix
+    products. The intermediate values (stiffness, stretching, ...) are only
+    computed when they are recorded.
+    """
+
+    # CONSTANTS ###############################################################
+
+    name = 'Abstract'
+
+    muscles = ('shoulder flexor', 'shoulder extensor',
+               'elbow flexor', 'elbow extensor',
+               'double-joints flexor', 'double-joints extensor')
+
+    # Bound values ##############################
+
+    umin,     umax     = 0, 1
+
+    # Muscle parameters #########################
+
+    lm0 = None      # Muscle length when joint angles = 0 rad (m)
+    k0 = None       # Intrinsic elasticity (for u = 0) (N/m)
+    k1 = None       # Variation rate of elasticity (N/m)
+    b0 = None       # Intrinsic viscosity (for u = 0) (N.s/m)
+    b1 = None       # Variation rate of viscosity (N.s/m)
+    lr0 = None      # Intrinsic rest length (for u = 0) (m)
+    lr1 = None      # Variation rate of rest length (m)
+    A = None        # Moment arm (constant matrix) (m)
+
+    moment_arm_model = None      # Posture dependent moment arms (or None)
+
+    _coefficients = None         # Cache of the torque coefficients
+
+    ###########################################################################
+
+    def __init__(self, recorder=None):
+        self.recorder = fig.RECORDER if recorder is None else recorder
+
+        # Init datas to plot
+        self.recorder.subfig('command',
+                             title='Command',
+                             xlabel='time (s)',
+                             ylabel='Command',
+                             ylim=[-0.1, 1.1],
+                             legend=self.muscles)
+        self.recorder.subfig('filtered command',
+                             title='Filtered command',
+                             xlabel='time (s)',
+                             ylabel='command',
+                             legend=self.muscles)
+        self.recorder.subfig('stiffness',
+                             title='Muscle stiffness',
+                             xlabel='time (s)',
+                             ylabel='Muscle stiffness (N/m)',
+                             legend=self.muscles)
+        self.recorder.subfig('viscosity',
+                             title='Muscle viscosity',
+                             xlabel='time (s)',
+                             ylabel='Muscle viscosity (N.s/m)',
+                             legend=self.muscles)
+        self.recorder.subfig('rest length',
+                             title='Rest length',
+                             xlabel='time (s)',
+                             ylabel='Rest length (m)',
+                             legend=self.muscles)
+        self.recorder.subfig('stretching',
+                             title='Stretching',
+                             xlabel='time (s)',
+                             ylabel='Stretching (m)',
+                             legend=self.muscles)
+        self.recorder.subfig('elastic force',
+                             title='Elastic force',
+                             xlabel='time (s)',
+                             ylabel='Elastic force (N)',
+                             legend=self.muscles)
+        self.recorder.subfig('viscosity force',
+                             title='Viscosity force',
+                             xlabel='time (s)',
+                             ylabel='Viscosity force (N)',
+                             legend=self.muscles)
+        self.recorder.subfig('tension',
+                             title='Tension',
+                             xlabel='time (s)',
+                             ylabel='Tension (N)',
+                             legend=self.muscles)
+        self.recorder.subfig('muscle length',
+                             title='Muscle length',
+                             xlabel='time (s)',
+                             ylabel='Muscle length (m)',
+                             legend=self.muscles)
+        self.recorder.subfig('muscle velocity',
+                             title='Muscle velocity',
+                             xlabel='time (s)',
+                             ylabel='Muscle velocity (m/s)',
+                             legend=self.muscles)
+
+    def __setattr__(self, name, value):
+        # Changing a muscle parameter invalidates the torque coefficients
+        if name in PARAMETERS:
+            self.__dict__['_coefficients'] = None
+        self.__dict__[name] = value
+
+
+    def compute_torque(self, angles, velocities, command, record=True):
+        """Compute the torque.
+
+        angles and velocities are (2,) arrays and command a (6,) array, or
+        (N, 2) and (N, 6) arrays to compute the torque of N states at once
+        (the torque is then a (N, 2) array).
+
+        Intermediate values are appended to the recorder if 'record' is True
+        (single state only)."""
+
+        filtered_command = self.filter_command(command)
+
+        values = None
+        if self.moment_arm_model is None:
+            torque = self.fast_torque(angles, velocities, filtered_command)
+        else:
+            values = self.intermediate_values(angles, velocities,
+                                              filtered_command)
+            torque = self.torque(values['tension'], self.moment_arm(angles))
+
+        if record and np.ndim(torque) == 1:
+            self.recorder.append('command', command)
+            self.recorder.append('filtered command', filtered_command)
+
+            # The intermediate values are only computed if one of their
+            # channels is enabled
+            names = [name for name in INTERMEDIATE_VALUES
+                     if self.recorder.enabled(name)]
+            if names and values is None:
+                values = self.intermediate_values(angles, velocities,
+                                                  filtered_command)
+            for name in names:
+                self.recorder.append(name, values[name])
+
+        return torque
+
+
+    def coefficients(self):
+        """Return the torque coefficients (a dict).
+
+        They are computed once and cached. The cache is cleared when one of
+        the muscle parameters is set on the instance.
+
+        - P : (5, 12) array, [c0 | c1] = [q0, q1, w0, w1, 1] P
+        - c2 : (6,) array
+        """
+        if self._coefficients is None:
+            A0, A1 = self.A[:, 0], self.A[:, 1]
+            rest = self.lm0 - self.lr0      # lm - lr0 when q = 0
+
+            P = np.empty([5, 12])
+
+            # c0 = k0 (lm - lr0) + b0 vm
+            P[:, 0:6] = (-self.k0 * A0, -self.k0 * A1,
+                         -self.b0 * A0, -self.b0 * A1,
+                         self.k0 * rest)
+
+            # c1 = k1 (lm - lr0) - k0 lr1 + b1 vm
+            P[:, 6:12] = (-self.k1 * A0, -self.k1 * A1,
+                          -self.b1 * A0, -self.b1 * A1,
+                          self.k1 * rest - self.k0 * self.lr1)
+
+            self._coefficients = {'P': P, 'c2': -self.k1 * self.lr1}
+
+        return self._coefficients
+
+
+    def fast_torque(self, angles, velocities, filtered_command):
+        "Compute the total torque (N.m) with the torque coefficients."
+        coefficients = self.coefficients()
+        P = coefficients['P']
+
+        # The matrix products are written with a fixed evaluation order
+        # (see pyarm.model.bundle)
+        state = np.concatenate((angles, velocities), axis=-1)
+        c = (state[..., np.newaxis] * P[0:4]).sum(axis=-2) + P[4]
+
+        u = filtered_command
+        tension = c[..., 0:6] + (c[..., 6:12] + coefficients['c2'] * u) * u
+
+        return (self.A * tension[..., np.newaxis]).sum(axis=-2)
+
+
+    def intermediate_values(self, angles, velocities, filtered_command):
+        """Compute the intermediate values of the muscle model (a dict) for
+        one state (or N states if the moment arms depend on the posture)."""
+        values = {}
+
+        values['muscle length'] = self.muscle_length(angles)
+        values['muscle velocity'] = self.muscle_velocity(velocities, angles)
+
+        values['stiffness'] = self.stiffness(filtered_command)
+        values['viscosity'] = self.viscosity(filtered_command)
+        values['rest length'] = self.rest_length(filtered_command)
+
+        values['stretching'] = self.stretching(values['rest length'],
+                                               values['muscle length'])
+        values['elastic force'] = self.elastic_force(values['stiffness'],
+                                                     values['stretching'])
+        values['viscosity force'] = self.viscosity_force(
+                                                    values['viscosity'],
+                                                    values['muscle velocity'])
+        values['tension'] = self.tension(values['elastic force'],
+                                         values['viscosity force'])
+        return values
+
+
+    def filter_command(self, command):
+        """Filter commands.
+
+        Return a 6 elements array (or a (N, 6) array) with value taken in
+        [0, 1]"""
+        command = np.asarray(command, dtype=np.float64)[..., 0:6]
+        return np.minimum(np.maximum(command, 0.), 1.)
+
+    def moment_arm(self, angles):
+        """Moment arm of each muscle (m) (the constant A 6x2 array, or a
+        (N, 6, 2) array for N states if the moment arms depend on the
+        posture)."""
+        if self.moment_arm_model is None:
+            return self.A
+        return self.moment_arm_model(angles)
+
+    def muscle_length(self, angles):
+        "Compute muscle length (m) (the integral of the moment arms)."
+        if self.moment_arm_model is not None:
+            return self.lm0 - self.moment_arm_model.excursion(angles)
+        return self.lm0 - (self.A[:, 0] * angles[0] + self.A[:, 1] * angles[1])
+
+    def muscle_velocity(self, velocities, angles=None):
+        "Compute muscle contraction velocity (muscle length derivative) (m/s)."
+        if self.moment_arm_model is not None:
+            velocities = np.asarray(velocities)[..., np.newaxis, :]
+            return - (self.moment_arm(angles) * velocities).sum(axis=-1)
+        return - (self.A[:, 0] * velocities[0] + self.A[:, 1] * velocities[1])
+
+    def stiffness(self, filtered_command):
+        "Compute muscle stiffness (N/m)."
+        return self.k0 + self.k1 * filtered_command
+
+    def viscosity(self, filtered_command):
+        "Compute muscle viscosity (N.s/m)."
+        return self.b0 + self.b1 * filtered_command
+
+    def rest_length(self, filtered_command):
+        "Compute muscle rest length (m)."
+        return self.lr0 + self.lr1 * filtered_command
+
+    def stretching(self, rest_length, muscle_length):
+        "Compute stretching (m)."
+        return muscle_length - rest_length
+
+    def elastic_force(self, stiffness, stretching):
+        "Compute elastic force (N)."
+        return stiffness * stretching
+
+    def viscosity_force(self, viscosity, muscle_velocity):
+        "Compute viscosity force (N)."
+        return viscosity * muscle_velocity
+
+    def tension(self, elastic_force, viscosity_force):
+        "Compute muscle tension (cf. Kelvin-Voight model)."
+        return elastic_force + viscosity_force
+
+    def torque(self, tension, moment_arm=None):
+        """Compute total torque (N.m) from the muscle tension (and the
+        moment arms, A if None)."""
+        if moment_arm is None:
+            return np.dot(self.A.T, tension)
+        return (moment_arm * np.asarray(tension)[..., np.newaxis]).sum(axis=-2)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Posture dependent moment arm models.
+
+The moment arm r_ij of the muscle i at the joint j only depends on the
+angle q_j of this joint (the muscle path around a joint does not depend on
+the other joint). The muscle length is the consistent integral of the moment
+arms (a muscle shortens when it flexes a joint) :
+
+    lm_i(q) = lm0_i - sum_j integral from 0 to q_j of r_ij(s) ds
+
+so that the muscle velocity is vm_i = -sum_j r_ij(q_j) w_j.
+
+Each model is a callable object with the following methods (angles is a
+(2,) array or a (N, 2) array) :
+- __call__(angles) : moment arms, (6, 2) or (N, 6, 2) array (m)
+- excursion(angles) : lm0 - lm, (6,) or (N, 6) array (m)
+- slope(angles) : derivative of the moment arms with respect to the angle
+  of their joint, (6, 2) or (N, 6, 2) array (m/rd)
+
+Usage :
+muscle.moment_arm_model = PostureTable(CosineMomentArm(muscle.A, phase))
+"""
+
+__all__ = ['PolynomialMomentArm', 'CosineMomentArm', 'PostureTable']
+
+import numpy as np
+from pyarm.model.muscle.lookup_table import locate, grid_points
+
+# Default angle grid of the posture tables: (start, stop, number of points)
+ANGLE_GRID = (-np.pi, np.pi, 721)
+
+class PolynomialMomentArm:
+    """Polynomial moment arms.
+
+    r_ij(q) = sum_k coefficients[i, j, k] q^k"""
+
+    def __init__(self, coefficients):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+
+        degree = self.coefficients.shape[-1]
+        self._integral = self.coefficients / np.arange(1, degree + 1)
+        self._derivative = self.coefficients[..., 1:] * np.arange(1, degree)
+
+    def __call__(self, angles):
+        return polynomial(self.coefficients, angles)
+
+    def excursion(self, angles):
+        angles = np.asarray(angles, dtype=np.float64)
+        q = angles[..., np.newaxis, :]
+        return (polynomial(self._integral, angles) * q).sum(axis=-1)
+
+    def slope(self, angles):
+        return polynomial(self._derivative, angles)
+
+
+def polynomial(coefficients, angles):
+    "Evaluate the (6, 2, K) polynomial coefficients (Horner's method)."
+    q = np.asarray(angles, dtype=np.float64)[..., np.newaxis, :]
+    value = np.zeros(q.shape[:-2] + coefficients.shape[:-1])
+    for k in range(coefficients.shape[-1] - 1, -1, -1):
+        value = value * q + coefficients[..., k]
+    return value
+
+
+class CosineMomentArm:
+    """Cosine moment arms (a muscle wrapping around a joint).
+
+    r_ij(q) = amplitude[i, j] cos(q - phase[i, j])
+
+    The moment arm is maximal when the joint angle is phase[i, j]."""
+
+    def __init__(self, amplitude, phase=0.):
+        self.amplitude = np.asarray(amplitude, dtype=np.float64)
+        self.phase = np.zeros(self.amplitude.shape) + phase
+
+    def __call__(self, angles):
+        q = np.asarray(angles, dtype=np.float64)[..., np.newaxis, :]
+        return self.amplitude * np.cos(q - self.phase)
+
+    def excursion(self, angles):
+        q = np.asarray(angles, dtype=np.float64)[..., np.newaxis, :]
+        return (self.amplitude * (np.sin(q - self.phase)
+                                  + np.sin(self.phase))).sum(axis=-1)
+
+    def slope(self, angles):
+        q = np.asarray(angles, dtype=np.float64)[..., np.newaxis, :]
+        return -self.amplitude * np.sin(q - self.phase)
+
+
+class PostureTable:
+    """Moment arms of a model tabulated on an angle grid.
+
+    The moment arms are linearly interpolated and the excursion is the
+    exact integral of the interpolated moment arms (a piecewise quadratic
+    function), so the muscle lengths and velocities stay consistent. Angles
+    out of the grid are clamped to its bounds."""
+
+    def __init__(self, model, grid=ANGLE_GRID):
+        self.grid = (float(grid[0]), float(grid[1]), int(grid[2]))
+        self.step = (self.grid[1] - self.grid[0]) / (self.grid[2] - 1)
+        self.model = model
+
+        # Both joints share the grid: column j of the table is the moment
+        # arm at joint j
+        q = grid_points(self.grid)
+        self.moment_arms = model(np.stack([q, q], axis=-1))    # (n, 6, 2)
+
+        # Integral of the interpolated moment arms from the start of the
+        # grid (trapezoidal rule)
+        r0, r1 = self.moment_arms[:-1], self.moment_arms[1:]
+        integrals = np.concatenate([np.zeros((1,) + r0.shape[1:]),
+                                    np.cumsum(0.5 * self.step * (r0 + r1),
+                                              axis=0)])
+
+        # One row per joint and per cell : moment arm at the start of the
+        # cell, moment arm variation and integral at the start of the cell
+        # ((2 (n - 1), 6, 3) array, a single lookup per call)
+        cells = np.stack([r0, r1 - r0, integrals[:-1]], axis=-1)
+        self._cells = np.concatenate([cells[:, :, 0], cells[:, :, 1]])
+        self._offsets = np.array([0, self.grid[2] - 1])
+
+        # Integrals from q = 0
+        self._cells[:, :, 2] -= np.repeat(self._integral(np.zeros(2)),
+                                          self.grid[2] - 1, axis=0)
+
+    def _lookup(self, angles):
+        """Return the cells (..., 2, 6, 3) of the angles and the position of
+        the angles in the cells (..., 2, 1)."""
+        if np.ndim(angles) == 1:
+            # One state : the cells are located with python floats (numpy
+            # calls on 2 elements arrays are dominated by their overhead)
+            start, stop, num = self.grid
+            indices, positions = [], []
+            for offset, angle in zip((0, num - 1), angles):
+                t = min(max((angle - start) / self.step, 0.), num - 1.)
+                index = min(int(t), num - 2)
+                indices.append(index + offset)
+                positions.append([t - index])
+            return self._cells[indices], np.array(positions)
+
+        index, f = locate(angles, self.grid)
+        return self._cells.take(index + self._offsets, axis=0), \
+               f[..., np.newaxis]
+
+    def _integral(self, angles):
+        "Integrals from q = 0 of the moment arms ((..., 2, 6) array)."
+        cells, f = self._lookup(angles)
+        return cells[..., 2] + self.step * f * (cells[..., 0]
+                                                + 0.5 * f * cells[..., 1])
+
+    def __call__(self, angles):
+        cells, f = self._lookup(angles)
+        return np.swapaxes(cells[..., 0] + cells[..., 1] * f, -1, -2)
+
+    def excursion(self, angles):
+        return self._integral(angles).sum(axis=-2)
+
+    def slope(self, angles):
+        cells, f = self._lookup(angles)
+        return np.swapaxes(cells[..., 1], -1, -2) / self.step
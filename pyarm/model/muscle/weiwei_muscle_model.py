@@ -5,6 +5,26 @@
 import numpy as np
 from pyarm import fig
 
+# Parameters of the tension functions of [1] (also used by the compiled
+# kernel of pyarm.model.jit and by pyarm.model.jacobian)
+
+NF0, NF1 = 2.11, 4.16           # nf = NF0 + NF1 (1 / ml - 1)
+FA_SCALE = 0.56                 # fa = 1 - exp(-(u / (FA_SCALE nf))^nf)
+
+# fl = exp(-|(ml^FL_POWER - 1) / FL_WIDTH|^FL_SHAPE)
+FL_POWER, FL_WIDTH, FL_SHAPE = 1.93, 1.03, 1.87
+
+# fv = (c + n mv) / (c + d mv) with
+# - shortening (mv <= 0) : c = FV_SHORTENING, n = -1,
+#   d = FV_D0 + FV_D1 ml
+# - lengthening (mv > 0) : c = FV_LENGTHENING,
+#   n = FV_N0 - FV_N1 ml + FV_N2 ml^2, d = 1
+FV_SHORTENING, FV_D0, FV_D1 = -5.72, 1.38, 2.09
+FV_LENGTHENING, FV_N0, FV_N1, FV_N2 = 0.62, 3.12, 4.21, 2.67
+
+# fe = -FE_SCALE exp(FE_OFFSET - FE_SLOPE ml)
+FE_SCALE, FE_OFFSET, FE_SLOPE = 0.02, 13.8, 18.7
+
 class MuscleModel:
     """Muscle model.
     
@@ -30,24 +50,47 @@ class MuscleModel:
     # Muscle length when the joint angle = 0 (m) # TODO
     lm0 = np.ones(6) * 0.4
 
+    # Moment arm of each muscle (m) (6x2) # TODO
+    MOMENT_ARM = np.array([[0.04, -0.04, 0.   ,  0.   , 0.028, -0.035],
+                           [0.  ,  0.  , 0.025, -0.025, 0.028, -0.035]]).T
+
+    # Posture dependent moment arms (see pyarm.model.muscle.moment_arm), the
+    # constant MOMENT_ARM array is used if None
+    moment_arm_model = None
+
+    # Lookup tables of fa and fe + fl * fv (see
+    # pyarm.model.muscle.lookup_table) used by muscle_tension() and
+    # pyarm.model.jit instead of the exact functions if not None (an
+    # approximation of the model)
+    tables = None
+
     ###########################################################################
 
-    def __init__(self):
+    def __init__(self, recorder=None):
+        self.recorder = fig.RECORDER if recorder is None else recorder
+
         # Init datas to plot
-        fig.subfig('command',
-                   title='Command',
-                   xlabel='time (s)',
-                   ylabel='Command',
-                   ylim=[-0.1, 1.1],
-                   legend=self.muscles)
-        fig.subfig('muscle length',
-                   title='Muscle length',
-                   xlabel='time (s)',
-                   ylabel='Muscle length (m)',
-                   legend=self.muscles)
-
-    def compute_torque(self, angles, velocities, command):
-        "Compute the torque"
+        self.recorder.subfig('command',
+                             title='Command',
+                             xlabel='time (s)',
+                             ylabel='Command',
+                             ylim=[-0.1, 1.1],
+                             legend=self.muscles)
+        self.recorder.subfig('muscle length',
+                             title='Muscle length',
+                             xlabel='time (s)',
+                             ylabel='Muscle length (m)',
+                             legend=self.muscles)
+
+    def compute_torque(self, angles, velocities, command, record=True):
+        """Compute the torque.
+
+        angles and velocities are (2,) arrays and command a (6,) array, or
+        (N, 2) and (N, 6) arrays to compute the torque of N states at once
+        (the torque is then a (N, 2) array).
+
+        Intermediate values are appended to the recorder if 'record' is True
+        (single state only)."""
 
         # Filter command array (6x1) (value taken in [0,1])
         filtered_command = self.filter_command(command)
@@ -70,10 +113,14 @@ class MuscleModel:
                                              muscle_activation)
 
         # Torque array (2x1)
-        torque = np.dot(moment_arm.T, muscle_tension)
+        if self.moment_arm_model is None:
+            torque = np.dot(muscle_tension, moment_arm)
+        else:
+            torque = (moment_arm * muscle_tension[..., np.newaxis]).sum(axis=-2)
 
-        fig.append('command', command)
-        fig.append('muscle length', muscle_length)
+        if record and np.ndim(torque) == 1:
+            self.recorder.append('command', command)
+            self.recorder.append('muscle length', muscle_length)
 
         return torque
 
@@ -81,74 +128,86 @@ class MuscleModel:
     def filter_command(self, command):
         """Filter commands.
 
-        Return a 6 elements array with value taken in [0, 1]"""
-        command = [max(min(float(s), 1.), 0.) for s in command]
-        return np.array(command[0:6])
+        Return a 6 elements array (or a (N, 6) array) with value taken in
+        [0, 1]"""
+        command = np.asarray(command, dtype=np.float64)[..., 0:6]
+        return np.minimum(np.maximum(command, 0.), 1.)
 
     def muscle_tension(self, ml, mv, ut):
         "Compute the tension of a muscle."
-        T = self.fa(ml, ut) * (self.fe(ml) + self.fl(ml) * self.fv(ml, mv))
+        if self.tables is not None:
+            return self.tables.tension(ml, mv, ut)
+
+        T = self.fa(ml, ut, self.nf(ml)) \
+            * (self.fe(ml) + self.fl(ml) * self.fv(ml, mv))
         return T
 
 
-    def fa(self, ml, ut):
+    def fa(self, ml, ut, nf=None):
         "Activation-frequency relationship."
-        #print ml
-        fa = 1 - np.exp(-(ut / (0.56 * self.nf(ml))) ** self.nf(ml))
-        #fa = np.ones(6) * 0.001
+        if nf is None:
+            nf = self.nf(ml)
+        fa = 1 - np.exp(-(ut / (FA_SCALE * nf)) ** nf)
         return fa
 
 
     def nf(self, ml):
         "???"
-        nf = 2.11 + 4.16 * (1./ml - 1.)
+        nf = NF0 + NF1 * (1./ml - 1.)
         return nf
 
 
     def fl(self, ml):
         "Force-length relationship."
-        fl = np.exp(-1 * np.abs((ml**1.93 - 1) / 1.03) ** 1.87)
+        fl = np.exp(-1 * np.abs((ml**FL_POWER - 1) / FL_WIDTH) ** FL_SHAPE)
         return fl
 
 
     def fv(self, ml, mv):
-        "Force-velocity relationship."
+        """Force-velocity relationship.
+
+        Both cases (shortening if mv <= 0, lengthening otherwise) are
+        written as (c + n * mv) / (c + d * mv) and the coefficients are
+        selected with a mask (no branch, no division by zero on the unused
+        case)."""
+        shortening = (mv <= 0)
 
-        fv = np.zeros(6)
-        for i in range(6):
-            if mv[i] <= 0:
-                fv[i] = (-5.72 - mv[i])\
-                        / (-5.72 + mv[i] * (1.38 + 2.09 * ml[i]))
-            else:
-                fv[i] = (0.62 - (-3.12 + 4.21*ml[i] - 2.67*ml[i]**2) * mv[i])\
-                        / (0.62 + mv[i])
+        c = np.where(shortening, FV_SHORTENING, FV_LENGTHENING)
+        n = np.where(shortening, -1., FV_N0 + ml * (FV_N2 * ml - FV_N1))
+        d = np.where(shortening, FV_D0 + FV_D1 * ml, 1.)
 
+        fv = (c + n * mv) / (c + d * mv)
         return fv
 
 
     def fe(self, ml):
         "Elastic force."
-        fe = -0.02 * np.exp(13.8 - 18.7 * ml)
+        fe = -FE_SCALE * np.exp(FE_OFFSET - FE_SLOPE * ml)
         return fe
 
 
-    def moment_arm(self, angles):     # TODO
-        "Moment arm of a muscle (m)"
-        moment_arm  = np.array([[0.04, -0.04, 0.   ,  0.   , 0.028, -0.035],
-                                [0.  ,  0.  , 0.025, -0.025, 0.028, -0.035]]).T
-        return moment_arm
+    def moment_arm(self, angles):
+        """Moment arm of each muscle (m) (6x2 array, or (N, 6, 2) array for
+        N states if the moment arms depend on the posture)."""
+        if self.moment_arm_model is None:
+            return self.MOMENT_ARM
+        return self.moment_arm_model(angles)
 
     def muscle_activation(self, command):  # TODO
         "Muscle activation."
         muscle_activation = command
         return muscle_activation
 
-    def muscle_length(self, moment_arm, angles): # TODO
-        "Compute muscle length (m)."
-        muscle_length = self.lm0 - np.dot(moment_arm, angles)
+    def muscle_length(self, moment_arm, angles):
+        "Compute muscle length (m) (the integral of the moment arms)."
+        if self.moment_arm_model is not None:
+            return self.lm0 - self.moment_arm_model.excursion(angles)
+        muscle_length = self.lm0 - np.dot(angles, moment_arm.T)
         return muscle_length
 
     def muscle_velocity(self, angles, velocities):
         "Compute muscle contraction velocity (muscle length derivative) (m/s)."
-        return - np.dot(self.moment_arm(angles), velocities)
-
+        if self.moment_arm_model is not None:
+            velocities = np.asarray(velocities)[..., np.newaxis, :]
+            return - (self.moment_arm(angles) * velocities).sum(axis=-1)
+        return - np.dot(velocities, self.moment_arm(angles).T)
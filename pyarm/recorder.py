@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Recorder of the channels of a simulation (see pyarm.fig).
+
+A Recorder holds the whole recording state of one simulation: the declared
+and recorded channels, their shared timebase, the observers, the streaming
+log, the clock and the output settings. The models and the main loop append
+their values to the recorder they are given, so that several simulations
+(eg. the runs of a batch or of a test) can be recorded in the same process,
+one after the other or in different threads, without mixing their samples.
+
+pyarm.fig is a facade of a default recorder (fig.RECORDER) for the code
+which does not create its own.
+
+Usage:
+
+recorder = Recorder()
+arm = ArmModel(recorder=recorder)
+muscle = MuscleModel(recorder=recorder)
+recorder.clock = clock
+...
+recorder.save_log()
+recorder.save_all_figs()
+"""
+
+__all__ = ['Recorder']
+
+import fnmatch
+import math
+import os
+import threading
+import time
+import numpy as np
+import warnings
+
+from pyarm import decimation
+from pyarm import log_archive
+from pyarm import log_stream
+from pyarm import telemetry
+
+FIG_FILENAME = "all_figs.png"
+FIG_DIRNAME = "pyarm_figs"
+FIG_DPI = 300
+LOG_DIRNAME = "pyarm_logs"
+DECIMATION = 'minmax'               # Default decimation method of the plots
+DECIMATION_THRESHOLD = 10000        # Traces are decimated above this size
+
+AGG_FIGURES = threading.local()     # Figure of each thread (see agg_figure())
+
+class Recorder:
+    "Recording state of a simulation."
+
+    def __init__(self, clock=None):
+        self.subfigs = {}                     # Recorded channels
+        self.timebase = telemetry.Timebase()  # Sample times of the subfigs
+        self.declared = {}                    # Properties of declared channels
+        self.channels = None                  # Recorded patterns (all if None)
+        self.observers = {}                   # Callbacks of observed channels
+        self.stream = None                    # Streaming log writer (or None)
+        self.clock = clock
+        self.file_prefix = time.strftime('%d%m%y_%H%M%S_')
+        self.fig_filename = FIG_FILENAME
+        self.fig_dirname = FIG_DIRNAME
+        self.log_dirname = LOG_DIRNAME
+        self.save = False
+        self.decimation = DECIMATION
+        self.decimation_threshold = DECIMATION_THRESHOLD
+
+    def append(self, name, y, x=None):
+        channel = self.subfigs.get(name)
+
+        if channel is not None:
+            if x is None:
+                current_time = self.clock.time
+                if self.stream is not None \
+                        and current_time != self.timebase.last:
+                    # First sample of a time step
+                    self.stream.step()
+                channel.append(y, self.timebase.index(current_time))
+            else:
+                channel.append_x(y, x)
+        elif name not in self.declared:
+            warnings.warn('"' + str(name) +
+                          '" has not been declared with subfig(). "'
+                          + str(name) + '" is not defined in subfigs.')
+
+        if self.observers and name in self.observers:
+            if x is None:
+                x = self.clock.time
+            for callback in self.observers[name]:
+                callback(name, y, x)
+
+    def subfig(self, name, title=None, xlabel='', ylabel='', type='plot',
+               xlim=None, ylim=None, legend=None, decimation=None):
+        """Declare the channel 'name' and its figure properties.
+
+        'decimation' is the method used to decimate the long traces before
+        plotting them ('minmax', 'lttb' or 'none', see pyarm.decimation;
+        self.decimation if None)."""
+        if title is None:
+            title = str(name)
+        self.declared[name] = {'title':title, 'xlabel':xlabel,
+                               'ylabel':ylabel, 'type':type, 'xlim':xlim,
+                               'ylim':ylim, 'legend':legend,
+                               'decimation':decimation}
+        if self.selected(name):
+            self.subfigs[name] = telemetry.Channel(self.timebase,
+                                                   **self.declared[name])
+        else:
+            self.subfigs.pop(name, None)
+
+    def selected(self, name):
+        "Return True if the channel 'name' matches the selected patterns."
+        if self.channels is None:
+            return True
+        return any(fnmatch.fnmatchcase(name, pattern)
+                   for pattern in self.channels)
+
+    def select(self, patterns=None):
+        """Select the recorded channels.
+
+        'patterns' is a list of channel names or shell-style patterns (eg.
+        'muscle *'), a comma separated string of them, or None to record all
+        channels. The channels already declared are added to or removed from
+        the subfigs (the samples of a removed channel are lost)."""
+        if isinstance(patterns, str):
+            patterns = [pattern.strip() for pattern in patterns.split(',')
+                        if pattern.strip()]
+        self.channels = None if patterns is None else tuple(patterns)
+
+        for name in self.declared:
+            if not self.selected(name):
+                self.subfigs.pop(name, None)
+            elif name not in self.subfigs:
+                self.subfigs[name] = telemetry.Channel(self.timebase,
+                                                       **self.declared[name])
+
+    def enabled(self, name):
+        """Return True if the channel 'name' is recorded or observed.
+
+        The models skip the computation of the values of the disabled
+        channels."""
+        return name in self.subfigs or name in self.observers
+
+    def observe(self, name, callback):
+        """Call callback(name, y, x) each time a value is appended to the
+        channel 'name' (recorded or not).
+
+        'y' is not copied: the callback should copy it if it keeps it."""
+        self.observers.setdefault(name, []).append(callback)
+
+    def unobserve(self, name, callback):
+        "Remove a callback added with observe()."
+        self.observers[name].remove(callback)
+        if not self.observers[name]:
+            del self.observers[name]
+
+    def start_stream(self, metadata=None,
+                     flush_interval=log_stream.FLUSH_INTERVAL,
+                     memory_cap=log_stream.MEMORY_CAP):
+        """Stream the recorded samples into an append-only log file while the
+        simulation runs (see pyarm.log_stream) and return its path.
+
+        The samples are flushed by a background thread at least every
+        'flush_interval' seconds and the memory they use is bounded by
+        'memory_cap' (bytes). save_log() converts the streaming log into a
+        log archive."""
+        if self.stream is not None:
+            raise ValueError('recorder : the log is already streamed')
+
+        self.make_log_dir()
+        path = os.path.join(self.log_dirname,
+                            self.file_prefix + 'log' + log_stream.EXTENSION)
+        self.stream = log_stream.StreamWriter(path, self.subfigs,
+                                              self.timebase, flush_interval,
+                                              memory_cap, metadata)
+        return path
+
+    def stop_stream(self):
+        """Flush the remaining samples, close the streaming log and return
+        its path (the channels are empty)."""
+        if self.stream is None:
+            raise ValueError('recorder : the log is not streamed')
+        stream, self.stream = self.stream, None
+        stream.close()
+        return stream.path
+
+    def save_log(self, metadata=None):
+        """Save the recorded channels into a binary log archive (see
+        pyarm.log_archive) and return its path.
+
+        'metadata' is an optional JSON compatible dict saved with the
+        channels. If the log is streamed, the stream is stopped and converted
+        into the archive (use load_log() to plot the whole run).
+        Use the pyarm-log2txt tool to convert the archive into text files."""
+        self.make_log_dir()
+        path = os.path.join(self.log_dirname,
+                            self.file_prefix + 'log' + log_archive.EXTENSION)
+
+        if self.stream is not None:
+            stream_path = self.stop_stream()
+            log_stream.convert(stream_path, path, metadata)
+            os.remove(stream_path)
+        else:
+            log_archive.save(path, self.subfigs, self.timebase, metadata)
+        return path
+
+    def load_log(self, path):
+        """Replace the recorded channels by the (memory-mapped) channels of
+        the log archive 'path', eg. to plot a streamed run."""
+        self.subfigs.clear()
+        self.subfigs.update(log_archive.LogArchive(path).channels)
+
+    def make_log_dir(self):
+        try:
+            os.mkdir(self.log_dirname)
+        except OSError:
+            pass
+
+    def save_fig(self, name):
+        "Save the figure of the channel 'name' into self.fig_dirname."
+        channel = self.subfigs[name]
+        render(agg_figure(), self.figure_properties(channel),
+               channel['xdata'], channel['ydata'], self.fig_path(name))
+
+    def save_all_figs(self, processes=None):
+        """Save the figures of all channels into self.fig_dirname.
+
+        The figures are rendered by a pool of 'processes' processes (the
+        number of CPUs if None) with the Agg backend; each process reuses a
+        single figure. The files are the same as the ones of save_fig()."""
+        try:
+            os.mkdir(self.fig_dirname)
+        except OSError:
+            pass
+
+        # The longest traces first, so that the processes finish together
+        tasks = [(self.figure_properties(channel),
+                  np.asarray(channel['xdata']),
+                  np.asarray(channel['ydata']),
+                  self.fig_path(name))
+                 for name, channel in self.subfigs.items()]
+        tasks.sort(key=lambda task: task[2].size, reverse=True)
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, len(tasks))
+
+        if processes <= 1:
+            for task in tasks:
+                render(agg_figure(), *task)
+        else:
+            import multiprocessing
+            with multiprocessing.Pool(processes) as pool:
+                pool.starmap(render_task, tasks, chunksize=1)
+
+    def fig_path(self, name):
+        return os.path.join(self.fig_dirname,
+                            self.file_prefix + name + '.png')
+
+    def figure_properties(self, channel):
+        """Return the figure properties of a channel (a picklable dict, the
+        decimation settings of the recorder included)."""
+        properties = figure_properties(channel)
+        properties['decimation'] = properties['decimation'] \
+                                   or self.decimation
+        properties['decimation_threshold'] = self.decimation_threshold
+        return properties
+
+    def show(self, numcols=2):
+        import matplotlib.pyplot as plt
+
+        n = 0
+        subfigs = self.subfigs
+
+        plt.subplots_adjust(hspace=0.4, wspace=0.4)
+
+        for fig in subfigs:
+            n += 1
+            numrows = math.ceil(len(subfigs)/float(numcols))
+            plt.subplot(numrows, numcols, n)
+
+            # Set labels
+            #plt.title(subfigs[fig]['title'])
+            plt.xlabel(subfigs[fig]['xlabel'], fontsize='small')
+            plt.ylabel(subfigs[fig]['ylabel'], fontsize='small')
+
+            # Fetch datas
+            x = subfigs[fig]['xdata']
+            y = subfigs[fig]['ydata']
+
+            # Plot
+            figure = plt.gcf()
+            width = plt.gca().get_position().width * figure.get_figwidth() \
+                    * figure.dpi
+            plt.plot(*decimated(self.figure_properties(subfigs[fig]), x, y,
+                                width))
+
+            # Set axis limits
+            try:
+                plt.xlim(subfigs[fig]['xlim'])
+            except TypeError:
+                pass
+
+            try:
+                plt.ylim(subfigs[fig]['ylim'])
+            except TypeError:
+                pass
+
+            # Set legend
+            if subfigs[fig]['legend'] != None:
+                nc = 1
+                if 2 < len(subfigs[fig]['legend']) <= 4:
+                    nc = 2
+                elif 4 < len(subfigs[fig]['legend']):
+                    nc = 3
+                try:
+                    plt.legend(subfigs[fig]['legend'],
+                               loc='best',
+                               prop={'size':'x-small'},
+                               ncol=nc)
+                except TypeError:
+                    # Matplotlib 0.98.1 (Debian Lenny)
+                    plt.legend(subfigs[fig]['legend'],
+                               loc='best')
+
+            # Set axis fontsize
+            # (https://www.cfa.harvard.edu/~jbattat/computer/python/pylab/)
+            fontsize = 'x-small'
+            ax = plt.gca()
+            for tick in ax.xaxis.get_major_ticks():
+                tick.label1.set_fontsize(fontsize)
+            for tick in ax.yaxis.get_major_ticks():
+                tick.label1.set_fontsize(fontsize)
+
+        if n > 0:
+            if self.save:
+                try:
+                    os.mkdir(self.fig_dirname)
+                except OSError:
+                    pass
+
+                plt.savefig(os.path.join(self.fig_dirname,
+                                         self.file_prefix + self.fig_filename),
+                            dpi=FIG_DPI)
+            plt.show()
+
+def figure_properties(channel):
+    "Return the figure properties of a channel (a picklable dict)."
+    return dict((key, channel.get(key)) for key
+                in ('title', 'xlabel', 'ylabel', 'xlim', 'ylim', 'legend',
+                    'decimation'))
+
+def decimated(properties, x, y, width):
+    """Decimate the samples (x, y) of a channel to about two points per
+    pixel of its axes ('width' pixels) if there are more samples than the
+    decimation threshold of the properties (DECIMATION_THRESHOLD by
+    default)."""
+    method = properties.get('decimation') or DECIMATION
+    threshold = properties.get('decimation_threshold', DECIMATION_THRESHOLD)
+    if method == 'none' or len(x) <= max(threshold, 2 * width):
+        return x, y
+    return decimation.decimate(x, y, 2 * int(width), method)
+
+def agg_figure():
+    """Return the figure of the current thread (drawn with the Agg backend,
+    outside pyplot)."""
+    figure = getattr(AGG_FIGURES, 'figure', None)
+    if figure is None:
+        import matplotlib.figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = matplotlib.figure.Figure()
+        FigureCanvasAgg(figure)
+        AGG_FIGURES.figure = figure
+    return figure
+
+def render_task(properties, x, y, path):
+    "Render a figure (in a process of the save_all_figs() pool)."
+    render(agg_figure(), properties, x, y, path)
+
+def render(figure, properties, x, y, path):
+    "Draw the channel (properties, x, y) on 'figure' and save it into 'path'."
+    figure.clf()
+    ax = figure.add_subplot(1, 1, 1)
+
+    # Set labels
+    ax.set_title(properties['title'])
+    ax.set_xlabel(properties['xlabel'], fontsize='small')
+    ax.set_ylabel(properties['ylabel'], fontsize='small')
+
+    # Plot
+    width = ax.get_position().width * figure.get_figwidth() * FIG_DPI
+    ax.plot(*decimated(properties, x, y, width))
+
+    # Set axis limits
+    if properties['xlim'] is not None:
+        ax.set_xlim(properties['xlim'])
+    if properties['ylim'] is not None:
+        ax.set_ylim(properties['ylim'])
+
+    # Set grid
+    ax.grid(True)
+
+    # Set legend
+    legend = properties['legend']
+    if legend is not None:
+        nc = 1
+        if 2 < len(legend) <= 4:
+            nc = 2
+        elif 4 < len(legend):
+            nc = 3
+        ax.legend(legend, loc='best', prop={'size':'x-small'}, ncol=nc)
+
+    # Set axis fontsize
+    ax.tick_params(labelsize='x-small')
+
+    figure.savefig(path, dpi=FIG_DPI)
+    figure.clf()
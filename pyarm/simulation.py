@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+__all__ = ['simulate']
+
+import numpy as np
+
+def simulate(arm, muscle, agent, num_steps, delta_time):
+    """Run the arm-muscle-agent loop for num_steps steps of delta_time
+    seconds, without GUI and without recording into pyarm.fig.
+
+    'agent' may be None (null commands). The state of 'arm' is updated.
+    If the agent has a check_models(arm, muscle) method (model based agents,
+    eg. pyarm.agent.mpc), it is called first and may raise ValueError.
+
+    Return a dictionary of arrays (one row per step, values taken at the
+    end of the step) :
+    - 'time'          : simulation time (s), shape (num_steps,)
+    - 'commands'      : agent commands, shape (num_steps, num_commands)
+    - 'torque'        : muscle torque (N.m), shape (num_steps, 2)
+    - 'accelerations' : angular accelerations (rd/s²), shape (num_steps, 2)
+    - 'velocities'    : angular velocities (rd/s), shape (num_steps, 2)
+    - 'angles'        : joint angles (rd), shape (num_steps, 2)
+    """
+    time = np.arange(1, num_steps + 1) * float(delta_time)
+
+    trajectory = {'time': time,
+                  'commands': None,
+                  'torque': np.empty([num_steps, 2]),
+                  'accelerations': np.empty([num_steps, 2]),
+                  'velocities': np.empty([num_steps, 2]),
+                  'angles': np.empty([num_steps, 2])}
+
+    check_models = getattr(agent, 'check_models', None)
+    if check_models is not None:
+        check_models(arm, muscle)
+
+    commands = [0., 0., 0., 0., 0., 0.]
+
+    for step in range(num_steps):
+        if agent is not None:
+            commands = agent.get_commands(arm.angles,
+                                          arm.velocities,
+                                          time[step])
+
+        torque = muscle.compute_torque(arm.angles, arm.velocities, commands,
+                                       record=False)
+        accelerations = arm.compute_acceleration(torque, delta_time,
+                                                 record=False)
+
+        if trajectory['commands'] is None:
+            trajectory['commands'] = np.empty([num_steps, len(commands)])
+
+        trajectory['commands'][step] = commands
+        trajectory['torque'][step] = torque
+        trajectory['accelerations'][step] = accelerations
+        trajectory['velocities'][step] = arm.velocities
+        trajectory['angles'][step] = arm.angles
+
+    if trajectory['commands'] is None:
+        trajectory['commands'] = np.empty([0, len(commands)])
+
+    return trajectory
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Columnar storage of the recorded values (see pyarm.fig).
+
+Each channel stores its samples in a growable preallocated NumPy array (one
+row per sample) instead of a list of small arrays. The sample times are
+shared by all channels: the Timebase stores each distinct time once and a
+channel only stores its first timebase index as long as it is recorded once
+per time step (an index column is only created if a channel skips or
+repeats time steps).
+
+The recorded samples can be detached (see Channel.detach()) to be written
+elsewhere (see pyarm.log_stream): the timebase indices are global, they
+keep counting the detached times.
+"""
+
+__all__ = ['Column', 'Timebase', 'Channel']
+
+import numpy as np
+
+CAPACITY = 1024          # Initial number of rows of the columns
+
+class Column:
+    """Growable array of rows (the capacity is doubled when it is full).
+
+    The shape of the rows is given by the first appended value (a scalar
+    or an array)."""
+
+    size = 0
+    shape = None             # Shape of a row
+    _buffer = None
+
+    def __init__(self, dtype=np.float64, capacity=CAPACITY):
+        self.dtype = dtype
+        self.capacity = capacity
+
+    def append(self, value):
+        size = self.size
+        buffer = self._buffer
+        if buffer is None:
+            self.shape = np.shape(value)
+            buffer = self._buffer = np.empty((self.capacity,) + self.shape,
+                                             self.dtype)
+        elif size == buffer.shape[0]:
+            self.reserve(2 * size)
+            buffer = self._buffer
+
+        try:
+            buffer[size] = value
+        except ValueError:
+            raise ValueError('Column : the row shape is ' + str(self.shape)
+                             + ' (' + str(np.shape(value)) + ' given)')
+        self.size = size + 1
+
+    def extend(self, values):
+        "Append several rows at once."
+        values = np.asarray(values, dtype=self.dtype)
+        if values.shape[0] == 0:
+            return
+        if self._buffer is None:
+            self.shape = values.shape[1:]
+            self._buffer = np.empty((max(self.capacity, values.shape[0]),)
+                                    + self.shape, self.dtype)
+        self.reserve(self.size + values.shape[0])
+        self._buffer[self.size:self.size + values.shape[0]] = values
+        self.size += values.shape[0]
+
+    def reserve(self, capacity):
+        "Make room for 'capacity' rows."
+        if self._buffer is None:
+            self.capacity = max(self.capacity, capacity)
+        elif capacity > self._buffer.shape[0]:
+            buffer = np.empty((capacity,) + self.shape, self.dtype)
+            buffer[:self.size] = self._buffer[:self.size]
+            self._buffer = buffer
+
+    def array(self):
+        "Return the rows (a view, (size,) + shape array)."
+        if self._buffer is None:
+            return np.empty((0,), self.dtype)
+        return self._buffer[:self.size]
+
+    def detach(self):
+        """Return the rows (an array) and empty the column.
+
+        The rows are not copied: the column allocates a new buffer (of the
+        same capacity) on the next append."""
+        rows = self.array()
+        if self._buffer is not None:
+            self.capacity = self._buffer.shape[0]
+            self._buffer = None
+        self.size = 0
+        return rows
+
+    def nbytes(self):
+        "Return the size of the buffer (bytes)."
+        return 0 if self._buffer is None else self._buffer.nbytes
+
+    def __len__(self):
+        return self.size
+
+
+class Timebase(Column):
+    "Distinct sample times shared by the channels."
+
+    last = None              # Last time
+    offset = 0               # Number of detached times
+
+    def index(self, time):
+        """Return the (global) index of 'time' (appended if it differs from
+        the last)."""
+        if time != self.last:
+            self.append(time)
+            self.last = time
+        return self.offset + self.size - 1
+
+    def detach(self):
+        rows = Column.detach(self)
+        self.offset += rows.shape[0]
+        return rows
+
+
+class Channel(dict):
+    """Recorded values of a figure.
+
+    The figure properties (title, xlabel, ...) are the dict items; the
+    'xdata' and 'ydata' items return the recorded samples as arrays."""
+
+    def __init__(self, timebase, **properties):
+        dict.__init__(self, properties)
+        self.timebase = timebase
+        self.y = Column()
+        self.x = None            # Column of explicit x values (or None)
+        self.indices = None      # Column of timebase indices (or None)
+        self.start = None        # Timebase index of the first sample (in
+                                 # memory)
+        self.next_index = None   # Expected index of the next sample
+
+    def __getitem__(self, key):
+        if key == 'ydata':
+            return self.y.array()
+        if key == 'xdata':
+            return self.xdata()
+        return dict.__getitem__(self, key)
+
+    def append(self, y, index):
+        "Append a sample recorded at the timebase index 'index'."
+        self.y.append(y)
+
+        if index == self.next_index:
+            # Recorded once per time step
+            self.next_index = index + 1
+        elif self.x is not None:
+            self.x.append(self.timebase.array()[index - self.timebase.offset])
+        elif self.indices is not None:
+            self.indices.append(index)
+        elif self.start is None:
+            self.start = index
+            self.next_index = index + 1
+        else:
+            # Not recorded once per time step: store the indices
+            self.indices = Column(np.int32)
+            self.indices.extend(np.arange(self.start,
+                                          self.start + self.y.size - 1))
+            self.indices.append(index)
+            self.next_index = None
+
+    def append_x(self, y, x):
+        "Append a sample with an explicit x value."
+        if self.x is None:
+            # The x values of the previous samples are materialized
+            column = Column()
+            column.extend(self.xdata())
+            self.x = column
+            self.next_index = None
+        self.y.append(y)
+        self.x.append(x)
+
+    def xdata(self):
+        "Return the x values of the samples (an array)."
+        offset = self.timebase.offset
+        if self.x is not None:
+            return self.x.array()
+        if self.indices is not None:
+            return self.timebase.array()[self.indices.array() - offset]
+        if self.start is None:
+            return np.empty((0,))
+        start = self.start - offset
+        return self.timebase.array()[start:start + self.y.size]
+
+    def detach(self):
+        """Return the samples recorded since the last call and empty the
+        channel.
+
+        The samples are a dict with the 'y' rows and either the explicit 'x'
+        values, the timebase 'indices' or the timebase index of the first
+        sample ('start', None if there is no sample)."""
+        size = self.y.size
+        samples = {'y': self.y.detach()}
+
+        if self.x is not None:
+            samples['x'] = self.x.detach()
+        elif self.indices is not None:
+            samples['indices'] = self.indices.detach()
+        else:
+            samples['start'] = self.start if size > 0 else None
+            if self.start is not None:
+                self.start += size
+
+        return samples
+
+    def nbytes(self):
+        "Return the size of the buffers of the channel (bytes)."
+        return sum(column.nbytes() for column
+                   in (self.y, self.x, self.indices) if column is not None)
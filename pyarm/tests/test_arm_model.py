@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.kinematics import finite_difference_method as kinematics
+from pyarm.model.arm import abstract_arm_model
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import sagittal_arm_model
+from pyarm.model.arm import weiwei_arm_model
+
+ARM_MODULES = (kambara_arm_model,
+               mitrovic_arm_model,
+               sagittal_arm_model,
+               weiwei_arm_model)
+
+DELTA_TIME = 0.005
+NUM_STEPS = 400
+
+def reference_step(arm, angles, velocities, torque, delta_time):
+    """Reference arm dynamics: collision detection with a first complete
+    evaluation of the dynamics, then a second one for the actual step.
+
+    Return the accelerations, the velocities and the angles."""
+    collision_flags = [False, False]
+
+    if not arm.unbounded:
+        M = arm.M(angles)
+        C = arm.C(angles, velocities)
+        B = arm.B(velocities)
+        G = arm.G(angles)
+        accelerations = np.dot(np.linalg.inv(M), torque - C - B - G)
+        trial_velocities, trial_angles = kinematics.forward_kinematics(
+                                                            accelerations,
+                                                            velocities,
+                                                            angles,
+                                                            delta_time)
+        collision_flags = [not flag for flag
+                           in arm.assert_joint_angles(trial_angles)]
+
+    M = arm.M(angles)
+    C = arm.C(angles, velocities)
+    B = arm.B(velocities)
+    G = arm.G(angles)
+    filter = np.array([float(flag) for flag in collision_flags])
+    normal_force = filter * (-torque + C + B + G)
+    accelerations = np.dot(np.linalg.inv(M), torque - C - B - G + normal_force)
+
+    velocities, angles = kinematics.forward_kinematics(accelerations,
+                                                       velocities,
+                                                       angles,
+                                                       delta_time)
+
+    if not arm.unbounded:
+        velocities = (1. - filter) * velocities
+        angles = arm.constraint_joint_angles(angles)
+
+    return accelerations, velocities, angles
+
+
+class ArmModelTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def check_reference(self, unbounded):
+        rng = np.random.RandomState(0)
+        for arm_module in ARM_MODULES:
+            arm = arm_module.ArmModel(unbounded)
+            collisions = 0
+            for torque in rng.uniform(-5., 5., (NUM_STEPS, 2)):
+                fig.CLOCK.update()
+                expected = reference_step(arm, arm.angles, arm.velocities,
+                                          torque, DELTA_TIME)
+                position = np.concatenate(arm.joints_position())
+                accelerations = arm.compute_acceleration(torque, DELTA_TIME)
+
+                np.testing.assert_allclose(accelerations, expected[0],
+                                           rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(arm.velocities, expected[1],
+                                           rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(arm.angles, expected[2],
+                                           rtol=1e-12, atol=1e-12)
+
+                # The recorded values are the same as well: the joint angles
+                # of the new state and the position of the previous one
+                np.testing.assert_allclose(fig.SUBFIGS['joint_angles']
+                                                      ['ydata'][-1],
+                                           expected[2], rtol=1e-12, atol=1e-12)
+                np.testing.assert_array_equal(fig.SUBFIGS['position']
+                                                         ['ydata'][-1],
+                                              position)
+
+                collisions += np.count_nonzero(arm.velocities == 0.)
+
+            if not unbounded:
+                # Make sure the joint limits have been reached
+                self.assertTrue(collisions > 0)
+
+    def test_bounded(self):
+        self.check_reference(False)
+
+    def test_unbounded(self):
+        self.check_reference(True)
+
+    def test_constants_invalidation(self):
+        arm = sagittal_arm_model.ArmModel()
+        f1 = arm.constants()['f1']
+        g2 = arm.constants()['g2']
+
+        arm.set_parameters(forearm_mass=2. * arm.forearm_mass)
+        self.assertNotEqual(arm.constants()['f1'], f1)
+        self.assertEqual(arm.constants()['g2'], 2. * g2)
+
+        # Other instances are not affected
+        self.assertEqual(sagittal_arm_model.ArmModel().constants()['f1'], f1)
+
+        self.assertRaises(ValueError, arm.set_parameters, mass=1.)
+
+    def test_default_parameters_invalidation(self):
+        arm = sagittal_arm_model.ArmModel()
+        g2 = arm.constants()['g2']
+
+        forearm_mass = sagittal_arm_model.ArmModel.forearm_mass
+        sagittal_arm_model.ArmModel.set_default_parameters(
+                                            forearm_mass=2. * forearm_mass)
+        try:
+            self.assertEqual(arm.constants()['g2'], 2. * g2)
+        finally:
+            sagittal_arm_model.ArmModel.set_default_parameters(
+                                            forearm_mass=forearm_mass)
+        self.assertEqual(arm.constants()['g2'], g2)
+
+    def test_solve(self):
+        arm = weiwei_arm_model.ArmModel()
+        rng = np.random.RandomState(0)
+        for angles in rng.uniform(-3., 3., (100, 2)):
+            m11, m12, m22 = arm.inertia(angles)
+            y = rng.uniform(-5., 5., 2)
+            np.testing.assert_allclose(abstract_arm_model.solve(m11, m12, m22,
+                                                                y),
+                                       np.linalg.solve(arm.M(angles), y),
+                                       rtol=1e-12, atol=1e-12)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(ArmModelTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import time
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import sagittal_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.arm.batch_arm_model import BatchArmModel
+
+ARM_MODULES = (kambara_arm_model,
+               mitrovic_arm_model,
+               sagittal_arm_model,
+               weiwei_arm_model)
+
+DELTA_TIME = 0.005
+NUM_ARMS = 8
+NUM_STEPS = 200
+
+# The timing tests depend on the machine load: they are only run when this
+# environment variable is set (e.g. PYARM_BENCHMARK=1)
+BENCHMARK_VARIABLE = 'PYARM_BENCHMARK'
+BENCHMARK_ARMS = 1000
+BENCHMARK_STEPS = 10
+MIN_SPEEDUP = 100.        # Batch speed-up per arm-step over ArmModel loops
+
+def step_time(step, num_steps):
+    "Return the best time of step() over num_steps calls."
+    times = []
+    for i in range(num_steps):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+class BatchArmModelTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def run_both(self, arm_module, unbounded):
+        "Run the same torques through N ArmModel and one BatchArmModel."
+        rng = np.random.RandomState(0)
+        torques = rng.uniform(-5., 5., (NUM_STEPS, NUM_ARMS, 2))
+
+        arms = [arm_module.ArmModel(unbounded) for i in range(NUM_ARMS)]
+        batch = BatchArmModel(arm_module.ArmModel(unbounded), NUM_ARMS)
+
+        for torque in torques:
+            fig.CLOCK.update()
+            accelerations = batch.compute_acceleration(torque, DELTA_TIME)
+            for i, arm in enumerate(arms):
+                expected = arm.compute_acceleration(torque[i], DELTA_TIME)
+                np.testing.assert_allclose(accelerations[i], expected,
+                                           rtol=1e-7, atol=1e-7)
+
+        return arms, batch
+
+    def test_bounded(self):
+        for arm_module in ARM_MODULES:
+            arms, batch = self.run_both(arm_module, False)
+            for i, arm in enumerate(arms):
+                np.testing.assert_allclose(batch.angles[i], arm.angles,
+                                           rtol=1e-7, atol=1e-7)
+                np.testing.assert_allclose(batch.velocities[i], arm.velocities,
+                                           rtol=1e-7, atol=1e-7)
+
+    def test_unbounded(self):
+        for arm_module in ARM_MODULES:
+            arms, batch = self.run_both(arm_module, True)
+            for i, arm in enumerate(arms):
+                np.testing.assert_allclose(batch.angles[i], arm.angles,
+                                           rtol=1e-7, atol=1e-7)
+
+    def test_next_state_is_pure(self):
+        batch = BatchArmModel(mitrovic_arm_model.ArmModel(), NUM_ARMS)
+        angles = batch.angles.copy()
+        torque = np.ones([NUM_ARMS, 2])
+        batch.next_state(batch.angles, batch.velocities, torque, DELTA_TIME)
+        np.testing.assert_array_equal(batch.angles, angles)
+
+    @unittest.skipUnless(os.environ.get(BENCHMARK_VARIABLE),
+                         BENCHMARK_VARIABLE + ' is not set')
+    def test_speedup(self):
+        "One batch step is much faster than a loop over the arms."
+        torque = np.random.RandomState(0).uniform(-5., 5.,
+                                                  (BENCHMARK_ARMS, 2))
+        arms = [mitrovic_arm_model.ArmModel() for i in range(BENCHMARK_ARMS)]
+        batch = BatchArmModel(mitrovic_arm_model.ArmModel(), BENCHMARK_ARMS)
+
+        def loop_step():
+            fig.CLOCK.update()
+            for arm, arm_torque in zip(arms, torque):
+                arm.compute_acceleration(arm_torque, DELTA_TIME)
+
+        loop_time = step_time(loop_step, BENCHMARK_STEPS)
+        batch_time = step_time(lambda: batch.compute_acceleration(torque,
+                                                                  DELTA_TIME),
+                               BENCHMARK_STEPS)
+        self.assertGreater(loop_time / batch_time, MIN_SPEEDUP)
+
+    def test_shape(self):
+        batch = BatchArmModel(mitrovic_arm_model.ArmModel(), NUM_ARMS)
+        self.assertRaises(TypeError, batch.compute_acceleration,
+                          np.zeros(2), DELTA_TIME)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(BatchArmModelTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import pyarm
+from pyarm import log_archive
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(pyarm.__file__)))
+SCRIPT = os.path.join(ROOT, 'scripts', 'pyarm')
+
+def run_pyarm(directory, *args):
+    "Run the pyarm script in 'directory' and return its output."
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([ROOT, env.get('PYTHONPATH', '')])
+    env['MPLBACKEND'] = 'agg'
+    return subprocess.check_output([sys.executable, SCRIPT] + list(args),
+                                   cwd=directory, env=env, timeout=120,
+                                   universal_newlines=True)
+
+class BatchRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_steps(self):
+        output = run_pyarm(self.directory, '-g', 'none', '-A', 'sigmoid',
+                           '-m', 'mitrovic', '-a', 'mitrovic', '-d', '0.01',
+                           '--steps', '300', '-l', '-r', 'joint_angles')
+        self.assertIn('300 steps (3.00 s simulated)', output)
+        self.assertIn('steps/s', output)
+
+        # The text interface is not updated in batch mode
+        self.assertNotIn('rd/s', output)
+
+        filenames = os.listdir(os.path.join(self.directory, 'pyarm_logs'))
+        self.assertEqual(len(filenames), 1)
+        archive = log_archive.LogArchive(os.path.join(self.directory,
+                                                      'pyarm_logs',
+                                                      filenames[0]))
+        self.assertEqual(len(archive.channels['joint_angles']['xdata']), 300)
+
+    def test_duration(self):
+        "The default timestep is the physics step of the realtime mode."
+        output = run_pyarm(self.directory, '-g', 'none', '-A', 'sigmoid',
+                           '-m', 'mitrovic', '-a', 'mitrovic',
+                           '--duration', '1', '-r', 'none')
+        self.assertIn('200 steps (1.00 s simulated)', output)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(BatchRunTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
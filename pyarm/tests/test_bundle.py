@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.bundle import ModelBundle
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import sagittal_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.kinematics import runge_kutta_4
+from pyarm.model.muscle import fake_muscle_model
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import mitrovic_muscle_model
+from pyarm.model.muscle import weiwei_muscle_model
+
+ARM_MODULES = (kambara_arm_model,
+               mitrovic_arm_model,
+               sagittal_arm_model,
+               weiwei_arm_model)
+
+MUSCLE_MODULES = (fake_muscle_model,
+                  kambara_muscle_model,
+                  mitrovic_muscle_model)
+
+DELTA_TIME = 0.005
+NUM_STEPS = 500
+
+class ModelBundleTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def check_bundle(self, unbounded):
+        rng = np.random.RandomState(0)
+        for arm_module in ARM_MODULES:
+            for muscle_module in MUSCLE_MODULES:
+                arm = arm_module.ArmModel(unbounded)
+                muscle = muscle_module.MuscleModel()
+                bundle = ModelBundle(arm_module.ArmModel(unbounded), muscle)
+
+                for command in rng.uniform(-0.2, 1.2, (NUM_STEPS, 6)):
+                    torque = muscle.compute_torque(arm.angles,
+                                                   arm.velocities,
+                                                   command,
+                                                   record=False)
+                    accelerations = arm.compute_acceleration(torque,
+                                                             DELTA_TIME,
+                                                             record=False)
+                    bundle_torque, bundle_accelerations = \
+                                            bundle.step(command, DELTA_TIME)
+
+                    # Bit for bit
+                    np.testing.assert_array_equal(bundle_torque, torque)
+                    np.testing.assert_array_equal(bundle_accelerations,
+                                                  accelerations)
+                    np.testing.assert_array_equal(bundle.angles, arm.angles)
+                    np.testing.assert_array_equal(bundle.velocities,
+                                                  arm.velocities)
+
+    def test_bounded(self):
+        self.check_bundle(False)
+
+    def test_unbounded(self):
+        self.check_bundle(True)
+
+    def test_sync(self):
+        arm = mitrovic_arm_model.ArmModel()
+        bundle = ModelBundle(arm, mitrovic_muscle_model.MuscleModel())
+        bundle.step([1., 0., 1., 0., 0., 0.], DELTA_TIME)
+        bundle.sync()
+        np.testing.assert_array_equal(arm.angles, bundle.angles)
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, ModelBundle,
+                          mitrovic_arm_model.ArmModel(False, runge_kutta_4),
+                          mitrovic_muscle_model.MuscleModel())
+        self.assertRaises(ValueError, ModelBundle,
+                          mitrovic_arm_model.ArmModel(),
+                          weiwei_muscle_model.MuscleModel())
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(ModelBundleTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+
+from pyarm import clock as clock_mod
+
+DELTA_TIME = 0.005
+MAX_SUBSTEPS = 4
+
+class FakeTimer:
+    "Wall clock advanced by hand."
+
+    def __init__(self):
+        self.time = 100.
+
+    def __call__(self):
+        return self.time
+
+class RealtimeSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.clock = clock_mod.RealtimeScheduler(DELTA_TIME, MAX_SUBSTEPS,
+                                                 self.timer)
+
+    def run_frame(self, elapsed):
+        "Advance the wall clock by 'elapsed' and run the due steps."
+        self.timer.time += elapsed
+        num_steps = self.clock.substeps(wait=False)
+        for step in range(num_steps):
+            self.clock.update()
+        return num_steps
+
+    def test_fixed_step(self):
+        "The physics step is fixed and the leftover time is carried over."
+        self.assertEqual(self.run_frame(0.0125), 2)
+        self.assertEqual(self.clock.delta_time, DELTA_TIME)
+        self.assertEqual(self.run_frame(0.0025), 1)
+        self.assertEqual(self.run_frame(0.002), 0)
+        self.assertAlmostEqual(self.clock.time, 3 * DELTA_TIME)
+        self.assertAlmostEqual(self.clock.accumulator, 0.002)
+        self.assertEqual(self.clock.deadline_misses, 1)
+
+    def test_catch_up_bound(self):
+        "A long stall does not produce more than MAX_SUBSTEPS steps."
+        self.assertEqual(self.run_frame(1.), MAX_SUBSTEPS)
+        self.assertEqual(self.clock.dropped_steps, 200 - MAX_SUBSTEPS)
+        self.assertAlmostEqual(self.clock.time, MAX_SUBSTEPS * DELTA_TIME)
+        self.assertLess(self.clock.accumulator, DELTA_TIME)
+
+        # The simulation then follows the wall clock again
+        self.assertEqual(self.run_frame(DELTA_TIME), 1)
+        self.assertEqual(self.clock.dropped_steps, 200 - MAX_SUBSTEPS)
+
+    def test_statistics(self):
+        for frame in range(10):
+            self.run_frame(DELTA_TIME)
+        self.assertEqual(self.clock.steps, 10)
+        self.assertEqual(self.clock.deadline_misses, 0)
+        self.assertAlmostEqual(self.clock.lateness, 0.)
+        self.assertAlmostEqual(self.clock.jitter, 0.)
+
+        # A 17.5 ms frame: its 3 steps are run 12.5 ms, 7.5 ms and 2.5 ms
+        # after their due time, the next one is on time
+        self.run_frame(0.0175)
+        self.run_frame(0.0025)
+        self.assertEqual(self.clock.steps, 14)
+        self.assertAlmostEqual(self.clock.max_lateness, 0.0125)
+        self.assertAlmostEqual(self.clock.lateness, 0.0225 / 14)
+        self.assertGreater(self.clock.jitter, 0.)
+        self.assertIn('1 deadline misses', self.clock.report())
+
+    def test_wait(self):
+        "substeps() waits for the first due step."
+        clock = clock_mod.RealtimeScheduler(0.001)
+        self.assertEqual(clock.substeps(), 1)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, clock_mod.RealtimeScheduler, 0.)
+        self.assertRaises(ValueError, clock_mod.RealtimeScheduler,
+                          DELTA_TIME, 0)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(RealtimeSchedulerTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import decimation
+from pyarm import fig
+
+NUM_SAMPLES = 100003
+NUM_POINTS = 1000
+
+class DecimationTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.x = np.arange(NUM_SAMPLES) * 0.005
+        self.y = np.c_[np.sin(self.x), np.cos(3. * self.x)] \
+                 + 0.1 * rng.normal(size=[NUM_SAMPLES, 2])
+        self.y[12345, 0] = 10.          # A peak
+
+    def check_samples(self, x, y):
+        "Check that the decimated samples are samples of the trace."
+        for column in range(y.shape[1]):
+            indices = np.round(x[:, column] / 0.005).astype(int)
+            self.assertTrue(np.all(np.diff(indices) >= 0))
+            np.testing.assert_array_equal(y[:, column],
+                                          self.y[indices, column])
+            self.assertEqual(indices[0], 0)
+            self.assertEqual(indices[-1], NUM_SAMPLES - 1)
+
+    def test_minmax(self):
+        x, y = decimation.decimate(self.x, self.y, NUM_POINTS, 'minmax')
+        self.assertLessEqual(abs(len(x) - NUM_POINTS), 4)
+        self.check_samples(x, y)
+
+        # The envelope is kept
+        np.testing.assert_array_equal(y.max(axis=0), self.y.max(axis=0))
+        np.testing.assert_array_equal(y.min(axis=0), self.y.min(axis=0))
+
+    def test_lttb(self):
+        x, y = decimation.decimate(self.x, self.y, NUM_POINTS, 'lttb')
+        self.assertEqual(x.shape, (NUM_POINTS, 2))
+        self.check_samples(x, y)
+        self.assertEqual(y[:, 0].max(), 10.)
+
+    def test_one_line(self):
+        for method in decimation.METHODS:
+            x, y = decimation.decimate(self.x, self.y[:, 0], NUM_POINTS,
+                                       method)
+            self.assertEqual(x.ndim, 1)
+            self.assertEqual(y.shape, x.shape)
+            self.assertEqual(y.max(), 10.)
+
+    def test_short_trace(self):
+        for method in decimation.METHODS:
+            x, y = decimation.decimate(self.x[:500], self.y[:500], NUM_POINTS,
+                                       method)
+            np.testing.assert_array_equal(y, self.y[:500])
+            self.assertEqual(len(x), 500)
+
+        self.assertRaises(ValueError, decimation.decimate, self.x, self.y,
+                          NUM_POINTS, 'unknown')
+
+    def test_fig(self):
+        properties = {'decimation': None}
+        x, y = fig.decimated(properties, self.x, self.y, NUM_POINTS)
+        self.assertLess(len(x), NUM_SAMPLES)
+
+        properties = {'decimation': 'none'}
+        x, y = fig.decimated(properties, self.x, self.y, NUM_POINTS)
+        self.assertIs(x, self.x)
+
+        # Short traces are not decimated
+        properties = {'decimation': 'lttb'}
+        x, y = fig.decimated(properties, self.x[:fig.DECIMATION_THRESHOLD],
+                             self.y[:fig.DECIMATION_THRESHOLD], NUM_POINTS)
+        self.assertEqual(len(x), fig.DECIMATION_THRESHOLD)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(DecimationTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.agent import ilqg
+from pyarm.agent import ilqg_agent
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.muscle import mitrovic_muscle_model
+
+DELTA_TIME = 0.01
+HORIZON = 50
+TARGET = (1.5, 2.1)
+INITIAL_STATE = (0.785, 1.22, 0., 0.)
+
+class ILQGTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def make_solver(self):
+        return ilqg.Solver(mitrovic_arm_model.ArmModel(True),
+                           mitrovic_muscle_model.MuscleModel(),
+                           DELTA_TIME, HORIZON, TARGET)
+
+    def test_solve(self):
+        solver = self.make_solver()
+        initial_cost = solver.total_cost(
+                            solver.rollout(np.array(INITIAL_STATE),
+                                           np.zeros([HORIZON, 6])),
+                            np.zeros([HORIZON, 6]))
+
+        self.assertTrue(solver.solve(INITIAL_STATE))
+        self.assertTrue(solver.cost < 0.01 * initial_cost)
+        np.testing.assert_allclose(solver.states[-1, 0:2], TARGET, atol=0.01)
+
+        # Commands stay in [umin, umax]
+        self.assertTrue(np.all(solver.commands >= 0.))
+        self.assertTrue(np.all(solver.commands <= 1.))
+
+        # The states are the rollout of the commands
+        np.testing.assert_allclose(solver.rollout(np.array(INITIAL_STATE),
+                                                  solver.commands),
+                                   solver.states)
+
+    def test_cholesky_solve(self):
+        a = np.array([[4., 1.], [1., 3.]])
+        b = np.array([[1., 2., 3.], [4., 5., 6.]])
+        np.testing.assert_allclose(ilqg.cholesky_solve(a, b),
+                                   np.linalg.solve(a, b))
+
+        self.assertRaises(np.linalg.LinAlgError, ilqg.cholesky_solve,
+                          -a, b)
+
+    def test_warm_start(self):
+        solver = self.make_solver()
+        solver.solve(INITIAL_STATE)
+        cold_iterations = solver.iterations
+
+        solver.solve(INITIAL_STATE)
+        self.assertTrue(solver.iterations < cold_iterations)
+
+    def test_agent(self):
+        ilqg_agent.DELTA_TIME = DELTA_TIME
+        agent = ilqg_agent.Agent()
+        arm = mitrovic_arm_model.ArmModel()
+
+        for step in range(ilqg_agent.MAXSTEP + 1):
+            commands = agent.get_commands(arm.angles, arm.velocities, 0.)
+            self.assertEqual(len(commands), 2)
+            arm.compute_acceleration(np.array(commands), DELTA_TIME)
+
+        self.assertEqual(commands, [0., 0.])
+        np.testing.assert_allclose(arm.angles, (1.1, 1.2), atol=0.05)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(ILQGTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
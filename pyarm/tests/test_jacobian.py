@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model import jacobian
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import sagittal_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.muscle import fake_muscle_model
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import mitrovic_muscle_model
+from pyarm.model.muscle import moment_arm
+from pyarm.model.muscle import weiwei_muscle_model
+
+ARM_MODULES = (kambara_arm_model,
+               mitrovic_arm_model,
+               sagittal_arm_model,
+               weiwei_arm_model)
+
+MUSCLE_MODULES = (fake_muscle_model,
+                  kambara_muscle_model,
+                  mitrovic_muscle_model,
+                  weiwei_muscle_model)
+
+DELTA_TIME = 0.01
+NUM_STATES = 5
+EPSILON = 1e-6
+
+def reference_step(arm, muscle, state, command):
+    "Compute the next state with the MuscleModel and ArmModel classes."
+    arm.angles = np.array(state[0:2])
+    arm.velocities = np.array(state[2:4])
+    torque = muscle.compute_torque(arm.angles, arm.velocities, command,
+                                   record=False)
+    arm.compute_acceleration(torque, DELTA_TIME, record=False)
+    return np.concatenate([arm.angles, arm.velocities])
+
+def random_states(rng):
+    "Random states and commands (away from the command clipping)."
+    states = np.empty([NUM_STATES, 4])
+    states[:, 0:2] = rng.uniform(0.3, 1.2, (NUM_STATES, 2))
+    states[:, 2:4] = rng.uniform(-2., 2., (NUM_STATES, 2))
+    commands = rng.uniform(0.05, 0.95, (NUM_STATES, 6))
+    return states, commands
+
+
+class JacobianTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def test_step_jacobians(self):
+        rng = np.random.RandomState(0)
+        for arm_module in ARM_MODULES:
+            for muscle_module in MUSCLE_MODULES:
+                arm = arm_module.ArmModel(True)
+                muscle = muscle_module.MuscleModel()
+                self.check_step_jacobians(arm, muscle, rng,
+                                          arm_module.__name__ + ' ' \
+                                          + muscle.name)
+
+    def test_posture_moment_arms(self):
+        rng = np.random.RandomState(0)
+        for muscle_module in MUSCLE_MODULES[1:]:
+            arm = mitrovic_arm_model.ArmModel(True)
+            muscle = muscle_module.MuscleModel()
+            muscle.moment_arm_model = moment_arm.CosineMomentArm(
+                                                    muscle.moment_arm(None),
+                                                    0.7)
+            self.check_step_jacobians(arm, muscle, rng,
+                                      'posture ' + muscle.name)
+
+    def check_step_jacobians(self, arm, muscle, rng, name):
+        "Compare the Jacobians with central finite differences."
+        states, commands = random_states(rng)
+        next_states, A, B = jacobian.step_jacobians(arm, muscle,
+                                                    states,
+                                                    commands,
+                                                    DELTA_TIME)
+
+        for t in range(NUM_STATES):
+            x, u = states[t], commands[t]
+            np.testing.assert_allclose(next_states[t],
+                                       reference_step(arm, muscle,
+                                                      x, u),
+                                       rtol=1e-10, atol=1e-12,
+                                       err_msg=name)
+
+            # Central finite differences
+            for i in range(4):
+                dx = np.zeros(4)
+                dx[i] = EPSILON
+                column = (reference_step(arm, muscle, x + dx, u)
+                          - reference_step(arm, muscle, x - dx, u)) \
+                         / (2. * EPSILON)
+                np.testing.assert_allclose(A[t, :, i], column,
+                                           rtol=1e-5, atol=1e-7,
+                                           err_msg=name)
+            for i in range(6):
+                du = np.zeros(6)
+                du[i] = EPSILON
+                column = (reference_step(arm, muscle, x, u + du)
+                          - reference_step(arm, muscle, x, u - du)) \
+                         / (2. * EPSILON)
+                np.testing.assert_allclose(B[t, :, i], column,
+                                           rtol=1e-5, atol=1e-7,
+                                           err_msg=name)
+
+    def test_clipped_commands(self):
+        arm = kambara_arm_model.ArmModel(True)
+        muscle = kambara_muscle_model.MuscleModel()
+        commands = np.array([[-0.5, 1.5, 0.5, 0.5, 0.5, 0.5]])
+        next_states, A, B = jacobian.step_jacobians(arm, muscle,
+                                                    [[0.5, 0.5, 0., 0.]],
+                                                    commands, DELTA_TIME)
+        np.testing.assert_array_equal(B[0, :, 0:2], np.zeros([4, 2]))
+        self.assertTrue(np.all(B[0, 2:4, 2:] != 0.))
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(JacobianTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
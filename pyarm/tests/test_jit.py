@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import time
+import unittest
+import warnings
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model import jit
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import sagittal_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.kinematics import runge_kutta_4
+from pyarm.model.muscle import fake_muscle_model
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import lookup_table
+from pyarm.model.muscle import mitrovic_muscle_model
+from pyarm.model.muscle import weiwei_muscle_model
+
+ARM_MODULES = (kambara_arm_model,
+               mitrovic_arm_model,
+               sagittal_arm_model,
+               weiwei_arm_model)
+
+MUSCLE_MODULES = (fake_muscle_model,
+                  kambara_muscle_model,
+                  mitrovic_muscle_model,
+                  weiwei_muscle_model)
+
+DELTA_TIME = 0.005
+NUM_STEPS = 300
+
+# The benchmark is only run if this environment variable is set (timings
+# depend on the machine and its load)
+BENCHMARK_VARIABLE = 'PYARM_BENCHMARK'
+BENCHMARK_STEPS = 20000
+MIN_TABLES_SPEEDUP = 3.
+
+class JitTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def check_backend(self, backend, unbounded):
+        rng = np.random.RandomState(0)
+        for arm_module in ARM_MODULES:
+            for muscle_module in MUSCLE_MODULES:
+                muscle = muscle_module.MuscleModel()
+                commands = rng.uniform(-0.2, 1.2, (NUM_STEPS, 6))
+
+                reference_arm = arm_module.ArmModel(unbounded)
+                reference = jit.rollout(reference_arm, muscle, commands,
+                                        DELTA_TIME, backend='numpy')
+
+                arm = arm_module.ArmModel(unbounded)
+                trajectory = jit.rollout(arm, muscle, commands, DELTA_TIME,
+                                         backend=backend)
+
+                for key in ('torque', 'accelerations', 'velocities',
+                            'angles'):
+                    np.testing.assert_allclose(trajectory[key],
+                                               reference[key],
+                                               rtol=1e-9, atol=1e-9,
+                                               err_msg=arm_module.__name__ \
+                                                   + ' ' + muscle.name \
+                                                   + ' ' + key)
+
+                # The arm state is updated
+                np.testing.assert_array_equal(arm.angles,
+                                              trajectory['angles'][-1])
+
+    def test_python_kernel(self):
+        self.check_backend('python', False)
+        self.check_backend('python', True)
+
+    def test_numba_kernel(self):
+        if not jit.AVAILABLE:
+            self.skipTest('numba is not installed')
+        self.check_backend('numba', False)
+        self.check_backend('numba', True)
+
+    def test_fallback(self):
+        # Unsupported models run with the numpy backend
+        arm = kambara_arm_model.ArmModel(False, runge_kutta_4)
+        muscle = kambara_muscle_model.MuscleModel()
+        self.assertFalse(jit.supported(arm, muscle))
+
+        trajectory = jit.rollout(arm, muscle, np.zeros([10, 6]), DELTA_TIME)
+        self.assertEqual(trajectory['angles'].shape, (10, 2))
+
+        self.assertRaises(ValueError, jit.rollout, arm, muscle,
+                          np.zeros([10, 6]), DELTA_TIME, 'python')
+
+    def check_tables(self, backend):
+        "The kernel uses the lookup tables of the Li muscle model."
+        muscle = weiwei_muscle_model.MuscleModel()
+        muscle.tables = lookup_table.LiTables(muscle)
+        commands = np.random.RandomState(0).uniform(0., 1., (NUM_STEPS, 6))
+
+        for arm_module in ARM_MODULES:
+            reference = jit.rollout(arm_module.ArmModel(), muscle, commands,
+                                    DELTA_TIME, backend='numpy')
+            trajectory = jit.rollout(arm_module.ArmModel(), muscle, commands,
+                                     DELTA_TIME, backend=backend)
+            for key in ('torque', 'accelerations', 'velocities', 'angles'):
+                np.testing.assert_allclose(trajectory[key], reference[key],
+                                           rtol=1e-9, atol=1e-9,
+                                           err_msg=arm_module.__name__ \
+                                               + ' ' + key)
+
+    def test_python_tables(self):
+        self.check_tables('python')
+
+    def test_numba_tables(self):
+        if not jit.AVAILABLE:
+            self.skipTest('numba is not installed')
+        self.check_tables('numba')
+
+    def test_tables_fallback(self):
+        "Cubic tables are not supported by the kernel."
+        arm = sagittal_arm_model.ArmModel()
+        muscle = weiwei_muscle_model.MuscleModel()
+        muscle.tables = lookup_table.LiTables(muscle, method='cubic')
+        self.assertFalse(jit.supported(arm, muscle))
+
+        commands = np.full([10, 6], 0.5)
+        trajectory = jit.rollout(arm, muscle, commands, DELTA_TIME)
+        reference = jit.rollout(sagittal_arm_model.ArmModel(), muscle,
+                                commands, DELTA_TIME, backend='numpy')
+        np.testing.assert_array_equal(trajectory['angles'],
+                                      reference['angles'])
+
+        muscle.tables.set_method('linear')
+        self.assertTrue(jit.supported(arm, muscle))
+
+    def test_tables_out_of_grid(self):
+        "The kernel warns when the tables are clamped to their grids."
+        muscle = weiwei_muscle_model.MuscleModel()
+        muscle.tables = lookup_table.LiTables(muscle,
+                                              mv_grid=(-0.1, 0.1, 21))
+        commands = np.zeros([50, 6])
+        commands[:, 0] = 1.
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            jit.rollout(sagittal_arm_model.ArmModel(), muscle, commands,
+                        DELTA_TIME, backend='python')
+        self.assertEqual(len(caught), 1)
+        self.assertIn('muscle velocity', str(caught[0].message))
+
+    @unittest.skipUnless(os.environ.get(BENCHMARK_VARIABLE),
+                         BENCHMARK_VARIABLE + ' is not set')
+    def test_tables_speedup(self):
+        "The compiled lookup tables are faster than the exact functions."
+        if not jit.AVAILABLE:
+            self.skipTest('numba is not installed')
+
+        muscle = weiwei_muscle_model.MuscleModel()
+        tables = lookup_table.LiTables(muscle)
+        commands = np.random.RandomState(0).uniform(0., 1.,
+                                                    (BENCHMARK_STEPS, 6))
+
+        timings = {}
+        for name in ('exact', 'tables'):
+            muscle.tables = tables if name == 'tables' else None
+            best = float('inf')
+            for trial in range(5):
+                arm = weiwei_arm_model.ArmModel()
+                start = time.perf_counter()
+                jit.rollout(arm, muscle, commands, DELTA_TIME,
+                            backend='numba')
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+
+        self.assertGreater(timings['exact'] / timings['tables'],
+                           MIN_TABLES_SPEEDUP)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(JitTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import mitrovic_muscle_model
+
+MUSCLE_MODULES = (kambara_muscle_model,
+                  mitrovic_muscle_model)
+
+DELTA_TIME = 0.005
+NUM_STATES = 100
+
+def random_states(rng):
+    angles = rng.uniform(-0.5, 2., (NUM_STATES, 2))
+    velocities = rng.uniform(-3., 3., (NUM_STATES, 2))
+    commands = rng.uniform(-0.2, 1.2, (NUM_STATES, 6))
+    return angles, velocities, commands
+
+
+class KelvinVoigtMuscleModelTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def test_intermediate_values(self):
+        "The torque is the one of the muscle model pipeline."
+        rng = np.random.RandomState(0)
+        for muscle_module in MUSCLE_MODULES:
+            muscle = muscle_module.MuscleModel()
+            for q, w, u in zip(*random_states(rng)):
+                filtered_command = muscle.filter_command(u)
+                values = muscle.intermediate_values(q, w, filtered_command)
+                np.testing.assert_allclose(
+                                muscle.compute_torque(q, w, u, record=False),
+                                muscle.torque(values['tension']),
+                                rtol=1e-12, atol=1e-12)
+
+    def test_batch(self):
+        rng = np.random.RandomState(0)
+        for muscle_module in MUSCLE_MODULES:
+            muscle = muscle_module.MuscleModel()
+            angles, velocities, commands = random_states(rng)
+
+            torque = muscle.compute_torque(angles, velocities, commands)
+            self.assertEqual(torque.shape, (NUM_STATES, 2))
+
+            for i in range(NUM_STATES):
+                np.testing.assert_array_equal(torque[i],
+                                              muscle.compute_torque(
+                                                            angles[i],
+                                                            velocities[i],
+                                                            commands[i],
+                                                            record=False))
+
+    def test_record(self):
+        muscle = kambara_muscle_model.MuscleModel()
+        muscle.compute_torque(np.zeros(2), np.zeros(2), np.ones(6))
+        np.testing.assert_allclose(fig.SUBFIGS['stiffness']['ydata'][-1],
+                                   muscle.k0 + muscle.k1)
+
+    def test_coefficients_cache(self):
+        muscle = kambara_muscle_model.MuscleModel()
+        q, w, u = np.array([0.5, 1.]), np.array([0.1, -0.2]), np.ones(6)
+        torque = muscle.compute_torque(q, w, u, record=False)
+
+        muscle.k1 = 2. * muscle.k1
+        self.assertFalse(np.allclose(muscle.compute_torque(q, w, u,
+                                                           record=False),
+                                     torque))
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(KelvinVoigtMuscleModelTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
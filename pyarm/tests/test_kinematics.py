@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import math
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.kinematics import finite_difference_method
+from pyarm.model.kinematics import runge_kutta_4
+from pyarm.model.kinematics import runge_kutta_45
+from pyarm.model.kinematics import velocity_verlet
+
+# Integrators and their order of accuracy
+INTEGRATORS = ((finite_difference_method, 1),
+               (velocity_verlet, 2),
+               (runge_kutta_4, 4))
+
+PULSATION = 2. * math.pi
+
+def oscillator(velocity, angle):
+    "Harmonic oscillator with a light damping."
+    return -PULSATION**2 * angle - 0.1 * velocity
+
+def oscillator_error(integrator, delta_time, duration=1.):
+    "Integrate the oscillator and return the error on the final angle."
+    velocity, angle = np.zeros(2), np.array([1., 0.5])
+    for i in range(int(round(duration / delta_time))):
+        velocity, angle = integrator.step(oscillator, velocity, angle,
+                                          delta_time)
+
+    reference = runge_kutta_45.integrate(oscillator, np.zeros(2),
+                                         np.array([1., 0.5]), duration,
+                                         rtol=1e-12, atol=1e-12)
+    return np.abs(angle - reference.angle).max()
+
+
+class KinematicsTest(unittest.TestCase):
+
+    def test_order(self):
+        for integrator, order in INTEGRATORS:
+            error_1 = oscillator_error(integrator, 0.01)
+            error_2 = oscillator_error(integrator, 0.005)
+            self.assertTrue(error_1 / error_2 > 0.7 * 2**order,
+                            integrator.name)
+
+    def test_acceleration_0(self):
+        # A given initial acceleration replaces the first evaluation
+        for integrator, order in INTEGRATORS:
+            velocity, angle = np.array([0.1, 0.2]), np.array([0.3, 0.4])
+            expected = integrator.step(oscillator, velocity, angle, 0.01)
+            result = integrator.step(oscillator, velocity, angle, 0.01,
+                                     oscillator(velocity, angle))
+            np.testing.assert_array_equal(result[0], expected[0])
+            np.testing.assert_array_equal(result[1], expected[1])
+
+    def test_rk45(self):
+        self.assertTrue(oscillator_error(runge_kutta_45, 0.1) < 1e-5)
+
+    def test_rk45_dense_output(self):
+        solution = runge_kutta_45.integrate(oscillator, np.zeros(2),
+                                            np.array([1., 0.5]), 1.)
+        self.assertTrue(len(solution.times) > 1)
+
+        for time in (0., 0.123, 0.5, 0.777, 1.):
+            reference = runge_kutta_45.integrate(oscillator, np.zeros(2),
+                                                 np.array([1., 0.5]), time,
+                                                 rtol=1e-12, atol=1e-12)
+            velocity, angle = solution(time)
+            np.testing.assert_allclose(angle, reference.angle, atol=1e-6)
+            np.testing.assert_allclose(velocity, reference.velocity,
+                                       atol=1e-5)
+
+    def test_rk45_step_size(self):
+        "step() starts from the step size proposed by the previous call."
+        evaluations = []
+        def counted_oscillator(velocity, angle):
+            evaluations.append(angle)
+            return oscillator(velocity, angle)
+
+        runge_kutta_45._step_size = None
+        velocity, angle = np.zeros(2), np.array([1., 0.5])
+        counts = []
+        for i in range(10):
+            del evaluations[:]
+            velocity, angle = runge_kutta_45.step(counted_oscillator,
+                                                  velocity, angle, 0.05)
+            counts.append(len(evaluations))
+
+        # The first call rejects its first substep, the next ones start with
+        # an accepted step size
+        self.assertLess(sum(counts[1:]), (len(counts) - 1) * counts[0])
+        self.assertLess(runge_kutta_45._step_size, 0.05)
+
+    def test_arm_large_step(self):
+        "RK4 with a 5x larger step is more accurate than the Euler method."
+        fig.set_clock(clock_mod.SimulationtimeClock(0.005))
+
+        def run(integrator, delta_time):
+            arm = mitrovic_arm_model.ArmModel(True, integrator)
+            arm.angles = np.array([0.5, 1.])
+            for i in range(int(round(1. / delta_time))):
+                arm.compute_acceleration(np.array([0.3, -0.2]), delta_time)
+            return arm.angles
+
+        reference = run(runge_kutta_45, 0.005)
+        euler_error = np.abs(run(finite_difference_method, 0.005)
+                             - reference).max()
+        rk4_error = np.abs(run(runge_kutta_4, 0.025) - reference).max()
+        self.assertTrue(rk4_error < euler_error)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(KinematicsTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import log_archive
+from pyarm import telemetry
+from pyarm import clock as clock_mod
+
+DELTA_TIME = 0.005
+NUM_STEPS = 500
+
+class LogArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test' + log_archive.EXTENSION)
+
+        # Channels recorded every step, every other step and with explicit x
+        clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        timebase = telemetry.Timebase()
+        self.channels = {
+            'angles': telemetry.Channel(timebase, title='Angle',
+                                        ylabel='Angle (rd)',
+                                        legend=('shoulder', 'elbow')),
+            'sparse': telemetry.Channel(timebase, title='Sparse',
+                                        ylim=[-1, 1]),
+            'explicit': telemetry.Channel(timebase, title='Explicit'),
+            'empty': telemetry.Channel(timebase, title='Empty')}
+
+        for step in range(NUM_STEPS):
+            clock.update()
+            index = timebase.index(clock.time)
+            self.channels['angles'].append(np.array([step, -step]), index)
+            if step % 2:
+                self.channels['sparse'].append(float(step), index)
+            self.channels['explicit'].append_x(step, 2. * step)
+
+        log_archive.save(self.path, self.channels, timebase,
+                         {'arm': 'Mitrovic', 'delta_time': DELTA_TIME})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load(self):
+        for mmap in (True, False):
+            archive = log_archive.LogArchive(self.path, mmap)
+            self.assertEqual(set(archive), set(self.channels))
+            self.assertEqual(archive.metadata['delta_time'], DELTA_TIME)
+
+            for name, channel in self.channels.items():
+                np.testing.assert_array_equal(archive[name]['xdata'],
+                                              channel['xdata'])
+                np.testing.assert_array_equal(archive[name]['ydata'],
+                                              channel['ydata'])
+                self.assertEqual(archive[name]['title'], channel['title'])
+
+            self.assertEqual(archive['angles']['legend'],
+                             ['shoulder', 'elbow'])
+            self.assertEqual(archive['angles']['unit'], 'rd')
+            self.assertEqual(archive['sparse']['ylim'], [-1, 1])
+
+        self.assertIsInstance(archive.time, np.ndarray)
+        archive = log_archive.LogArchive(self.path)
+        self.assertIsInstance(archive['angles']['ydata'], np.memmap)
+
+    def test_export_text(self):
+        filenames = log_archive.export_text(self.path, self.directory, 'run_')
+        self.assertEqual(len(filenames), len(self.channels))
+
+        data = np.loadtxt(os.path.join(self.directory, 'run_angles.log'))
+        np.testing.assert_array_equal(data[:, 0],
+                                      self.channels['angles']['xdata'])
+        np.testing.assert_array_equal(data[:, 1:],
+                                      self.channels['angles']['ydata'])
+
+    def test_not_an_archive(self):
+        path = os.path.join(self.directory, 'test.log')
+        np.savetxt(path, np.zeros([3, 3]))
+        self.assertRaises(ValueError, log_archive.LogArchive, path)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(LogArchiveTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import numpy as np
+
+from pyarm import fig
+from pyarm import log_archive
+from pyarm import log_stream
+from pyarm import telemetry
+from pyarm import clock as clock_mod
+
+DELTA_TIME = 0.005
+NUM_STEPS = 2000
+
+def make_channels(timebase):
+    return {'angles': telemetry.Channel(timebase, title='Angle',
+                                        ylabel='Angle (rd)',
+                                        legend=('shoulder', 'elbow')),
+            'sparse': telemetry.Channel(timebase, title='Sparse'),
+            'late': telemetry.Channel(timebase, title='Late'),
+            'explicit': telemetry.Channel(timebase, title='Explicit')}
+
+def record(channels, timebase, num_steps, writer=None, flush_every=None,
+           dropped=()):
+    """Record the same samples in 'channels' (streamed if 'writer' is set,
+    flushed every 'flush_every' steps, the chunks 'dropped' are dropped)."""
+    clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+    for step in range(num_steps):
+        clock.update()
+        if writer is not None:
+            if flush_every and step > 0 and step % flush_every == 0:
+                if step // flush_every - 1 in dropped:
+                    # The queue looks full
+                    with writer._condition:
+                        writer._queued_bytes += writer.memory_cap
+                    writer.flush()
+                    with writer._condition:
+                        writer._queued_bytes -= writer.memory_cap
+                else:
+                    writer.flush()
+            writer.step()
+        index = timebase.index(clock.time)
+        channels['angles'].append(np.array([step, -step]), index)
+        if step % 3 == 0:
+            channels['sparse'].append(float(step), index)
+        if step >= num_steps // 2:
+            channels['late'].append(float(step), index)
+        if step % 7 == 0:
+            channels['explicit'].append_x(step, 2. * step)
+
+class LogStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test' + log_stream.EXTENSION)
+        self.archive_path = os.path.join(self.directory,
+                                         'test' + log_archive.EXTENSION)
+
+        self.timebase = telemetry.Timebase()
+        self.channels = make_channels(self.timebase)
+        record(self.channels, self.timebase, NUM_STEPS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def stream(self, num_steps=NUM_STEPS, **options):
+        timebase = telemetry.Timebase()
+        channels = make_channels(timebase)
+        writer = log_stream.StreamWriter(self.path, channels, timebase,
+                                         flush_interval=1e9,
+                                         metadata={'arm': 'Mitrovic'})
+        record(channels, timebase, num_steps, writer, **options)
+        writer.close()
+        self.assertEqual(len(timebase), 0)
+        return writer
+
+    def check_archive(self, archive, kept_steps):
+        "Compare the archive with the kept steps of the reference channels."
+        time = self.timebase.array()
+        np.testing.assert_array_equal(archive.time, time[kept_steps])
+
+        for name, channel in self.channels.items():
+            x = channel['xdata']
+            steps = x / 2. if name == 'explicit' else x / DELTA_TIME - 1
+            kept = np.isin(np.round(steps).astype(int), kept_steps)
+            np.testing.assert_array_equal(archive[name]['ydata'],
+                                          channel['ydata'][kept])
+            np.testing.assert_array_equal(archive[name]['xdata'], x[kept])
+            self.assertEqual(archive[name]['title'], channel['title'])
+
+    def test_stream(self):
+        writer = self.stream(flush_every=150)
+        self.assertEqual(writer.chunks, NUM_STEPS // 150 + 1)
+        self.assertEqual(writer.dropped_chunks, 0)
+
+        log_stream.convert(self.path, self.archive_path)
+        archive = log_archive.LogArchive(self.archive_path)
+        self.assertEqual(archive.metadata, {'arm': 'Mitrovic'})
+        self.assertIn('start', archive['angles'].description)
+        self.check_archive(archive, np.arange(NUM_STEPS))
+
+    def test_dropped_chunk(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            writer = self.stream(flush_every=400, dropped=(1,))
+        self.assertEqual(writer.dropped_chunks, 1)
+        self.assertEqual(writer.dropped_samples, 400)
+
+        log_stream.convert(self.path, self.archive_path)
+        archive = log_archive.LogArchive(self.archive_path)
+        steps = np.arange(NUM_STEPS)
+        self.check_archive(archive, steps[(steps < 400) | (steps >= 800)])
+
+    def test_memory_cap(self):
+        timebase = telemetry.Timebase()
+        channels = make_channels(timebase)
+        memory_cap = 2**16
+        writer = log_stream.StreamWriter(self.path, channels, timebase,
+                                         flush_interval=1e9,
+                                         memory_cap=memory_cap)
+        clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        for step in range(10 * NUM_STEPS):
+            clock.update()
+            writer.step()
+            channels['angles'].append(np.array([step, -step]),
+                                      timebase.index(clock.time))
+            size = timebase.nbytes() + sum(channel.nbytes() for channel
+                                           in channels.values())
+            self.assertLessEqual(size, memory_cap)
+        writer.close()
+
+        self.assertLess(writer.max_steps, telemetry.CAPACITY)
+        self.assertEqual(sum(header['time']['shape'][0] for header
+                             in log_stream.records(self.path))
+                         + writer.dropped_samples, 10 * NUM_STEPS)
+
+    def test_truncated(self):
+        self.stream(flush_every=500)
+
+        num_records = len(log_stream.records(self.path))
+        with open(self.path, 'r+b') as log_file:
+            log_file.truncate(os.path.getsize(self.path) - 10)
+        self.assertEqual(len(log_stream.records(self.path)), num_records - 1)
+
+        log_stream.convert(self.path, self.archive_path)
+        archive = log_archive.LogArchive(self.archive_path)
+        self.check_archive(archive, np.arange(NUM_STEPS - 500))
+
+    def test_fig_stream(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+        fig.set_log_dirname(self.directory)
+        fig.subfig('stream test', title='Stream test')
+        try:
+            fig.start_stream({'arm': 'Mitrovic'}, flush_interval=0.)
+            for step in range(100):
+                fig.CLOCK.update()
+                fig.append('stream test', step)
+            path = fig.save_log()
+            self.assertIsNone(fig.STREAM)
+
+            archive = log_archive.LogArchive(path)
+            self.assertEqual(archive.metadata, {'arm': 'Mitrovic'})
+            np.testing.assert_array_equal(archive['stream test']['ydata'],
+                                          np.arange(100))
+
+            np.testing.assert_allclose(archive['stream test']['xdata'],
+                                       DELTA_TIME * np.arange(1, 101))
+
+            fig.load_log(path)
+            np.testing.assert_array_equal(fig.SUBFIGS['stream test']['ydata'],
+                                          np.arange(100))
+        finally:
+            if fig.STREAM is not None:
+                fig.stop_stream()
+            fig.set_log_dirname('pyarm_logs')
+            fig.SUBFIGS.clear()
+            fig.DECLARED.clear()
+
+    def test_not_a_stream(self):
+        path = os.path.join(self.directory, 'test.log')
+        np.savetxt(path, np.zeros([3, 3]))
+        self.assertRaises(ValueError, log_stream.records, path)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(LogStreamTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
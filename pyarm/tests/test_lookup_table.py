@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.muscle import weiwei_muscle_model
+from pyarm.model.muscle import lookup_table
+
+DELTA_TIME = 0.005
+NUM_STATES = 100
+
+class LookupTableTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+        self.muscle = weiwei_muscle_model.MuscleModel()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_grid_points(self):
+        x = np.linspace(0., 1., 11)
+        values = np.sin(3. * x)[:, np.newaxis] * np.cos(x)
+        for method in lookup_table.METHODS:
+            table = lookup_table.Table([(0., 1., 11), (0., 1., 11)],
+                                       values, method)
+            np.testing.assert_allclose(table(x[:, np.newaxis], x),
+                                       values, atol=1e-12)
+
+    def test_error(self):
+        for method in lookup_table.METHODS:
+            tables = lookup_table.LiTables(self.muscle, method=method)
+            error = tables.error(num_samples=10000)
+            self.assertLess(error['tension'], 1e-4)
+
+    def test_tension(self):
+        rng = np.random.RandomState(0)
+        angles = rng.uniform(0.3, 1.5, (NUM_STATES, 2))
+        velocities = rng.uniform(-2., 2., (NUM_STATES, 2))
+        commands = rng.uniform(-0.2, 1.2, (NUM_STATES, 6))
+
+        exact = self.muscle.compute_torque(angles, velocities, commands)
+        self.muscle.tables = lookup_table.LiTables(self.muscle)
+        torque = self.muscle.compute_torque(angles, velocities, commands)
+        np.testing.assert_allclose(torque, exact, atol=1e-5)
+
+    def test_out_of_grid(self):
+        "The tables are clamped to the grids with a warning."
+        tables = lookup_table.LiTables(self.muscle, ml_grid=(0.3, 0.5, 201))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            tables.tension(np.array([0.25, 0.4]), np.zeros(2), np.ones(2))
+        self.assertEqual(len(caught), 1)
+        self.assertIn('muscle length', str(caught[0].message))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            error = tables.error(num_samples=10000)
+        self.assertLess(error['tension'], 1e-4)
+        self.assertGreater(error['out_of_grid'], 10. * error['tension'])
+
+    def test_save_load(self):
+        path = os.path.join(self.directory, 'tables.npz')
+        grid = (0.3, 0.5, 21)
+
+        tables = lookup_table.load_or_build(path, self.muscle, ml_grid=grid)
+        self.assertTrue(os.path.exists(path))
+
+        loaded = lookup_table.load_or_build(path, self.muscle, ml_grid=grid,
+                                            method='cubic')
+        self.assertEqual(loaded.ml_grid, grid)
+        self.assertEqual(loaded.method, 'cubic')
+        for name in ('fa', 'force'):
+            np.testing.assert_array_equal(getattr(loaded, name).values,
+                                          getattr(tables, name).values)
+
+        # Other grids: the tables are rebuilt
+        rebuilt = lookup_table.load_or_build(path, self.muscle)
+        self.assertEqual(rebuilt.ml_grid, lookup_table.ML_GRID)
+        self.assertEqual(lookup_table.load(path).ml_grid, lookup_table.ML_GRID)
+
+    def test_method(self):
+        self.assertRaises(ValueError, lookup_table.LiTables, self.muscle,
+                          method='nearest')
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(LookupTableTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import mitrovic_muscle_model
+from pyarm.model.muscle import weiwei_muscle_model
+from pyarm.model.muscle import moment_arm
+
+DELTA_TIME = 0.005
+NUM_STATES = 100
+EPSILON = 1e-6
+
+MUSCLE_MODULES = (kambara_muscle_model,
+                  mitrovic_muscle_model,
+                  weiwei_muscle_model)
+
+A = mitrovic_muscle_model.MuscleModel.A
+
+def models():
+    "Cosine and polynomial moment arm models."
+    coefficients = np.stack([A, 0.01 * np.ones([6, 2]),
+                             -0.005 * np.ones([6, 2])], axis=-1)
+    return (moment_arm.CosineMomentArm(A, 0.7),
+            moment_arm.PolynomialMomentArm(coefficients))
+
+class MomentArmTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+        rng = np.random.RandomState(0)
+        self.angles = rng.uniform(-2., 2., (NUM_STATES, 2))
+        self.velocities = rng.uniform(-2., 2., (NUM_STATES, 2))
+        self.commands = rng.uniform(0., 1., (NUM_STATES, 6))
+
+    def test_excursion(self):
+        "The excursion is the integral of the moment arms."
+        for model in models() + (moment_arm.PostureTable(models()[0]),):
+            np.testing.assert_array_equal(model.excursion(np.zeros(2)),
+                                          np.zeros(6))
+            for j in range(2):
+                dq = np.zeros(2)
+                dq[j] = EPSILON
+                derivative = (model.excursion(self.angles + dq)
+                              - model.excursion(self.angles - dq)) \
+                             / (2. * EPSILON)
+                np.testing.assert_allclose(derivative,
+                                           model(self.angles)[:, :, j],
+                                           atol=1e-9)
+
+                derivative = (model(self.angles + dq)
+                              - model(self.angles - dq)) / (2. * EPSILON)
+                np.testing.assert_allclose(derivative[:, :, j],
+                                           model.slope(self.angles)[:, :, j],
+                                           atol=1e-4)
+
+    def test_posture_table(self):
+        for model in models():
+            table = moment_arm.PostureTable(model)
+            np.testing.assert_allclose(table(self.angles),
+                                       model(self.angles), atol=1e-6)
+            np.testing.assert_allclose(table.excursion(self.angles),
+                                       model.excursion(self.angles),
+                                       atol=1e-6)
+            np.testing.assert_allclose(table(self.angles[0]),
+                                       model(self.angles[0]), atol=1e-6)
+
+    def test_constant_model(self):
+        "A degree 0 polynomial gives the constant moment arm torque."
+        for muscle_module in MUSCLE_MODULES:
+            muscle = muscle_module.MuscleModel()
+            torque = muscle.compute_torque(self.angles, self.velocities,
+                                           self.commands)
+            coefficients = muscle.moment_arm(None)[:, :, np.newaxis]
+            muscle.moment_arm_model = moment_arm.PolynomialMomentArm(
+                                                                coefficients)
+            np.testing.assert_allclose(muscle.compute_torque(self.angles,
+                                                             self.velocities,
+                                                             self.commands),
+                                       torque, rtol=1e-10, atol=1e-12)
+
+    def test_single_state(self):
+        for muscle_module in MUSCLE_MODULES:
+            muscle = muscle_module.MuscleModel()
+            muscle.moment_arm_model = moment_arm.PostureTable(models()[0])
+            torque = muscle.compute_torque(self.angles, self.velocities,
+                                           self.commands)
+            for i in range(NUM_STATES):
+                np.testing.assert_allclose(muscle.compute_torque(
+                                                          self.angles[i],
+                                                          self.velocities[i],
+                                                          self.commands[i]),
+                                           torque[i], rtol=1e-12,
+                                           atol=1e-15)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(MomentArmTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
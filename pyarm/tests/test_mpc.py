@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+import pyarm
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.agent import mpc
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.muscle import fake_muscle_model
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import mitrovic_muscle_model
+from pyarm.model.muscle import weiwei_muscle_model
+
+DELTA_TIME = 0.01
+NUM_STEPS = 100
+
+class MPCTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def run_agent(self, agent):
+        return pyarm.simulate(mitrovic_arm_model.ArmModel(),
+                              mitrovic_muscle_model.MuscleModel(),
+                              agent, NUM_STEPS, DELTA_TIME)
+
+    def test_reaching(self):
+        agent = mpc.Agent()
+        agent.budget = 1.
+        trajectory = self.run_agent(agent)
+
+        np.testing.assert_allclose(trajectory['angles'][-1], mpc.TARGET,
+                                   atol=0.01)
+        self.assertEqual(agent.ticks, NUM_STEPS)
+        self.assertEqual(agent.replans, NUM_STEPS // mpc.REPLAN_INTERVAL)
+        self.assertEqual(agent.deadline_misses, 0)
+
+    def test_deadline_misses(self):
+        agent = mpc.Agent()
+        agent.budget = 0.
+        self.run_agent(agent)
+
+        self.assertEqual(agent.deadline_misses, NUM_STEPS)
+        self.assertEqual(agent.solver.iterations, 0)
+        self.assertTrue(agent.solver.timed_out)
+        self.assertTrue('%d deadline misses' % NUM_STEPS in agent.report())
+
+    def test_model_solver(self):
+        "The solver plans with the models of the simulated arm."
+        models = ((kambara_arm_model, kambara_muscle_model, 6),
+                  (weiwei_arm_model, weiwei_muscle_model, 6),
+                  (mitrovic_arm_model, fake_muscle_model, 2))
+
+        for arm_module, muscle_module, num_commands in models:
+            agent = mpc.Agent(arm_class=arm_module.ArmModel,
+                              muscle_class=muscle_module.MuscleModel)
+            agent.budget = 1.
+            self.assertEqual(agent.solver.arm.name,
+                             arm_module.ArmModel.name)
+            self.assertEqual(agent.solver.muscle.name,
+                             muscle_module.MuscleModel.name)
+
+            trajectory = pyarm.simulate(arm_module.ArmModel(),
+                                        muscle_module.MuscleModel(),
+                                        agent, 10, DELTA_TIME)
+            self.assertEqual(trajectory['commands'].shape,
+                             (10, num_commands))
+            self.assertTrue(np.isfinite(agent.solver.cost))
+
+    def test_model_mismatch(self):
+        "The default internal model doesn't match the Kambara models."
+        agent = mpc.Agent()
+        self.assertRaises(ValueError, pyarm.simulate,
+                          kambara_arm_model.ArmModel(),
+                          kambara_muscle_model.MuscleModel(),
+                          agent, NUM_STEPS, DELTA_TIME)
+        self.assertEqual(agent.ticks, 0)
+
+        make_solver = mpc.model_solver(kambara_arm_model.ArmModel,
+                                       kambara_muscle_model.MuscleModel)
+        agent = mpc.Agent(make_solver)
+        agent.check_models(kambara_arm_model.ArmModel(),
+                           kambara_muscle_model.MuscleModel())
+
+        self.assertRaises(ValueError, mpc.Agent,
+                          arm_class=kambara_arm_model.ArmModel)
+
+    def test_shift(self):
+        commands = np.arange(10.).reshape(5, 2)
+        np.testing.assert_array_equal(mpc.shift(commands, 2),
+                                      [[4., 5.], [6., 7.], [8., 9.],
+                                       [8., 9.], [8., 9.]])
+        np.testing.assert_array_equal(mpc.shift(commands, 10),
+                                      [[8., 9.]] * 5)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(MPCTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import threading
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.recorder import Recorder
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.muscle import mitrovic_muscle_model
+
+DELTA_TIME = 0.005
+NUM_STEPS = 200
+
+def simulate(recorder, command, delta_time=DELTA_TIME):
+    "Run a simulation recorded into 'recorder'."
+    arm = mitrovic_arm_model.ArmModel(recorder=recorder)
+    muscle = mitrovic_muscle_model.MuscleModel(recorder)
+    clock = clock_mod.SimulationtimeClock(delta_time)
+    recorder.clock = clock
+    for step in range(NUM_STEPS):
+        clock.update()
+        torque = muscle.compute_torque(arm.angles, arm.velocities, command)
+        arm.compute_acceleration(torque, clock.delta_time)
+    return arm
+
+class RecorderTest(unittest.TestCase):
+
+    def test_separate_recorders(self):
+        "Two simulations recorded at the same time do not mix their samples."
+        reference = Recorder()
+        simulate(reference, np.full(6, 0.2))
+
+        recorders = [Recorder(), Recorder()]
+        threads = [threading.Thread(target=simulate,
+                                    args=(recorders[0], np.full(6, 0.2))),
+                   threading.Thread(target=simulate,
+                                    args=(recorders[1], np.zeros(6), 0.01))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for recorder in recorders:
+            self.assertEqual(len(recorder.timebase), NUM_STEPS)
+        np.testing.assert_array_equal(recorders[0].subfigs['joint_angles']
+                                                           ['ydata'],
+                                      reference.subfigs['joint_angles']
+                                                       ['ydata'])
+        np.testing.assert_allclose(recorders[1].subfigs['command']['xdata'],
+                                   0.01 * np.arange(1, NUM_STEPS + 1))
+        self.assertEqual(recorders[1].subfigs['command']['ydata'].max(), 0.)
+
+    def test_select(self):
+        recorder = Recorder()
+        recorder.select('joint_*')
+        arm = simulate(recorder, np.full(6, 0.2))
+        self.assertEqual(set(recorder.subfigs), {'joint_angles'})
+        self.assertIs(arm.recorder, recorder)
+
+    def test_default_recorder(self):
+        "The fig module variables are the attributes of fig.RECORDER."
+        clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        fig.set_clock(clock)
+        self.assertIs(fig.RECORDER.clock, clock)
+        self.assertIs(fig.CLOCK, clock)
+        self.assertIs(fig.SUBFIGS, fig.RECORDER.subfigs)
+
+        fig.set_fig_dirname('test_figs')
+        try:
+            self.assertEqual(fig.RECORDER.fig_dirname, 'test_figs')
+            self.assertEqual(fig.FIG_DIRNAME, 'test_figs')
+        finally:
+            fig.set_fig_dirname('pyarm_figs')
+
+        arm = mitrovic_arm_model.ArmModel()
+        self.assertIs(arm.recorder, fig.RECORDER)
+        self.assertRaises(AttributeError, getattr, fig, 'UNKNOWN')
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(RecorderTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
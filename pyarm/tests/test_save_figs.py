@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+
+DELTA_TIME = 0.005
+NUM_STEPS = 200
+
+class SaveFigsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.subfigs = dict(fig.SUBFIGS)
+        fig.SUBFIGS.clear()
+
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+        fig.subfig('figs test angles', xlabel='time (s)',
+                   ylabel='Angle (rd)', legend=('shoulder', 'elbow'))
+        fig.subfig('figs test command', ylim=[-0.1, 1.1],
+                   legend=('1', '2', '3', '4', '5', '6'))
+        fig.subfig('figs test sparse')
+        for step in range(NUM_STEPS):
+            fig.CLOCK.update()
+            fig.append('figs test angles', np.array([np.sin(0.1 * step),
+                                                     np.cos(0.1 * step)]))
+            fig.append('figs test command', np.full(6, (step % 10) / 10.))
+            if step % 5 == 0:
+                fig.append('figs test sparse', step)
+
+    def tearDown(self):
+        fig.set_fig_dirname('pyarm_figs')
+        fig.SUBFIGS.clear()
+        fig.SUBFIGS.update(self.subfigs)
+        shutil.rmtree(self.directory)
+
+    def read_figs(self, directory):
+        fig.set_fig_dirname(os.path.join(self.directory, directory))
+        files = {}
+        for filename in os.listdir(fig.FIG_DIRNAME):
+            with open(os.path.join(fig.FIG_DIRNAME, filename), 'rb') as png:
+                files[filename] = png.read()
+        return files
+
+    def test_identical_files(self):
+        fig.set_fig_dirname(os.path.join(self.directory, 'serial'))
+        fig.save_all_figs(1)
+        fig.set_fig_dirname(os.path.join(self.directory, 'pool'))
+        fig.save_all_figs(2)
+
+        serial = self.read_figs('serial')
+        self.assertEqual(len(serial), len(fig.SUBFIGS))
+        self.assertEqual(serial, self.read_figs('pool'))
+
+        # save_fig() draws the same figure
+        fig.set_fig_dirname(os.path.join(self.directory, 'serial'))
+        filename = fig.FILE_PREFIX + 'figs test sparse.png'
+        os.remove(os.path.join(fig.FIG_DIRNAME, filename))
+        fig.save_fig('figs test sparse')
+        self.assertEqual(self.read_figs('serial')[filename], serial[filename])
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(SaveFigsTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+import pyarm
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.agent import sigmoid
+from pyarm.model.arm import kambara_arm_model
+from pyarm.model.arm import weiwei_arm_model
+from pyarm.model.muscle import kambara_muscle_model
+from pyarm.model.muscle import weiwei_muscle_model
+
+DELTA_TIME = 0.005
+NUM_STEPS = 1000
+
+class SimulationTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+
+    def test_simulate(self):
+        models = ((kambara_arm_model, kambara_muscle_model),
+                  (weiwei_arm_model, weiwei_muscle_model))
+
+        for arm_module, muscle_module in models:
+            # Reference: the pyarm mainloop
+            arm = arm_module.ArmModel()
+            muscle = muscle_module.MuscleModel()
+            agent = sigmoid.Agent()
+            clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+            fig.set_clock(clock)
+
+            angles = []
+            for step in range(NUM_STEPS):
+                clock.update()
+                commands = agent.get_commands(arm.angles, arm.velocities,
+                                              clock.time)
+                torque = muscle.compute_torque(arm.angles, arm.velocities,
+                                               commands)
+                arm.compute_acceleration(torque, clock.delta_time)
+                angles.append(arm.angles)
+
+            simulated_arm = arm_module.ArmModel()
+            num_samples = len(fig.SUBFIGS['joint_angles']['ydata'])
+
+            trajectory = pyarm.simulate(simulated_arm,
+                                        muscle,
+                                        agent,
+                                        NUM_STEPS,
+                                        DELTA_TIME)
+
+            # No side effect on fig
+            self.assertEqual(len(fig.SUBFIGS['joint_angles']['ydata']),
+                             num_samples)
+
+            np.testing.assert_allclose(trajectory['angles'], angles,
+                                       rtol=1e-12, atol=1e-12)
+            np.testing.assert_allclose(trajectory['time'][-1],
+                                       NUM_STEPS * DELTA_TIME)
+            self.assertEqual(trajectory['commands'].shape, (NUM_STEPS, 6))
+            self.assertEqual(trajectory['velocities'].shape, (NUM_STEPS, 2))
+
+    def test_no_agent(self):
+        trajectory = pyarm.simulate(kambara_arm_model.ArmModel(),
+                                    kambara_muscle_model.MuscleModel(),
+                                    None,
+                                    10,
+                                    DELTA_TIME)
+        np.testing.assert_array_equal(trajectory['commands'],
+                                      np.zeros([10, 6]))
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(SimulationTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
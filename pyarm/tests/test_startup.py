@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import pyarm
+
+# Modules imported by the headless workers
+HEADLESS_MODULES = ('pyarm.model.arm.mitrovic_arm_model',
+                    'pyarm.model.muscle.mitrovic_muscle_model',
+                    'pyarm.model.dirty_wrapper',
+                    'pyarm.simulation')
+
+# Modules only imported when a figure is shown or saved (they make up most of
+# the former startup time: this check runs by default, unlike the timing)
+LAZY_MODULES = ('matplotlib', 'multiprocessing')
+
+NUM_RUNS = 5
+MAX_OVERHEAD = 0.15     # Import time of the model above numpy's (s)
+
+# The wall clock timing depends on the machine load: it is only checked when
+# this environment variable is set (e.g. PYARM_BENCHMARK=1)
+BENCHMARK_VARIABLE = 'PYARM_BENCHMARK'
+
+def run(code):
+    "Run 'code' in a new interpreter and return its output."
+    root = os.path.dirname(os.path.dirname(os.path.abspath(pyarm.__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root, env.get('PYTHONPATH', '')])
+    return subprocess.check_output([sys.executable, '-c', code], env=env,
+                                   universal_newlines=True)
+
+def startup_time(module):
+    "Return the best time of NUM_RUNS interpreters importing 'module'."
+    times = []
+    for i in range(NUM_RUNS):
+        start = time.perf_counter()
+        run('import ' + module)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+class StartupTest(unittest.TestCase):
+
+    def test_lazy_imports(self):
+        "Matplotlib is only imported when a figure is shown or saved."
+        for module in HEADLESS_MODULES:
+            output = run('import sys, ' + module + '\n'
+                         'print([name for name in ' + repr(LAZY_MODULES)
+                         + ' if name in sys.modules])')
+            self.assertEqual(output.strip(), '[]', module)
+
+    @unittest.skipUnless(os.environ.get(BENCHMARK_VARIABLE),
+                         BENCHMARK_VARIABLE + ' is not set')
+    def test_startup_time(self):
+        model = startup_time('pyarm.model.arm.mitrovic_arm_model')
+        numpy = startup_time('numpy')
+        self.assertLess(model - numpy, MAX_OVERHEAD)
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(StartupTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
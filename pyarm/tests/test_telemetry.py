@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import numpy as np
+
+from pyarm import fig
+from pyarm import telemetry
+from pyarm import clock as clock_mod
+from pyarm.model.arm import mitrovic_arm_model
+from pyarm.model.muscle import mitrovic_muscle_model
+
+DELTA_TIME = 0.005
+NUM_STEPS = 3000
+
+class TelemetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        fig.set_clock(self.clock)
+
+    def test_column(self):
+        column = telemetry.Column(capacity=4)
+        rows = np.arange(30.).reshape(10, 3)
+        for row in rows:
+            column.append(row)
+        column.extend(rows)
+        np.testing.assert_array_equal(column.array(),
+                                      np.concatenate([rows, rows]))
+        self.assertEqual(len(column), 20)
+        self.assertRaises(ValueError, column.append, np.zeros(4))
+
+    def test_shared_timebase(self):
+        fig.subfig('test every step')
+        fig.subfig('test every other step')
+        fig.subfig('test scalar')
+
+        times = []
+        for step in range(NUM_STEPS):
+            self.clock.update()
+            times.append(self.clock.time)
+            fig.append('test every step', np.array([step, -step]))
+            fig.append('test scalar', float(step))
+            if step % 2 == 0:
+                fig.append('test every other step', [step])
+
+        channel = fig.SUBFIGS['test every step']
+        np.testing.assert_array_equal(channel['xdata'], times)
+        np.testing.assert_array_equal(channel['ydata'][-1],
+                                      [NUM_STEPS - 1, 1 - NUM_STEPS])
+        self.assertEqual(channel['ydata'].shape, (NUM_STEPS, 2))
+        self.assertIsNone(channel.indices)
+
+        self.assertEqual(fig.SUBFIGS['test scalar']['ydata'].shape,
+                         (NUM_STEPS,))
+
+        channel = fig.SUBFIGS['test every other step']
+        np.testing.assert_array_equal(channel['xdata'], times[::2])
+        np.testing.assert_array_equal(channel['ydata'][:, 0],
+                                      np.arange(0, NUM_STEPS, 2))
+
+    def test_explicit_x(self):
+        fig.subfig('test x')
+        self.clock.update()
+        fig.append('test x', 1.)
+        fig.append('test x', 2., x=10.)
+        self.clock.update()
+        fig.append('test x', 3.)
+        np.testing.assert_array_equal(fig.SUBFIGS['test x']['xdata'],
+                                      [DELTA_TIME, 10., 2. * DELTA_TIME])
+        np.testing.assert_array_equal(fig.SUBFIGS['test x']['ydata'],
+                                      [1., 2., 3.])
+
+    def test_properties(self):
+        fig.subfig('test properties', ylabel='y', legend=('a', 'b'))
+        channel = fig.SUBFIGS['test properties']
+        self.assertEqual(channel['title'], 'test properties')
+        self.assertEqual(channel['legend'], ('a', 'b'))
+        self.assertEqual(len(channel['xdata']), 0)
+        self.assertEqual(len(channel['ydata']), 0)
+
+class ChannelSelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        fig.set_clock(self.clock)
+
+    def tearDown(self):
+        fig.select(None)
+        fig.OBSERVERS.clear()
+
+    def run_models(self, num_steps=10):
+        "Run the Mitrovic models and count the derived values computations."
+        arm = mitrovic_arm_model.ArmModel()
+        muscle = mitrovic_muscle_model.MuscleModel()
+        counts = {'position': 0, 'intermediate': 0}
+
+        joints_position = arm.joints_position
+        def counted_joints_position():
+            counts['position'] += 1
+            return joints_position()
+        arm.joints_position = counted_joints_position
+
+        intermediate_values = muscle.intermediate_values
+        def counted_intermediate_values(*args):
+            counts['intermediate'] += 1
+            return intermediate_values(*args)
+        muscle.intermediate_values = counted_intermediate_values
+
+        for step in range(num_steps):
+            self.clock.update()
+            torque = muscle.compute_torque(arm.angles, arm.velocities,
+                                           [0.5] * 6)
+            arm.compute_acceleration(torque, DELTA_TIME)
+        return counts
+
+    def test_select(self):
+        fig.select('joint_angles, muscle *')
+        counts = self.run_models()
+
+        self.assertEqual(set(name for name in fig.SUBFIGS
+                             if name in fig.DECLARED
+                             and not name.startswith('test')),
+                         set(['joint_angles', 'muscle length',
+                              'muscle velocity']))
+        self.assertEqual(len(fig.SUBFIGS['joint_angles']['ydata']), 10)
+        self.assertEqual(counts, {'position': 0, 'intermediate': 10})
+
+        # Channels declared before the selection
+        fig.select(None)
+        self.assertIn('position', fig.SUBFIGS)
+        self.assertEqual(len(fig.SUBFIGS['joint_angles']['ydata']), 10)
+
+    def test_nothing_recorded(self):
+        fig.select([])
+        counts = self.run_models()
+        self.assertEqual(counts, {'position': 0, 'intermediate': 0})
+        self.assertNotIn('torque', fig.SUBFIGS)
+
+    def test_observe(self):
+        fig.select([])
+        samples = []
+        def callback(name, y, x):
+            samples.append((name, x, np.array(y)))
+        fig.observe('position', callback)
+
+        counts = self.run_models(5)
+        self.assertEqual(counts['position'], 5)
+        self.assertEqual([sample[1] for sample in samples],
+                         [DELTA_TIME * (step + 1) for step in range(5)])
+        self.assertEqual(samples[0][2].shape, (6,))
+        self.assertNotIn('position', fig.SUBFIGS)
+
+        fig.unobserve('position', callback)
+        self.assertFalse(fig.enabled('position'))
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(TelemetryTest),
+             unittest.TestLoader().loadTestsFromTestCase(ChannelSelectionTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from pyarm import log_archive
+from pyarm import telemetry
+from pyarm import trajectory_archive
+from pyarm import clock as clock_mod
+
+DELTA_TIME = 0.005
+NUM_STEPS = 10000
+CHUNK_SIZE = 1000
+
+class TrajectoryArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory,
+                                 'test' + trajectory_archive.EXTENSION)
+
+        # A smooth fixed rate channel, a sparse one and explicit x values
+        clock = clock_mod.SimulationtimeClock(DELTA_TIME)
+        self.timebase = telemetry.Timebase()
+        self.channels = {
+            'angles': telemetry.Channel(self.timebase, title='Angle',
+                                        ylabel='Angle (rd)',
+                                        legend=('shoulder', 'elbow')),
+            'sparse': telemetry.Channel(self.timebase, title='Sparse'),
+            'explicit': telemetry.Channel(self.timebase, title='Explicit'),
+            'empty': telemetry.Channel(self.timebase, title='Empty')}
+
+        for step in range(NUM_STEPS):
+            clock.update()
+            index = self.timebase.index(clock.time)
+            self.channels['angles'].append(np.array([np.sin(clock.time),
+                                                     np.cos(clock.time)]),
+                                           index)
+            if step % 3 == 0:
+                self.channels['sparse'].append(step, index)
+            self.channels['explicit'].append_x(-step, NUM_STEPS - step)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_filters(self):
+        rows = np.random.RandomState(0).normal(size=[100, 3])
+        for filters in [(), ('delta',), ('shuffle',), ('delta', 'shuffle')]:
+            data = trajectory_archive.encode(rows, filters)
+            np.testing.assert_array_equal(
+                    trajectory_archive.decode(data, rows.dtype, rows.shape,
+                                              filters),
+                    rows)
+
+    def test_load(self):
+        for codec in trajectory_archive.codecs():
+            trajectory_archive.save(self.path, self.channels,
+                                    {'arm': 'Mitrovic'}, CHUNK_SIZE,
+                                    codec=codec)
+            archive = trajectory_archive.TrajectoryArchive(self.path)
+            self.assertEqual(set(archive), set(self.channels))
+            self.assertEqual(archive.metadata, {'arm': 'Mitrovic'})
+
+            for name, channel in self.channels.items():
+                np.testing.assert_array_equal(archive[name]['xdata'],
+                                              channel['xdata'])
+                np.testing.assert_array_equal(archive[name]['ydata'],
+                                              channel['ydata'])
+                self.assertEqual(archive[name]['title'], channel['title'])
+            self.assertEqual(archive['angles']['unit'], 'rd')
+            archive.close()
+
+    def test_read(self):
+        trajectory_archive.save(self.path, self.channels,
+                                chunk_size=CHUNK_SIZE)
+        archive = trajectory_archive.TrajectoryArchive(self.path)
+
+        x = self.channels['angles']['xdata']
+        y = self.channels['angles']['ydata']
+        mask = (x >= 22.) & (x <= 23.)
+        read_x, read_y = archive.read('angles', 22., 23.)
+        np.testing.assert_array_equal(read_x, x[mask])
+        np.testing.assert_array_equal(read_y, y[mask])
+
+        # Only the chunk of the interval is decompressed (x and y)
+        self.assertEqual(archive.chunks_read, 2)
+
+        # Explicit (decreasing) x values
+        read_x, read_y = archive.read('explicit', None, 10)
+        np.testing.assert_array_equal(read_x, np.arange(10, 0, -1))
+        np.testing.assert_array_equal(read_y, read_x - NUM_STEPS)
+
+        read_x, read_y = archive.read('empty')
+        self.assertEqual(len(read_x), 0)
+        archive.close()
+
+    def test_compression_ratio(self):
+        trajectory_archive.save(self.path, self.channels,
+                                chunk_size=CHUNK_SIZE)
+
+        text_size = 0
+        for channel in self.channels.values():
+            text = io.BytesIO()
+            np.savetxt(text, np.c_[channel['xdata'], channel['ydata']])
+            text_size += len(gzip.compress(text.getvalue()))
+
+        self.assertLess(os.path.getsize(self.path), text_size)
+
+    def test_compress(self):
+        log_path = os.path.join(self.directory, 'test' + log_archive.EXTENSION)
+        log_archive.save(log_path, self.channels, self.timebase,
+                         {'arm': 'Mitrovic'})
+        trajectory_archive.compress(log_path, self.path)
+
+        archive = log_archive.open_archive(self.path)
+        self.assertIsInstance(archive, trajectory_archive.TrajectoryArchive)
+        self.assertEqual(archive.metadata, {'arm': 'Mitrovic'})
+        np.testing.assert_array_equal(archive['sparse']['xdata'],
+                                      self.channels['sparse']['xdata'])
+        archive.close()
+
+        filenames = log_archive.export_text(self.path, self.directory)
+        self.assertEqual(len(filenames), len(self.channels))
+
+    def test_not_an_archive(self):
+        path = os.path.join(self.directory, 'test.log')
+        np.savetxt(path, np.zeros([3, 3]))
+        self.assertRaises(ValueError, trajectory_archive.TrajectoryArchive,
+                          path)
+        self.assertRaises(ValueError, trajectory_archive.save, self.path,
+                          self.channels, codec='unknown')
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(TrajectoryArchiveTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
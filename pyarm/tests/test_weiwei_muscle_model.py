@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+import unittest
+import warnings
+import numpy as np
+
+from pyarm import fig
+from pyarm import clock as clock_mod
+from pyarm.model.muscle import weiwei_muscle_model
+
+DELTA_TIME = 0.005
+NUM_STATES = 100
+
+class WeiweiMuscleModelTest(unittest.TestCase):
+
+    def setUp(self):
+        fig.set_clock(clock_mod.SimulationtimeClock(DELTA_TIME))
+        self.muscle = weiwei_muscle_model.MuscleModel()
+
+    def test_batch(self):
+        rng = np.random.RandomState(0)
+        angles = rng.uniform(0.3, 1.5, (NUM_STATES, 2))
+        velocities = rng.uniform(-2., 2., (NUM_STATES, 2))
+        commands = rng.uniform(-0.2, 1.2, (NUM_STATES, 6))
+
+        torque = self.muscle.compute_torque(angles, velocities, commands)
+        self.assertEqual(torque.shape, (NUM_STATES, 2))
+
+        for i in range(NUM_STATES):
+            np.testing.assert_allclose(torque[i],
+                                       self.muscle.compute_torque(
+                                                       angles[i],
+                                                       velocities[i],
+                                                       commands[i],
+                                                       record=False),
+                                       rtol=1e-12, atol=1e-15)
+
+    def test_fv(self):
+        ml = np.array([0.3, 0.4, 0.5, 0.3, 0.4, 0.5])
+        mv = np.array([-1., -0.62, 0., 0.5, 1., 2.])
+
+        # Reference: the piecewise definition
+        expected = np.empty(6)
+        for i in range(6):
+            if mv[i] <= 0:
+                expected[i] = (-5.72 - mv[i]) \
+                              / (-5.72 + mv[i] * (1.38 + 2.09 * ml[i]))
+            else:
+                expected[i] = (0.62 - (-3.12 + 4.21 * ml[i]
+                                       - 2.67 * ml[i]**2) * mv[i]) \
+                              / (0.62 + mv[i])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            fv = self.muscle.fv(ml, mv)
+
+        np.testing.assert_allclose(fv, expected, rtol=1e-14)
+
+###
+
+def test_suite():
+    tests = [unittest.TestLoader().loadTestsFromTestCase(WeiweiMuscleModelTest)]
+    return unittest.TestSuite(tests)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
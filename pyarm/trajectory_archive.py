@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2010 Jérémie DECOCK (http://www.jdhp.org)
+
+"""Compressed trajectory archive of the recorded channels.
+
+Compact storage for large collections of runs. Each channel stores its x
+values and its samples in compressed chunks of CHUNK_SIZE rows; the header
+gives the x range of each chunk (the time index), so reading a time
+interval of a channel only decompresses the chunks which intersect it:
+
+    magic (8 bytes) | version (uint32) | header offset (uint64) | chunks
+    | header (JSON)
+
+Before being compressed, the columns of a chunk go through the following
+lossless filters:
+- 'delta' : the bit patterns of the rows are replaced by their difference
+  with the previous row (modular integer arithmetic) ; the times and the
+  slowly varying values of the fixed rate channels become a few distinct
+  small numbers,
+- 'shuffle' : the bytes are grouped by significance (the first byte of
+  all the values, then the second byte, ...) which makes the long runs of
+  identical high order bytes visible to the compressor.
+
+The codec is 'zlib' (the default) or 'lzma' from the standard library, or
+'lz4' if the lz4 package is installed.
+
+Usage :
+save(path, fig.SUBFIGS)                # Or compress(log_archive_path, path)
+archive = TrajectoryArchive(path)
+x, y = archive.read('joint_angles', 10., 12.)
+"""
+
+__all__ = ['save', 'compress', 'TrajectoryArchive']
+
+import json
+import lzma
+import zlib
+import numpy as np
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+from pyarm import log_archive
+
+MAGIC = b'PYARMTRJ'
+VERSION = 1
+EXTENSION = '.pyarmtrj'
+
+CHUNK_SIZE = 4096                   # Rows of a chunk
+FILTERS = ('delta', 'shuffle')
+CODEC = 'zlib'
+
+PREAMBLE_SIZE = len(MAGIC) + 4 + 8
+
+def codecs():
+    "Return the available codecs: {name: (compress, decompress)}."
+    available = {'zlib': (lambda data: zlib.compress(data, 6),
+                          zlib.decompress),
+                 'lzma': (lzma.compress, lzma.decompress)}
+    if lz4 is not None:
+        available['lz4'] = (lz4.frame.compress, lz4.frame.decompress)
+    return available
+
+###############################################################################
+
+def encode(rows, filters):
+    "Apply the filters to the rows (an array) and return the bytes."
+    rows = np.ascontiguousarray(rows)
+    itemsize = rows.dtype.itemsize
+
+    if 'delta' in filters and rows.shape[0] > 1:
+        bits = rows.view('u' + str(itemsize))
+        deltas = bits.copy()
+        deltas[1:] -= bits[:-1]
+        rows = deltas
+
+    data = rows.view(np.uint8).reshape(-1)
+    if 'shuffle' in filters and itemsize > 1:
+        data = data.reshape(-1, itemsize).T.ravel()
+    return data.tobytes()
+
+def decode(data, dtype, shape, filters):
+    "Revert encode(): return the rows (a 'shape' array of 'dtype')."
+    dtype = np.dtype(dtype)
+    itemsize = dtype.itemsize
+    data = np.frombuffer(data, np.uint8)
+
+    if 'shuffle' in filters and itemsize > 1:
+        data = data.reshape(itemsize, -1).T
+    data = np.ascontiguousarray(data)
+
+    if 'delta' in filters and shape[0] > 1:
+        bits = data.view('u' + str(itemsize)).reshape(shape)
+        return np.cumsum(bits, axis=0, dtype=bits.dtype).view(dtype)
+    return data.view(dtype).reshape(shape)
+
+###############################################################################
+
+def save(path, channels, metadata=None, chunk_size=CHUNK_SIZE,
+         filters=FILTERS, codec=CODEC):
+    """Save the channels (a dict of channels with 'xdata' and 'ydata' items,
+    eg. fig.SUBFIGS or the channels of a pyarm.log_archive.LogArchive) into
+    the trajectory archive 'path'.
+
+    'metadata' is an optional JSON compatible dict."""
+    available = codecs()
+    if codec not in available:
+        raise ValueError('TrajectoryArchive : unavailable codec '
+                         + repr(codec))
+    compress_data = available[codec][0]
+
+    header = {'version': VERSION,
+              'metadata': metadata or {},
+              'codec': codec,
+              'filters': list(filters),
+              'chunk_size': chunk_size,
+              'channels': {}}
+
+    with open(path, 'wb') as archive_file:
+        archive_file.write(MAGIC)
+        archive_file.write(np.uint32(VERSION).tobytes())
+        archive_file.write(np.uint64(0).tobytes())
+
+        def write_column(rows):
+            rows = np.asarray(rows)
+            description = {'dtype': rows.dtype.str,
+                           'shape': list(rows.shape),
+                           'chunks': []}
+            for start in range(0, rows.shape[0], chunk_size):
+                data = compress_data(encode(rows[start:start + chunk_size],
+                                            filters))
+                description['chunks'].append([archive_file.tell(),
+                                              len(data)])
+                archive_file.write(data)
+            return description
+
+        for name, channel in channels.items():
+            x = np.asarray(channel['xdata'], dtype=np.float64)
+            description = log_archive.channel_description(channel)
+            description['x'] = write_column(x)
+            description['y'] = write_column(channel['ydata'])
+
+            # Time index: x range of each chunk
+            description['index'] = [[float(x[start:start + chunk_size].min()),
+                                     float(x[start:start + chunk_size].max())]
+                                    for start
+                                    in range(0, x.shape[0], chunk_size)]
+
+            header['channels'][str(name)] = description
+
+        header_offset = archive_file.tell()
+        archive_file.write(json.dumps(header).encode('utf-8'))
+        archive_file.seek(len(MAGIC) + 4)
+        archive_file.write(np.uint64(header_offset).tobytes())
+
+def compress(log_path, path, **options):
+    """Compress the log archive 'log_path' (see pyarm.log_archive) into the
+    trajectory archive 'path' (the options are the options of save())."""
+    archive = log_archive.LogArchive(log_path)
+    save(path, archive.channels, archive.metadata, **options)
+
+###############################################################################
+
+class TrajectoryArchive:
+    """Trajectory archive opened for reading.
+
+    The channels are accessed by name (archive[name]) and behave like the
+    channels of a pyarm.log_archive.LogArchive: the properties are dict
+    items and the 'xdata' and 'ydata' items decompress the whole channel.
+    Use read() to decompress a time interval only."""
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks_read = 0         # Number of decompressed chunks
+
+        with open(path, 'rb') as archive_file:
+            preamble = archive_file.read(PREAMBLE_SIZE)
+            if preamble[:len(MAGIC)] != MAGIC:
+                raise ValueError('TrajectoryArchive : ' + str(path)
+                                 + ' is not a pyarm trajectory archive')
+            version = int(np.frombuffer(preamble, np.uint32, 1, len(MAGIC))[0])
+            if version > VERSION:
+                raise ValueError('TrajectoryArchive : unsupported version '
+                                 + str(version))
+            header_offset = int(np.frombuffer(preamble, np.uint64, 1,
+                                              len(MAGIC) + 4)[0])
+            archive_file.seek(header_offset)
+            self.header = json.loads(archive_file.read().decode('utf-8'))
+
+        available = codecs()
+        if self.header['codec'] not in available:
+            raise ValueError('TrajectoryArchive : unavailable codec '
+                             + repr(self.header['codec']))
+        self._decompress = available[self.header['codec']][1]
+        self._file = open(path, 'rb')
+
+        self.metadata = self.header['metadata']
+        self.channels = dict((name, CompressedChannel(self, name, description))
+                             for name, description
+                             in self.header['channels'].items())
+
+    def close(self):
+        self._file.close()
+
+    def _chunk(self, column, index):
+        "Decompress the chunk 'index' of a column description."
+        offset, size = column['chunks'][index]
+        self._file.seek(offset)
+        data = self._decompress(self._file.read(size))
+        self.chunks_read += 1
+
+        chunk_size = self.header['chunk_size']
+        rows = min(chunk_size, column['shape'][0] - index * chunk_size)
+        return decode(data, column['dtype'],
+                      [rows] + column['shape'][1:], self.header['filters'])
+
+    def _column(self, column, indices):
+        "Decompress and concatenate the chunks 'indices' of a column."
+        chunks = [self._chunk(column, index) for index in indices]
+        if not chunks:
+            return np.empty([0] + column['shape'][1:], column['dtype'])
+        return np.concatenate(chunks)
+
+    def read(self, name, start=None, stop=None):
+        """Return the x values and the samples (two arrays) of the channel
+        'name' such that start <= x <= stop (None for no bound).
+
+        Only the chunks which intersect the interval are decompressed."""
+        description = self.header['channels'][name]
+        low = -np.inf if start is None else start
+        high = np.inf if stop is None else stop
+
+        indices = [index for index, (first, last)
+                   in enumerate(description['index'])
+                   if last >= low and first <= high]
+        x = self._column(description['x'], indices)
+        y = self._column(description['y'], indices)
+
+        mask = (x >= low) & (x <= high)
+        return x[mask], y[mask]
+
+    def __getitem__(self, name):
+        return self.channels[name]
+
+    def __contains__(self, name):
+        return name in self.channels
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def __len__(self):
+        return len(self.channels)
+
+
+class CompressedChannel(dict):
+    "Channel of a TrajectoryArchive (see TrajectoryArchive)."
+
+    def __init__(self, archive, name, description):
+        dict.__init__(self, ((key, description.get(key)) for key
+                             in log_archive.PROPERTIES + ('unit',)))
+        self.archive = archive
+        self.name = name
+        self.description = description
+
+    def __getitem__(self, key):
+        if key in ('xdata', 'ydata'):
+            column = self.description[key[0]]
+            return self.archive._column(column,
+                                        range(len(column['chunks'])))
+        return dict.__getitem__(self, key)
@@ -79,8 +79,13 @@ PACKAGES = ['pyarm',
 INSTALL_REQUIRES = ['numpy', 'matplotlib']
 #INSTALL_REQUIRES = []
 
+# Optional dependencies (e.g. "pip install pyarm[jit]")
+EXTRAS_REQUIRE = {'jit': ['numba']}
+
 
 SCRIPTS = ["scripts/pyarm",
+           "scripts/pyarm-log-compress",
+           "scripts/pyarm-log2txt",
            "scripts/pyarm-plot",
            "scripts/pyarm-test-model"]
 
@@ -123,6 +128,7 @@ setup(author='Jeremie DECOCK',
       include_package_data=True, # Use the MANIFEST.in file
 
       install_requires=INSTALL_REQUIRES,
+      extras_require=EXTRAS_REQUIRE,
       #platforms=['Linux'],
       #requires=['numpy', 'matplotlib'],
 
@@ -170,7 +170,7 @@ def main():
     gui = gui_mod.GUI(muscle, arm, clock, screencast)
 
     # Miscellaneous initialization
-    fig.CLOCK = clock
+    fig.set_clock(clock)
     former_gui_time = 0
     gui.shoulder_point = [70, 70]
     gui.scale = 1200. # px/m (pixels per meter)